@@ -11,7 +11,8 @@ from models.models import (
     QueryWithEmbedding,
 )
 from services.chunks import get_document_chunks
-from services.openai import get_embeddings
+from services.metrics import DATASTORE_DURATION
+from services.embeddings import get_embedding_provider
 
 
 class DataStore(ABC):
@@ -37,9 +38,11 @@ class DataStore(ABC):
             ]
         )
 
-        chunks = get_document_chunks(documents, chunk_token_size)
+        with DATASTORE_DURATION.time(operation="upsert", stage="chunk_and_embed"):
+            chunks = await get_document_chunks(documents, chunk_token_size)
 
-        return await self._upsert(chunks)
+        with DATASTORE_DURATION.time(operation="upsert", stage="write"):
+            return await self._upsert(chunks)
 
     @abstractmethod
     async def _upsert(self, chunks: Dict[str, List[DocumentChunk]]) -> List[str]:
@@ -56,13 +59,15 @@ class DataStore(ABC):
         """
         # get a list of of just the queries from the Query list
         query_texts = [query.query for query in queries]
-        query_embeddings = get_embeddings(query_texts)
+        with DATASTORE_DURATION.time(operation="query", stage="embedding"):
+            query_embeddings = await get_embedding_provider().aembed(query_texts)
         # hydrate the queries with embeddings
         queries_with_embeddings = [
             QueryWithEmbedding(**query.dict(), embedding=embedding)
             for query, embedding in zip(queries, query_embeddings)
         ]
-        return await self._query(queries_with_embeddings)
+        with DATASTORE_DURATION.time(operation="query", stage="search"):
+            return await self._query(queries_with_embeddings)
 
     @abstractmethod
     async def _query(self, queries: List[QueryWithEmbedding]) -> List[QueryResult]:
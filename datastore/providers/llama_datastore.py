@@ -66,7 +66,7 @@ def _doc_chunk_to_node(doc_chunk: DocumentChunk, source_doc_id: str) -> Node:
     return Node(
         doc_id=doc_chunk.id,
         text=doc_chunk.text,
-        embedding=doc_chunk.embedding,
+        embedding=doc_chunk.embedding.tolist() if doc_chunk.embedding is not None else None,
         extra_info=doc_chunk.metadata.dict(),
         relationships={
             DocumentRelationship.SOURCE: source_doc_id
@@ -76,7 +76,7 @@ def _doc_chunk_to_node(doc_chunk: DocumentChunk, source_doc_id: str) -> Node:
 def _query_with_embedding_to_query_bundle(query: QueryWithEmbedding) -> QueryBundle:
     return QueryBundle(
         query_str = query.query,
-        embedding=query.embedding,
+        embedding=query.embedding.tolist(),
     )
 
 def _source_node_to_doc_chunk_with_score(node_with_score: NodeWithScore) -> DocumentChunkWithScore:
@@ -16,6 +16,7 @@ from uuid import uuid4
 
 
 from services.date import to_unix_timestamp
+from services.embeddings import EMBEDDING_DIMENSION
 from datastore.datastore import DataStore
 from models.models import (
     DocumentChunk,
@@ -39,7 +40,7 @@ MILVUS_SEARCH_PARAMS = os.environ.get("MILVUS_SEARCH_PARAMS")
 MILVUS_CONSISTENCY_LEVEL = os.environ.get("MILVUS_CONSISTENCY_LEVEL")
 
 UPSERT_BATCH_SIZE = 100
-OUTPUT_DIM = 1536
+OUTPUT_DIM = EMBEDDING_DIMENSION
 EMBEDDING_FIELD = "embedding"
 
 
@@ -345,6 +346,9 @@ class MilvusDataStore(DataStore):
         """
         # Convert DocumentChunk and its sub models to dict
         values = chunk.dict()
+        # pymilvus takes the embedding as a list of floats
+        if chunk.embedding is not None:
+            values["embedding"] = chunk.embedding.tolist()
         # Unpack the metadata into the same dict
         meta = values.pop("metadata")
         values.update(meta)
@@ -397,7 +401,7 @@ class MilvusDataStore(DataStore):
                 # Perform our search
                 return_from = 2 if self._schema_ver == "V1" else 1
                 res = self.col.search(
-                    data=[query.embedding],
+                    data=[query.embedding.tolist()],
                     anns_field=EMBEDDING_FIELD,
                     param=self.search_params,
                     limit=query.top_k,
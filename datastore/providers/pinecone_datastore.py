@@ -15,6 +15,17 @@ from models.models import (
     Source,
 )
 from services.date import to_unix_timestamp
+from services.embeddings import EMBEDDING_DIMENSION
+from services.partitions import (
+    DEFAULT_NAMESPACE,
+    VECTOR_DATE_PARTITIONS,
+    forget_namespaces,
+    list_namespaces,
+    partition_for,
+    search_filtered_partitions,
+    search_recent_partitions,
+    to_date,
+)
 
 # Read environment variables for Pinecone configuration
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
@@ -46,7 +57,7 @@ class PineconeDataStore(DataStore):
                 )
                 pinecone.create_index(
                     PINECONE_INDEX,
-                    dimension=1536,  # dimensionality of OpenAI ada v2 embeddings
+                    dimension=EMBEDDING_DIMENSION,  # dimensionality of the embedding provider's embeddings
                     metadata_config={"indexed": fields_to_index},
                 )
                 self.index = pinecone.Index(PINECONE_INDEX)
@@ -72,8 +83,8 @@ class PineconeDataStore(DataStore):
         """
         # Initialize a list of ids to return
         doc_ids: List[str] = []
-        # Initialize a list of vectors to upsert
-        vectors = []
+        # Initialize the lists of vectors to upsert, by namespace
+        vectors_by_namespace: Dict[str, List[Any]] = {}
         # Loop through the dict items
         for doc_id, chunk_list in chunks.items():
             # Append the id to the ids list
@@ -87,22 +98,37 @@ class PineconeDataStore(DataStore):
                 pinecone_metadata["text"] = chunk.text
                 pinecone_metadata["document_id"] = doc_id
                 vector = (chunk.id, chunk.embedding, pinecone_metadata)
-                vectors.append(vector)
-
-        # Split the vectors list into batches of the specified size
-        batches = [
-            vectors[i : i + UPSERT_BATCH_SIZE]
-            for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
-        ]
-        # Upsert each batch to Pinecone
-        for batch in batches:
-            try:
-                print(f"Upserting batch of size {len(batch)}")
-                self.index.upsert(vectors=batch)
-                print(f"Upserted batch successfully")
-            except Exception as e:
-                print(f"Error upserting batch: {e}")
-                raise e
+                # Dated chunks go to the namespace of their month
+                namespace = (
+                    partition_for(chunk.metadata.created_at)
+                    if VECTOR_DATE_PARTITIONS
+                    else DEFAULT_NAMESPACE
+                )
+                vectors_by_namespace.setdefault(namespace, []).append(vector)
+
+        for namespace, vectors in vectors_by_namespace.items():
+            # Split the vectors list into batches of the specified size
+            batches = [
+                vectors[i : i + UPSERT_BATCH_SIZE]
+                for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
+            ]
+            # Upsert each batch to Pinecone
+            for batch in batches:
+                try:
+                    print(f"Upserting batch of size {len(batch)} to namespace '{namespace}'")
+                    # The Pinecone client takes lists of floats, so only the current batch is converted
+                    self.index.upsert(
+                        vectors=[
+                            (id, embedding.tolist(), metadata)
+                            for id, embedding, metadata in batch
+                        ],
+                        namespace=namespace,
+                    )
+                    print(f"Upserted batch successfully")
+                except Exception as e:
+                    print(f"Error upserting batch: {e}")
+                    raise e
+        forget_namespaces(self.index)
 
         return doc_ids
 
@@ -123,20 +149,13 @@ class PineconeDataStore(DataStore):
             pinecone_filter = self._get_pinecone_filter(query.filter)
 
             try:
-                # Query the index with the query embedding, filter, and top_k
-                query_response = self.index.query(
-                    # namespace=namespace,
-                    top_k=query.top_k,
-                    vector=query.embedding,
-                    filter=pinecone_filter,
-                    include_metadata=True,
-                )
+                matches = await self._search(query, pinecone_filter)
             except Exception as e:
                 print(f"Error querying index: {e}")
                 raise e
 
             query_results: List[DocumentChunkWithScore] = []
-            for result in query_response.matches:
+            for result in matches:
                 score = result.score
                 metadata = result.metadata
                 # Remove document id and text from metadata and store it in a new variable
@@ -171,6 +190,51 @@ class PineconeDataStore(DataStore):
 
         return results
 
+    async def _query_namespace(
+        self, query: QueryWithEmbedding, pinecone_filter: Dict[str, Any], namespace: str
+    ) -> List[Any]:
+        query_response = await asyncio.to_thread(
+            self.index.query,
+            namespace=namespace,
+            top_k=query.top_k,
+            vector=query.embedding.tolist(),
+            filter=pinecone_filter,
+            include_metadata=True,
+        )
+        return query_response.matches
+
+    async def _search(
+        self, query: QueryWithEmbedding, pinecone_filter: Dict[str, Any]
+    ) -> List[Any]:
+        """
+        Search the monthly namespaces covering the query's date range, falling
+        back to the default namespace. Without a date range the default
+        namespace and the most recent months are searched first, then the
+        older months if they hold too few matches.
+        """
+        if not VECTOR_DATE_PARTITIONS:
+            return await self._query_namespace(query, pinecone_filter, DEFAULT_NAMESPACE)
+
+        namespaces = await list_namespaces(self.index)
+        start = to_date(query.filter.start_date) if query.filter else None
+        end = to_date(query.filter.end_date) if query.filter else None
+        if start is None and end is None:
+            return await search_recent_partitions(
+                lambda namespace: self._query_namespace(query, pinecone_filter, namespace),
+                query.top_k,
+                namespaces,
+            )
+
+        # The date range is part of pinecone_filter, so neighbouring months are never searched
+        return await search_filtered_partitions(
+            lambda namespace, filter: self._query_namespace(query, filter, namespace),
+            pinecone_filter,
+            start or end,
+            end or start,
+            query.top_k,
+            namespaces=namespaces,
+        )
+
     @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
     async def delete(
         self,
@@ -181,11 +245,20 @@ class PineconeDataStore(DataStore):
         """
         Removes vectors by ids, filter, or everything from the index.
         """
+        # Vectors may be in any monthly namespace
+        namespaces = (
+            await list_namespaces(self.index)
+            if VECTOR_DATE_PARTITIONS
+            else {DEFAULT_NAMESPACE}
+        )
+
         # Delete all vectors from the index if delete_all is True
         if delete_all:
             try:
                 print(f"Deleting all vectors from index")
-                self.index.delete(delete_all=True)
+                for namespace in namespaces:
+                    self.index.delete(delete_all=True, namespace=namespace)
+                forget_namespaces(self.index)
                 print(f"Deleted all vectors successfully")
                 return True
             except Exception as e:
@@ -198,7 +271,8 @@ class PineconeDataStore(DataStore):
         if pinecone_filter != {}:
             try:
                 print(f"Deleting vectors with filter {pinecone_filter}")
-                self.index.delete(filter=pinecone_filter)
+                for namespace in namespaces:
+                    self.index.delete(filter=pinecone_filter, namespace=namespace)
                 print(f"Deleted vectors with filter successfully")
             except Exception as e:
                 print(f"Error deleting vectors with filter: {e}")
@@ -209,7 +283,8 @@ class PineconeDataStore(DataStore):
             try:
                 print(f"Deleting vectors with ids {ids}")
                 pinecone_filter = {"document_id": {"$in": ids}}
-                self.index.delete(filter=pinecone_filter)  # type: ignore
+                for namespace in namespaces:
+                    self.index.delete(filter=pinecone_filter, namespace=namespace)  # type: ignore
                 print(f"Deleted vectors with ids successfully")
             except Exception as e:
                 print(f"Error deleting vectors with ids: {e}")
@@ -231,11 +306,11 @@ class PineconeDataStore(DataStore):
         for field, value in filter.dict().items():
             if value is not None:
                 if field == "start_date":
-                    pinecone_filter["date"] = pinecone_filter.get("date", {})
-                    pinecone_filter["date"]["$gte"] = to_unix_timestamp(value)
+                    pinecone_filter["created_at"] = pinecone_filter.get("created_at", {})
+                    pinecone_filter["created_at"]["$gte"] = to_unix_timestamp(value)
                 elif field == "end_date":
-                    pinecone_filter["date"] = pinecone_filter.get("date", {})
-                    pinecone_filter["date"]["$lte"] = to_unix_timestamp(value)
+                    pinecone_filter["created_at"] = pinecone_filter.get("created_at", {})
+                    pinecone_filter["created_at"]["$lte"] = to_unix_timestamp(value)
                 else:
                     pinecone_filter[field] = value
 
@@ -19,6 +19,7 @@ from qdrant_client.http import models as rest
 import qdrant_client
 
 from services.date import to_unix_timestamp
+from services.embeddings import EMBEDDING_DIMENSION
 
 QDRANT_URL = os.environ.get("QDRANT_URL", "http://localhost")
 QDRANT_PORT = os.environ.get("QDRANT_PORT", "6333")
@@ -33,7 +34,7 @@ class QdrantDataStore(DataStore):
     def __init__(
         self,
         collection_name: Optional[str] = None,
-        vector_size: int = 1536,
+        vector_size: int = EMBEDDING_DIMENSION,
         distance: str = "Cosine",
         recreate_collection: bool = False,
     ):
@@ -138,7 +139,7 @@ class QdrantDataStore(DataStore):
         )
         return rest.PointStruct(
             id=self._create_document_chunk_id(document_chunk.id),
-            vector=document_chunk.embedding,  # type: ignore
+            vector=document_chunk.embedding.tolist(),  # type: ignore
             payload={
                 "id": document_chunk.id,
                 "text": document_chunk.text,
@@ -156,7 +157,7 @@ class QdrantDataStore(DataStore):
         self, query: QueryWithEmbedding
     ) -> rest.SearchRequest:
         return rest.SearchRequest(
-            vector=query.embedding,
+            vector=query.embedding.tolist(),
             filter=self._convert_metadata_filter_to_qdrant_filter(query.filter),
             limit=query.top_k,  # type: ignore
             with_payload=True,
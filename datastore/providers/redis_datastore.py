@@ -25,6 +25,7 @@ from models.models import (
     QueryWithEmbedding,
 )
 from services.date import to_unix_timestamp
+from services.embeddings import EMBEDDING_DIMENSION
 
 # Read environment variables for Redis
 REDIS_HOST = os.environ.get("REDIS_HOST", "localhost")
@@ -37,7 +38,7 @@ REDIS_INDEX_TYPE = os.environ.get("REDIS_INDEX_TYPE", "FLAT")
 assert REDIS_INDEX_TYPE in ("FLAT", "HNSW")
 
 # OpenAI Ada Embeddings Dimension
-VECTOR_DIMENSION = 1536
+VECTOR_DIMENSION = EMBEDDING_DIMENSION
 
 # RediSearch constants
 REDIS_REQUIRED_MODULES = [
@@ -175,10 +176,13 @@ class RedisDataStore(DataStore):
         Returns:
             dict: JSON object for storage in Redis.
         """
-        # Convert chunk -> dict
-        data = chunk.__dict__
+        # Convert chunk -> dict, copied so the chunk keeps its fields
+        data = dict(chunk.__dict__)
         metadata = chunk.metadata.__dict__
         data["chunk_id"] = data.pop("id")
+        # RedisJSON stores the embedding as a JSON array
+        if chunk.embedding is not None:
+            data["embedding"] = chunk.embedding.tolist()
 
         # Prep Redis Metadata
         redis_metadata = dict(self._default_metadata)
@@ -211,7 +211,7 @@ class WeaviateDataStore(DataStore):
                             "author",
                         ],
                     )
-                    .with_hybrid(query=query.query, alpha=0.5, vector=query.embedding)
+                    .with_hybrid(query=query.query, alpha=0.5, vector=query.embedding.tolist())
                     .with_limit(query.top_k)  # type: ignore
                     .with_additional(["score", "vector"])
                     .do()
@@ -232,7 +232,7 @@ class WeaviateDataStore(DataStore):
                             "author",
                         ],
                     )
-                    .with_hybrid(query=query.query, alpha=0.5, vector=query.embedding)
+                    .with_hybrid(query=query.query, alpha=0.5, vector=query.embedding.tolist())
                     .with_where(filters_)
                     .with_limit(query.top_k)  # type: ignore
                     .with_additional(["score", "vector"])
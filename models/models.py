@@ -1,7 +1,35 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from pydantic.json import ENCODERS_BY_TYPE
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
+import numpy as np
+
+# Embeddings serialize to JSON as lists of floats, wherever they are nested
+ENCODERS_BY_TYPE[np.ndarray] = np.ndarray.tolist
+
+
+class Embedding(np.ndarray):
+    """
+    A one-dimensional, contiguous float32 array. Lists of floats are
+    converted on validation, float32 arrays are kept without a copy.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: Any) -> np.ndarray:
+        embedding = np.ascontiguousarray(value, dtype=np.float32)
+        if embedding.ndim != 1:
+            raise ValueError("an embedding must be a flat sequence of floats")
+        return embedding
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: Dict[str, Any]) -> None:
+        field_schema.update(type="array", items={"type": "number"})
+
 
 class Source(str, Enum):
     email = "email"
@@ -25,7 +53,7 @@ class DocumentChunk(BaseModel):
     id: Optional[str] = None
     text: str
     metadata: DocumentChunkMetadata
-    embedding: Optional[List[float]] = None
+    embedding: Optional[Embedding] = None
 
 
 class DocumentChunkWithScore(DocumentChunk):
@@ -58,7 +86,7 @@ class Query(BaseModel):
 
 
 class QueryWithEmbedding(Query):
-    embedding: List[float]
+    embedding: Embedding
 
 
 class QueryResult(BaseModel):
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import os
+
+from services import sportsdata
+from services.season_archive import (
+    ALL_STARS,
+    ARCHIVE_FILENAME,
+    NBA_ARCHIVE_DIR,
+    STANDINGS,
+    write_archive,
+)
+from services.season_store import get_closed_dates, ingest_season
+
+
+async def build_season_archive(season: int, output_dir: str) -> str:
+    # fetch the season-level payloads and every player game log of the season;
+    # the schedule is only used to check that every completed day was ingested
+    standings, all_stars, season_games = await asyncio.gather(
+        sportsdata.get_standings(season),
+        sportsdata.get_all_stars(season),
+        sportsdata.get_season_games(season),
+    )
+    table = await ingest_season(season)
+    # Days that failed to ingest are skipped by the server, but an archive is never refreshed
+    missing_dates = sorted(set(get_closed_dates(season_games)) - table.dates)
+    if missing_dates:
+        raise RuntimeError(f"Season {season}: failed to ingest {', '.join(missing_dates)}")
+    print(f"Season {season}: {len(season_games)} games, {len(table)} player game logs")
+
+    path = os.path.join(output_dir, ARCHIVE_FILENAME.format(season=season))
+    write_archive(
+        path,
+        {
+            STANDINGS: standings,
+            ALL_STARS: all_stars,
+            **table.to_archive_sections(),
+        },
+    )
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+    return path
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--seasons", required=True, type=int, nargs="+", help="The seasons to archive, e.g. 2022 2023"
+    )
+    parser.add_argument(
+        "--output_dir",
+        default=NBA_ARCHIVE_DIR,
+        help="The directory to write the archives to, which the server reads from NBA_ARCHIVE_DIR",
+    )
+    parser.add_argument(
+        "--force",
+        default=False,
+        type=bool,
+        help="A boolean flag to archive the season being played, whose data can still change",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    try:
+        for season in args.seasons:
+            if season >= sportsdata.current_season() and not args.force:
+                print(f"Skipping season {season}: it is not completed yet")
+                continue
+            await build_season_archive(season, args.output_dir)
+    finally:
+        await sportsdata.close_sportsdata_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
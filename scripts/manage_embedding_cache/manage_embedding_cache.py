@@ -0,0 +1,52 @@
+import argparse
+
+from services.embedding_cache import (
+    INGEST_EMBEDDING_CACHE_MAX_ENTRIES,
+    INGEST_EMBEDDING_CACHE_PATH,
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+    QUERY_EMBEDDING_CACHE_PATH,
+    EmbeddingCache,
+)
+
+# The file and bound the server uses for each cache
+CACHES = {
+    "ingest": (INGEST_EMBEDDING_CACHE_PATH, INGEST_EMBEDDING_CACHE_MAX_ENTRIES),
+    "query": (QUERY_EMBEDDING_CACHE_PATH, QUERY_EMBEDDING_CACHE_MAX_ENTRIES),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["export", "import", "stats"], help="What to do with the cache")
+    parser.add_argument("--file", help="The file to export to or import from")
+    parser.add_argument("--cache", choices=list(CACHES), default="ingest", help="Which embedding cache to manage")
+    parser.add_argument(
+        "--cache_path",
+        help="The cache file. Defaults to the one the server reads from INGEST_EMBEDDING_CACHE_PATH or QUERY_EMBEDDING_CACHE_PATH",
+    )
+    parser.add_argument(
+        "--max_entries",
+        type=int,
+        help="The most embeddings kept after an import. Defaults to the server's bound for the cache",
+    )
+    args = parser.parse_args()
+    if args.action in ("export", "import") and not args.file:
+        parser.error(f"{args.action} requires --file")
+    default_path, default_max_entries = CACHES[args.cache]
+    args.cache_path = args.cache_path or default_path
+    args.max_entries = args.max_entries if args.max_entries is not None else default_max_entries
+
+    cache = EmbeddingCache(args.cache_path, memory_size=0, max_entries=args.max_entries)
+    try:
+        if args.action == "export":
+            print(f"Exported {cache.export(args.file)} embeddings to {args.file}")
+        elif args.action == "import":
+            imported = cache.import_from(args.file)
+            print(f"Imported {imported} embeddings from {args.file}, evicted {cache.evictions}")
+        print(f"{args.cache_path} holds {len(cache)} embeddings")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+from sportsdata_replay import load_fixtures
+
+ROUTES = ["games", "games_range", "year_standings", "allstar_roster", "current_roster_list", "player_stats_by_date"]
+
+
+def build_requests(fixtures: Dict[str, bytes], message: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Build the query parameters of every route from what the fixtures cover,
+    so the load test only asks for data the stand-in can serve.
+    """
+    days = sorted(path.rsplit("/", 1)[1] for path in fixtures if path.startswith("scores/json/GamesByDate/"))
+    years = sorted(path.rsplit("/", 1)[1] for path in fixtures if path.startswith("scores/json/Standings/"))
+    all_star_years = sorted(path.rsplit("/", 1)[1] for path in fixtures if path.startswith("stats/json/AllStars/"))
+    teams = sorted(path.rsplit("/", 1)[1] for path in fixtures if path.startswith("scores/json/PlayersBasic/"))
+
+    player_stats = []
+    for path, body in fixtures.items():
+        if path.startswith("stats/json/PlayerGameStatsByDate/"):
+            date = path.rsplit("/", 1)[1]
+            for record in json.loads(body)[:20]:
+                player_stats.append({"date": date, "player_id": str(record["PlayerID"]), "message": message})
+
+    return {
+        "games": [{"day": day, "message": message} for day in days],
+        "games_range": [
+            {"start_date": start, "end_date": end, "message": message}
+            for start, end in zip(days, days[6:])
+        ],
+        "year_standings": [{"year": year, "message": message} for year in years],
+        "allstar_roster": [{"year": year, "message": message} for year in all_star_years],
+        "current_roster_list": [{"team_abv": team, "message": message} for team in teams],
+        "player_stats_by_date": player_stats,
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run(
+    base_url: str,
+    token: str,
+    requests: Dict[str, List[Dict[str, str]]],
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> Tuple[Dict[str, List[float]], Dict[str, Dict[int, int]], float]:
+    rng = random.Random(seed)
+    routes = [route for route, params in requests.items() if params]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=httpx.Limits(max_connections=concurrency),
+        timeout=30.0,
+    ) as client:
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                route = rng.choice(routes)
+                params = rng.choice(requests[route])
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f"/{route}", params=params)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies[route].append(time.perf_counter() - start)
+                statuses[route][status] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def report(latencies: Dict[str, List[float]], statuses: Dict[str, Dict[int, int]], elapsed: float) -> None:
+    totals: Dict[int, int] = defaultdict(int)
+    for counts in statuses.values():
+        for status, count in counts.items():
+            totals[status] += count
+    rows = [(route, latencies[route], statuses[route]) for route in sorted(latencies)]
+    rows.append(("all", [value for values in latencies.values() for value in values], totals))
+
+    print(f"{'route':<24}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for route, values, counts in rows:
+        values = sorted(values)
+        # Status 0 counts requests that failed before a response
+        errors = sum(count for status, count in counts.items() if status == 0 or status >= 500)
+        print(
+            f"{route:<24}{len(values):>10}{errors:>8}{len(values) / elapsed:>9.1f}"
+            f"{percentile(values, 0.5) * 1000:>9.1f}{percentile(values, 0.9) * 1000:>9.1f}"
+            f"{percentile(values, 0.99) * 1000:>9.1f}{(values[-1] if values else 0) * 1000:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base_url", default="http://127.0.0.1:8000", help="The NBA server to load")
+    parser.add_argument("--token", default=os.environ.get("BEARER_TOKEN"), help="The server's bearer token")
+    parser.add_argument("--fixtures_dir", default="fixtures/sportsdata", help="The stand-in's fixtures, to pick request parameters")
+    parser.add_argument("--routes", nargs="*", default=ROUTES, choices=ROUTES, help="The routes to drive")
+    parser.add_argument("--concurrency", type=int, default=16, help="The number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run for")
+    parser.add_argument(
+        "--message",
+        default="",
+        help="The message passed to every route. Leave it empty to skip the OpenAI and Pinecone search and stay offline",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="A seed for reproducible request mixes")
+    args = parser.parse_args()
+
+    requests = build_requests(load_fixtures(args.fixtures_dir), args.message)
+    requests = {route: params for route, params in requests.items() if route in args.routes}
+    latencies, statuses, elapsed = asyncio.run(
+        run(args.base_url, args.token, requests, args.concurrency, args.duration, args.seed)
+    )
+    report(latencies, statuses, elapsed)
+
+
+if __name__ == "__main__":
+    main()
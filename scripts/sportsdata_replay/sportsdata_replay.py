@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from services import sportsdata
+
+TEAMS = [
+    "ATL", "BOS", "BKN", "CHA", "CHI", "CLE", "DAL", "DEN", "DET", "GS",
+    "HOU", "IND", "LAC", "LAL", "MEM", "MIA", "MIL", "MIN", "NO", "NY",
+    "OKC", "ORL", "PHI", "PHO", "POR", "SAC", "SA", "TOR", "UTA", "WAS",
+]
+
+
+def fixture_path(fixtures_dir: str, path: str) -> str:
+    # Fixtures mirror the sportsdata.io paths, e.g. scores/json/GamesByDate/2023-04-01.json
+    return os.path.join(fixtures_dir, *path.strip("/").split("/")) + ".json"
+
+
+def write_fixture(fixtures_dir: str, path: str, payload: Any) -> None:
+    filename = fixture_path(fixtures_dir, path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(payload, f)
+
+
+def load_fixtures(fixtures_dir: str) -> Dict[str, bytes]:
+    """
+    Read every fixture into memory, keyed by its sportsdata.io path.
+    """
+    fixtures = {}
+    for root, _, files in os.walk(fixtures_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            filename = os.path.join(root, name)
+            path = os.path.relpath(filename, fixtures_dir)[: -len(".json")].replace(os.sep, "/")
+            with open(filename, "rb") as f:
+                fixtures[path] = f.read()
+    return fixtures
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    return [(start + datetime.timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def recorded_paths(days: List[str], years: List[int], teams: List[str]) -> List[str]:
+    paths = ["scores/json/teams"]
+    for day in days:
+        paths.append(f"scores/json/GamesByDate/{day}")
+        paths.append(f"stats/json/PlayerGameStatsByDate/{day}")
+    for year in years:
+        paths.append(f"scores/json/Standings/{year}")
+        paths.append(f"stats/json/AllStars/{year}")
+        paths.append(f"scores/json/Games/{year}")
+    for team in teams:
+        paths.append(f"scores/json/PlayersBasic/{team}")
+    return paths
+
+
+async def record(fixtures_dir: str, paths: List[str]) -> None:
+    """
+    Fetch each path from sportsdata.io and save the payload as a fixture.
+    """
+    client = sportsdata.get_sportsdata_client()
+    try:
+        for path in paths:
+            try:
+                payload = await client.get_json(path)
+            except sportsdata.SportsDataError as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            write_fixture(fixtures_dir, path, payload)
+            print(f"Recorded {path}")
+    finally:
+        await sportsdata.close_sportsdata_client()
+
+
+def synthesize(fixtures_dir: str, days: List[str], years: List[int], teams: List[str], seed: int = 0) -> None:
+    """
+    Generate plausible fixtures without any network access, for benchmarking
+    when no recording is available. Numbers are random but shaped like the
+    real payloads.
+    """
+    rng = random.Random(seed)
+    players = {
+        team: [
+            {
+                "PlayerID": 20000000 + TEAMS.index(team) * 100 + i,
+                "Status": "Active",
+                "TeamID": TEAMS.index(team) + 1,
+                "Team": team,
+                "Jersey": i,
+                "Position": rng.choice(["PG", "SG", "SF", "PF", "C"]),
+                "FirstName": f"Player{i}",
+                "LastName": team.title(),
+                "Height": rng.randint(72, 86),
+                "Weight": rng.randint(170, 280),
+                "BirthDate": "1998-01-01T00:00:00",
+            }
+            for i in range(13)
+        ]
+        for team in TEAMS
+    }
+    write_fixture(
+        fixtures_dir,
+        "scores/json/teams",
+        [{"TeamID": i + 1, "Key": team, "Active": True, "City": team, "Name": team} for i, team in enumerate(TEAMS)],
+    )
+    for team in teams:
+        if team in players:
+            write_fixture(fixtures_dir, f"scores/json/PlayersBasic/{team}", players[team])
+
+    season_games: Dict[int, List[Dict[str, Any]]] = {}
+    for day in days:
+        matchups = rng.sample(TEAMS, 2 * rng.randint(3, 7))
+        games, stat_lines = [], []
+        for i in range(0, len(matchups), 2):
+            away, home = matchups[i], matchups[i + 1]
+            game_id = int(day.replace("-", "")) * 100 + i // 2
+            season = int(day[:4]) + (1 if int(day[5:7]) >= 10 else 0)
+            game = {
+                "GameID": game_id,
+                "Season": season,
+                "SeasonType": 1,
+                "Status": "Final",
+                "Day": f"{day}T00:00:00",
+                "DateTime": f"{day}T19:30:00",
+                "DateTimeUTC": f"{day}T23:30:00",
+                "GameEndDateTime": f"{day}T22:00:00",
+                "AwayTeam": away,
+                "HomeTeam": home,
+                "AwayTeamID": TEAMS.index(away) + 1,
+                "HomeTeamID": TEAMS.index(home) + 1,
+                "StadiumID": TEAMS.index(home) + 1,
+                "AwayTeamScore": rng.randint(90, 135),
+                "HomeTeamScore": rng.randint(90, 135),
+                "Updated": f"{day}T22:05:00",
+                "IsClosed": True,
+                "NeutralVenue": False,
+            }
+            games.append(game)
+            season_games.setdefault(season, []).append(game)
+            for team, opponent, home_or_away in ((away, home, "AWAY"), (home, away, "HOME")):
+                for player in players[team][:10]:
+                    made, attempted = rng.randint(0, 12), rng.randint(12, 22)
+                    stat_lines.append(
+                        {
+                            "StatID": game_id * 1000 + player["PlayerID"] % 1000,
+                            "TeamID": player["TeamID"],
+                            "PlayerID": player["PlayerID"],
+                            "SeasonType": 1,
+                            "Season": season,
+                            "Name": f"{player['FirstName']} {player['LastName']}",
+                            "Team": team,
+                            "Position": player["Position"],
+                            "GameID": game_id,
+                            "OpponentID": TEAMS.index(opponent) + 1,
+                            "Opponent": opponent,
+                            "Day": f"{day}T00:00:00",
+                            "DateTime": f"{day}T19:30:00",
+                            "HomeOrAway": home_or_away,
+                            "IsGameOver": True,
+                            "IsClosed": True,
+                            "Games": 1,
+                            "Minutes": rng.randint(10, 40),
+                            "FieldGoalsMade": made,
+                            "FieldGoalsAttempted": attempted,
+                            "Points": 2 * made + rng.randint(0, 8),
+                            "Rebounds": rng.randint(0, 14),
+                            "Assists": rng.randint(0, 12),
+                        }
+                    )
+        write_fixture(fixtures_dir, f"scores/json/GamesByDate/{day}", games)
+        write_fixture(fixtures_dir, f"stats/json/PlayerGameStatsByDate/{day}", stat_lines)
+
+    for year in years:
+        write_fixture(fixtures_dir, f"scores/json/Games/{year}", season_games.get(year, []))
+        write_fixture(
+            fixtures_dir,
+            f"scores/json/Standings/{year}",
+            [
+                {"Season": year, "TeamID": i + 1, "Key": team, "Wins": rng.randint(20, 60), "Losses": rng.randint(20, 60)}
+                for i, team in enumerate(TEAMS)
+            ],
+        )
+        write_fixture(
+            fixtures_dir,
+            f"stats/json/AllStars/{year}",
+            [{"PlayerID": player["PlayerID"], "Name": player["FirstName"], "Team": player["Team"]} for player in rng.sample(players["BOS"], 3)],
+        )
+    print(f"Wrote synthetic fixtures for {len(days)} days, {len(years)} seasons and {len(teams)} teams to {fixtures_dir}")
+
+
+def create_app(
+    fixtures: Dict[str, bytes],
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    seed: Optional[int] = None,
+) -> Starlette:
+    """
+    Build an app serving fixtures at their sportsdata.io paths.
+
+    Args:
+        fixtures: The fixture bodies keyed by path, as returned by load_fixtures.
+        latency_ms: The mean added latency of each response.
+        jitter_ms: The spread of the added latency, uniform around the mean.
+        error_rate: The fraction of requests answered with a 500.
+        throttle_rate: The fraction of requests answered with a 429.
+        seed: A seed to make the injected latency and errors reproducible.
+    """
+    rng = random.Random(seed)
+
+    async def replay(request: Request) -> Response:
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        roll = rng.random()
+        if roll < error_rate:
+            return JSONResponse({"Message": "Injected error"}, status_code=500)
+        if roll < error_rate + throttle_rate:
+            return JSONResponse({"Message": "Injected rate limit"}, status_code=429)
+        body = fixtures.get(request.path_params["path"].strip("/"))
+        if body is None:
+            return JSONResponse({"Message": "No fixture recorded"}, status_code=404)
+        return Response(body, media_type="application/json")
+
+    return Starlette(routes=[Route("/{path:path}", replay)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["record", "synthesize", "serve"], help="What to do with the fixtures")
+    parser.add_argument("--fixtures_dir", default="fixtures/sportsdata", help="The directory holding the fixtures")
+    parser.add_argument("--start_date", help="The first game day to record or synthesize, YYYY-MM-DD")
+    parser.add_argument("--end_date", help="The last game day to record or synthesize, YYYY-MM-DD")
+    parser.add_argument("--years", type=int, nargs="*", default=[], help="Seasons whose standings, All-Stars and schedule to record")
+    parser.add_argument("--teams", nargs="*", default=[], help="Team abbreviations whose rosters to record")
+    parser.add_argument("--host", default="127.0.0.1", help="The host to serve on")
+    parser.add_argument("--port", type=int, default=8010, help="The port to serve on")
+    parser.add_argument("--latency_ms", type=float, default=50.0, help="The mean added latency of each response")
+    parser.add_argument("--jitter_ms", type=float, default=25.0, help="The spread of the added latency")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="The fraction of responses that are 500s")
+    parser.add_argument("--throttle_rate", type=float, default=0.0, help="The fraction of responses that are 429s")
+    parser.add_argument("--seed", type=int, default=None, help="A seed for reproducible latency and errors")
+    args = parser.parse_args()
+
+    days = date_range(args.start_date, args.end_date) if args.start_date and args.end_date else []
+    if args.mode == "record":
+        asyncio.run(record(args.fixtures_dir, recorded_paths(days, args.years, args.teams)))
+    elif args.mode == "synthesize":
+        synthesize(args.fixtures_dir, days, args.years, args.teams or TEAMS, seed=args.seed or 0)
+    else:
+        fixtures = load_fixtures(args.fixtures_dir)
+        print(f"Serving {len(fixtures)} fixtures from {args.fixtures_dir}")
+        app = create_app(
+            fixtures,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            seed=args.seed,
+        )
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
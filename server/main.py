@@ -1,16 +1,14 @@
 import os
-from typing import Optional
+import time
+from typing import Optional, Set
 import uvicorn
-from fastapi import FastAPI, File, Form, HTTPException, Depends, Body, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Depends, Body, UploadFile, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import datetime
-import json
 import openai
-from openai.embeddings_utils import get_embedding
 import pinecone
-import requests
-import numpy as np
 import logging
 
 
@@ -25,7 +23,38 @@ from models.api import (
 )
 from datastore.factory import get_datastore
 from services.file import get_document_from_file
-from services.openai import get_embeddings
+from services.context_search import cancel_search, finish_search, start_search
+from services import sportsdata
+from services.sportsdata import CircuitOpenError, SportsDataClientError, SportsDataError, served_stale
+from services.player_stats import PLAYER_STAT_FIELDS, get_player_stats_index
+from services.season_store import (
+    SPLITS,
+    SeasonOutOfRangeError,
+    get_season_table,
+    is_ingesting,
+    start_ingestion,
+    stop_ingestions,
+)
+from services.prefetch import PREFETCH_ENABLED, PrefetchScheduler
+from services.live_games import LiveGameTracker
+from services.player_names import AmbiguousPlayerNameError, PlayerNameDirectory
+from services.partitions import to_date
+from services.batch import MAX_BATCH_ITEMS, date_range, gather_bounded, parse_list, split_errors
+from services.structured_logging import Payload, configure_logging, stop_logging
+from services.metrics import REQUEST_DURATION, REQUESTS_IN_FLIGHT, current_route, registry
+from services.season_archive import ALL_STARS, STANDINGS, get_archive, load_archives
+from services.responses import (
+    ALL_STAR_FIELDS,
+    GAME_FIELDS,
+    ROSTER_FIELDS,
+    STANDINGS_FIELDS,
+    NBAJSONResponse,
+    dumps,
+    get_encoded,
+    parse_fields,
+    project,
+    set_encoded,
+)
 
 from models.models import DocumentMetadata, Source
 
@@ -59,251 +88,434 @@ pinecone.init(api_key="f0570753-9d5f-4be9-9533-1d912957ed25", environment="us-ea
 # Connect to the index
 index = pinecone.Index(index_name)
 
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
+prefetch_scheduler = PrefetchScheduler()
+live_game_tracker = LiveGameTracker()
+player_name_directory = PlayerNameDirectory()
+
+
+# The paths of the registered routes, collected at startup once every route is registered
+route_paths: Set[str] = set()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Label by route path only for known routes, to keep label cardinality bounded
+    route = request.url.path if request.url.path in route_paths else "other"
+    token = current_route.set(route)
+    stale = {}
+    stale_token = served_stale.set(stale)
+    start = time.perf_counter()
+    status = "500"
+    try:
+        with REQUESTS_IN_FLIGHT.track(route=route):
+            response = await call_next(request)
+        status = str(response.status_code)
+        if stale:
+            # Some upstream data was served past its expiry
+            response.headers["Warning"] = '110 - "Response is Stale"'
+            response.headers["X-Data-Stale-Seconds"] = f"{max(stale.values()):.0f}"
+        return response
+    finally:
+        REQUEST_DURATION.observe(time.perf_counter() - start, route=route, status=status)
+        served_stale.reset(stale_token)
+        current_route.reset(token)
+
+
+# Behind the bearer token dependency like every other route; scrapers send the token
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.exception_handler(SportsDataError)
+async def sportsdata_error_handler(request, exc: SportsDataError):
+    logger.warning(f"Upstream error: {exc}")
+    if isinstance(exc, CircuitOpenError):
+        # Fail fast while the stats provider recovers
+        retry_after = f"{sportsdata.get_circuit_breaker().open_duration:.0f}"
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Stats provider unavailable"},
+            headers={"Retry-After": retry_after},
+        )
+    if isinstance(exc, SportsDataClientError) and exc.status_code not in (401, 403):
+        # The request named something the stats provider does not know, e.g. an unknown team;
+        # rejected credentials are our fault and stay a 502
+        if exc.status_code == 404:
+            detail = f"The stats provider has no data for {exc.path}; check the team, player, date or season"
+            return JSONResponse(status_code=404, content={"detail": detail})
+        detail = f"The stats provider rejected {exc.path} with status {exc.status_code}"
+        return JSONResponse(status_code=400, content={"detail": detail})
+    return JSONResponse(status_code=502, content={"detail": "Stats provider unavailable"})
+
+
+@app.exception_handler(AmbiguousPlayerNameError)
+async def ambiguous_player_name_handler(request, exc: AmbiguousPlayerNameError):
+    # Lists the candidates so the caller can retry with a full name or PlayerID
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(SeasonOutOfRangeError)
+async def season_out_of_range_handler(request, exc: SeasonOutOfRangeError):
+    # Rejected before any ingestion starts, so unknown seasons cost no upstream calls
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 
-def filter_game_data(game):
-    return {
-        "GameEndDateTime": game["GameEndDateTime"],
-        "GameID": game["GameID"],
-        "Season": game["Season"],
-        "SeasonType": game["SeasonType"],
-        "Status": game["Status"],
-        "Day": game["Day"],
-        "DateTime": game["DateTime"],
-        "AwayTeam": game["AwayTeam"],
-        "HomeTeam": game["HomeTeam"],
-        "AwayTeamID": game["AwayTeamID"],
-        "HomeTeamID": game["HomeTeamID"],
-        "StadiumID": game["StadiumID"],
-        "AwayTeamScore": game["AwayTeamScore"],
-        "HomeTeamScore": game["HomeTeamScore"],
-        "Updated": game["Updated"],
-        "IsClosed": game["IsClosed"],
-        "NeutralVenue": game["NeutralVenue"],
-        "DateTimeUTC": game["DateTimeUTC"],
-    }
-
 def create_date_string(year, month, day):
     return f"{year:04d}-{month:02d}-{day:02d}"
 
 
 @app.get("/games")
-async def get_games(day, message):
-    logger.info(f"Day pre: {Day}")
-    day = day["day"]
-    logger.info(f"Day post: {Day}")
-    if day:
-        api_url = f"https://api.sportsdata.io/v3/nba/scores/json/GamesByDate/{day}?key=48a287166d5d4ecabd71c344439ee80c"
-        logger.info(f"API-URL: {api_url}")
-
-        response = requests.get(api_url)
-        raw_scores = response.json()
-    else:
-        raw_scores = "No scores availible for that day"
-
-  
-    year, month, day = date.split('-')
-
-    if message:
-        # Convert ndarray to list
-        info_vector_list = await get_embeddings(message)
-    
-        # Semantic Search within category
-        search = index.query(
-          vector=info_vector_list,
-          #filter={"Year": {"$eq": year},
-          #       "Month": {"$eq": month},
-          #       "Day": {"$eq": day}},
-          top_k=10,
-          include_metadata=True
-        )  
-    
-        search_results = search["matches"]
-    else:
-      search = "No vector results found"
-      
+async def get_games(
+    request: Request,
+    day,
+    message,
+    since_version: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    search_task = start_search(index, message, start_date=to_date(day))
+    try:
+        version = None
+        headers = {}
+        if day:
+            raw_scores = await sportsdata.get_games_by_date(day)
+            live_game_tracker.update(day, raw_scores)
+            version = live_game_tracker.version_token(day)
+
+            if since_version is not None:
+                raw_scores = live_game_tracker.changed_since(day, since_version)
+            raw_scores = project(raw_scores, parse_fields(fields, GAME_FIELDS))
+
+            # Let clients polling a live day skip unchanged responses; the tag hashes only
+            # the content, not the per-process version epoch, so every replica agrees
+            etag = live_game_tracker.etag(raw_scores, message)
+            if request.headers.get("if-none-match") == etag:
+                cancel_search(search_task)
+                return Response(status_code=304, headers={"ETag": etag})
+            headers["ETag"] = etag
+        else:
+            raw_scores = "No scores availible for that day"
+    except BaseException:
+        cancel_search(search_task)
+        raise
+
+    search_results = await finish_search(search_task)
+
     # Combine JSON files
     combined_results = {}
     combined_results['game_data'] = raw_scores
+    combined_results['version'] = version
     combined_results['search_results'] = search_results
 
-    logger.info(f"Day: {day}, Message: {message}")
-    logger.info(f"Raw_Scores: {raw_scores}"
-                f"Search_Results: {search_results}")
+    logger.info(
+        "games",
+        extra={
+            "fields": {
+                "day": day,
+                "message": message,
+                "version": version,
+                "game_data": Payload(raw_scores),
+                "search_results": Payload(search_results),
+            }
+        },
+    )
       
-    return combined_results
+    return NBAJSONResponse(combined_results, headers=headers)
+
+def involves_team(game, teams):
+    return game.get("HomeTeam") in teams or game.get("AwayTeam") in teams
+
+@app.get("/games_range")
+async def get_games_range(
+    start_date,
+    end_date,
+    message,
+    team_abv: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    try:
+        days = date_range(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    teams = {team.upper() for team in parse_list(team_abv)}
+
+    search_task = start_search(index, message, start_date=to_date(days[0]), end_date=to_date(days[-1]))
+    try:
+        # Days already cached, e.g. completed ones, cost no upstream call
+        games, errors = split_errors(await gather_bounded(days, sportsdata.get_games_by_date))
+    except BaseException:
+        cancel_search(search_task)
+        raise
+
+    projection = parse_fields(fields, GAME_FIELDS)
+    games_by_date = {}
+    for day, day_games in games.items():
+        if not isinstance(day_games, list):
+            day_games = []
+        if teams:
+            day_games = [game for game in day_games if involves_team(game, teams)]
+        games_by_date[day] = project(day_games, projection)
+
+    search_results = await finish_search(search_task)
+
+    return NBAJSONResponse(
+        {"games_by_date": games_by_date, "errors": errors, "search_results": search_results}
+    )
 
 @app.get("/year_standings")
-def get_standings(year, message):
-    api_url_today = f"https://api.sportsdata.io/v3/nba/scores/json/Standings/{year}?key=48a287166d5d4ecabd71c344439ee80c"
-    response = requests.get(api_url_today)
-    raw_standings = response.json()
-    return raw_standings
+async def get_standings(year, message, fields: Optional[str] = None):
+    projection = parse_fields(fields, STANDINGS_FIELDS)
+
+    # Completed seasons are served straight from the memory-mapped archive,
+    # encoded once per projection
+    archive = get_archive(year)
+    if archive is not None and STANDINGS in archive:
+        if projection is None:
+            return NBAJSONResponse(archive.json_bytes(STANDINGS))
+        key = (STANDINGS, archive.season, tuple(projection))
+        body = get_encoded(key) or set_encoded(key, dumps(project(archive.json(STANDINGS), projection)))
+        return NBAJSONResponse(body)
+
+    raw_standings = await sportsdata.get_standings(year)
+    return NBAJSONResponse(project(raw_standings, projection))
 
 @app.get("/allstar_roster")
-def get_allstar_roster(year: int, message: str):
-    api_url_today = f"https://api.sportsdata.io/v3/nba/stats/json/AllStars/{year}?key=48a287166d5d4ecabd71c344439ee80c"
-    response = requests.get(api_url_today)
-    raw_all_star_roster = response.json()
-
-    # Perform semantic search - get message vector embedding
-    info_vector = get_embedding(message, engine="text-embedding-ada-002")
-    info_vector = np.array(info_vector).reshape(1, -1)
-    info_vector = info_vector.reshape(-1)
-
-    # Convert ndarray to list
-    info_vector_list = info_vector.tolist()
-
-    # Semantic Search within category
-    search = index.query(
-      vector=info_vector_list,
-      filter={"Year": {"$eq": year}},
-      top_k=10,
-      include_metadata=True
-    )  
-
-    search_results = search["matches"]
+async def get_allstar_roster(year: int, message: str, fields: Optional[str] = None):
+    # The All-Star break is in February; the search widens around it if needed
+    search_task = start_search(
+        index,
+        message,
+        filter={"Year": {"$eq": year}},
+        start_date=datetime.date(year, 2, 1),
+        end_date=datetime.date(year, 2, 28),
+    )
+    try:
+        archive = get_archive(year)
+        if archive is not None and ALL_STARS in archive:
+            raw_all_star_roster = archive.json(ALL_STARS)
+        else:
+            raw_all_star_roster = await sportsdata.get_all_stars(year)
+    except BaseException:
+        cancel_search(search_task)
+        raise
+
+    search_results = await finish_search(search_task)
 
     # Combine JSON files
     combined_results = {}
-    combined_results['all_star_roster'] = raw_all_star_roster
+    combined_results['all_star_roster'] = project(raw_all_star_roster, parse_fields(fields, ALL_STAR_FIELDS))
     combined_results['search_results'] = search_results
       
-    return json.dumps(combined_results)
+    return NBAJSONResponse(combined_results)
     
 @app.get("/current_roster_list")
-def get_current_rosters(team_abv, message):
-    api_url_today = f"https://api.sportsdata.io/v3/nba/scores/json/PlayersBasic/{team_abv}?key=48a287166d5d4ecabd71c344439ee80c"
-    response = requests.get(api_url_today)
-    raw_roster = response.json()
-    return raw_roster
+async def get_current_rosters(team_abv, message, fields: Optional[str] = None):
+    raw_roster = await sportsdata.get_players_basic(team_abv)
+    return NBAJSONResponse(project(raw_roster, parse_fields(fields, ROSTER_FIELDS)))
+
+@app.get("/current_roster_lists")
+async def get_current_rosters_batch(team_abvs: str, message, fields: Optional[str] = None):
+    teams = [team.upper() for team in parse_list(team_abvs)]
+    if not teams or len(teams) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"team_abvs must name 1 to {MAX_BATCH_ITEMS} teams")
+    rosters, errors = split_errors(await gather_bounded(teams, sportsdata.get_players_basic))
+    projection = parse_fields(fields, ROSTER_FIELDS)
+    return NBAJSONResponse(
+        {"rosters": {team: project(roster, projection) for team, roster in rosters.items()}, "errors": errors}
+    )
+
+def parse_players(player_id, player_name):
+    """
+    Split comma separated player ids and names. Names are resolved per date
+    by player_name_directory.lookup, exact matches on the day's stat lines
+    first and the roster index for the others.
+    """
+    player_ids = parse_list(player_id)
+    player_names = parse_list(player_name)
+    if not (player_ids or player_names):
+        raise HTTPException(status_code=400, detail="One of player_name or player_id is required")
+    if len(player_ids) + len(player_names) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} players can be requested at once")
+    return player_ids, player_names
 
 @app.get("/player_stats_by_date")
-def get_Players_Stats_By_Date(date, player_name, player_id, message):
-    api_url_today = f"https://api.sportsdata.io/v3/nba/stats/json/PlayerGameStatsByDate/{date}?key=48a287166d5d4ecabd71c344439ee80c"
-    response = requests.get(api_url_today)
-    filtered_player_stats_by_date = response.json()
-    if player_id:
-      for player in filtered_player_stats_by_date:
-        if player["PlayerID"] == player_id:
-            # Create a dictionary with the desired player stats
-              filtered_player_stats = {
-                  "StatID": player["StatID"],
-                  "TeamID": player["TeamID"],
-                  "PlayerID": player["PlayerID"],
-                  "Season": player["Season"],
-                  "Name": player["Name"],
-                  "Team": player["Team"],
-                  "Position": player["Position"],
-                  "Started": player["Started"],
-                  "Updated": player["Updated"],
-                  "Games": player["Games"],
-                  "Minutes": player["Minutes"],
-                  "Seconds": player["Seconds"],
-                  "FieldGoalsMade": player["FieldGoalsMade"],
-                  "FieldGoalsAttempted": player["FieldGoalsAttempted"],
-                  "FieldGoalsPercentage": player["FieldGoalsPercentage"],
-                  "EffectiveFieldGoalsPercentage": player["EffectiveFieldGoalsPercentage"],
-                  "TwoPointersMade": player["TwoPointersMade"],
-                  "TwoPointersAttempted": player["TwoPointersAttempted"],
-                  "TwoPointersPercentage": player["TwoPointersPercentage"],
-                  "ThreePointersMade": player["ThreePointersMade"],
-                  "ThreePointersAttempted": player["ThreePointersAttempted"],
-                  "ThreePointersPercentage": player["ThreePointersPercentage"],
-                  "FreeThrowsMade": player["FreeThrowsMade"],
-                  "FreeThrowsAttempted": player["FreeThrowsAttempted"],
-                  "FreeThrowsPercentage": player["FreeThrowsPercentage"],
-                  "OffensiveRebounds": player["OffensiveRebounds"],
-                  "DefensiveRebounds": player["DefensiveRebounds"],
-                  "Rebounds": player["Rebounds"],
-                  "OffensiveReboundsPercentage": player["OffensiveReboundsPercentage"],
-                  "DefensiveReboundsPercentage": player["DefensiveReboundsPercentage"],
-                  "TotalReboundsPercentage": player["TotalReboundsPercentage"],
-                  "Assists": player["Assists"],
-                  "Steals": player["Steals"],
-                  "BlockedShots": player["BlockedShots"],
-                  "Turnovers": player["Turnovers"],
-                  "PersonalFouls": player["PersonalFouls"],
-                  "Points": player["Points"],
-                  "TrueShootingAttempts": player["TrueShootingAttempts"],
-                  "TrueShootingPercentage": player["TrueShootingPercentage"],
-                  "PlayerEfficiencyRating": player["PlayerEfficiencyRating"],
-                  "AssistsPercentage": player["AssistsPercentage"],
-                  "StealsPercentage": player["StealsPercentage"],
-                  "BlocksPercentage": player["BlocksPercentage"],
-                  "TurnOversPercentage": player["TurnOversPercentage"],
-                  "UsageRatePercentage": player["UsageRatePercentage"],
-                  "PlusMinus": player["PlusMinus"],
-                  "DoubleDoubles": player["DoubleDoubles"],
-                  "TripleDoubles": player["TripleDoubles"]
-              }
-    if player_name:
-      for player in filtered_player_stats_by_date:
-        if player["Name"] == player_name:      
-            filtered_player_stats = {
-                "StatID": player["StatID"],
-                "TeamID": player["TeamID"],
-                "PlayerID": player["PlayerID"],
-                "Season": player["Season"],
-                "Name": player["Name"],
-                "Team": player["Team"],
-                "Position": player["Position"],
-                "Started": player["Started"],
-                "Updated": player["Updated"],
-                "Games": player["Games"],
-                "Minutes": player["Minutes"],
-                "Seconds": player["Seconds"],
-                "FieldGoalsMade": player["FieldGoalsMade"],
-                "FieldGoalsAttempted": player["FieldGoalsAttempted"],
-                "FieldGoalsPercentage": player["FieldGoalsPercentage"],
-                "EffectiveFieldGoalsPercentage": player["EffectiveFieldGoalsPercentage"],
-                "TwoPointersMade": player["TwoPointersMade"],
-                "TwoPointersAttempted": player["TwoPointersAttempted"],
-                "TwoPointersPercentage": player["TwoPointersPercentage"],
-                "ThreePointersMade": player["ThreePointersMade"],
-                "ThreePointersAttempted": player["ThreePointersAttempted"],
-                "ThreePointersPercentage": player["ThreePointersPercentage"],
-                "FreeThrowsMade": player["FreeThrowsMade"],
-                "FreeThrowsAttempted": player["FreeThrowsAttempted"],
-                "FreeThrowsPercentage": player["FreeThrowsPercentage"],
-                "OffensiveRebounds": player["OffensiveRebounds"],
-                "DefensiveRebounds": player["DefensiveRebounds"],
-                "Rebounds": player["Rebounds"],
-                "OffensiveReboundsPercentage": player["OffensiveReboundsPercentage"],
-                "DefensiveReboundsPercentage": player["DefensiveReboundsPercentage"],
-                "TotalReboundsPercentage": player["TotalReboundsPercentage"],
-                "Assists": player["Assists"],
-                "Steals": player["Steals"],
-                "BlockedShots": player["BlockedShots"],
-                "Turnovers": player["Turnovers"],
-                "PersonalFouls": player["PersonalFouls"],
-                "Points": player["Points"],
-                "TrueShootingAttempts": player["TrueShootingAttempts"],
-                "TrueShootingPercentage": player["TrueShootingPercentage"],
-                "PlayerEfficiencyRating": player["PlayerEfficiencyRating"],
-                "AssistsPercentage": player["AssistsPercentage"],
-                "StealsPercentage": player["StealsPercentage"],
-                "BlocksPercentage": player["BlocksPercentage"],
-                "TurnOversPercentage": player["TurnOversPercentage"],
-                "UsageRatePercentage": player["UsageRatePercentage"],
-                "PlusMinus": player["PlusMinus"],
-                "DoubleDoubles": player["DoubleDoubles"],
-                "TripleDoubles": player["TripleDoubles"]
-            }
-    return filtered_player_stats
+async def get_Players_Stats_By_Date(
+    date,
+    message,
+    player_name: Optional[str] = None,
+    player_id: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    # Several players can be requested at once as comma separated ids or names
+    player_ids, player_names = parse_players(player_id, player_name)
+    player_stats_index = await get_player_stats_index(date)
+    filtered_player_stats = player_name_directory.lookup(player_stats_index, player_ids, player_names)
+    projection = parse_fields(fields, PLAYER_STAT_FIELDS)
+    if len(player_ids) + len(player_names) > 1:
+        return NBAJSONResponse(project(filtered_player_stats, projection))
+    if not filtered_player_stats:
+        raise HTTPException(status_code=404, detail="No stats found for that player on that date")
+    return NBAJSONResponse(project(filtered_player_stats[0], projection))
+
+def parse_dates(dates, start_date, end_date):
+    # Either a comma separated list of dates or an inclusive start_date/end_date range
+    try:
+        if dates:
+            days = parse_list(dates)
+            if len(days) > MAX_BATCH_ITEMS:
+                raise ValueError(f"At most {MAX_BATCH_ITEMS} dates can be requested at once")
+            return [datetime.date.fromisoformat(day).isoformat() for day in days]
+        if start_date and end_date:
+            return date_range(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(status_code=400, detail="Either dates or start_date and end_date are required")
+
+@app.get("/player_stats_by_dates")
+async def get_Players_Stats_By_Dates(
+    message,
+    dates: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    player_name: Optional[str] = None,
+    player_id: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    days = parse_dates(dates, start_date, end_date)
+    player_ids, player_names = parse_players(player_id, player_name)
+    indexes, errors = split_errors(await gather_bounded(days, get_player_stats_index))
+    projection = parse_fields(fields, PLAYER_STAT_FIELDS)
+    player_stats = {
+        day: project(player_name_directory.lookup(player_stats_index, player_ids, player_names), projection)
+        for day, player_stats_index in indexes.items()
+    }
+    return NBAJSONResponse({"player_stats": player_stats, "errors": errors})
+
+async def select_season_rows(season, player_id, player_name, team_abv, start_date, end_date):
+    table = await get_season_table(season)
+    resolved_player_id = table.resolve_player(player_id, player_name)
+    if resolved_player_id is None and player_name:
+        resolved_player_id = player_name_directory.resolve(player_name)
+    if (player_id or player_name) and resolved_player_id is None:
+        raise HTTPException(status_code=404, detail=not_found_detail("Player", table))
+    rows = table.select(resolved_player_id, team_abv, start_date, end_date)
+    return table, rows, resolved_player_id
+
+
+def not_found_detail(subject, table):
+    if is_ingesting(table.season):
+        return f"{subject} not found in the {len(table.dates)} days of that season ingested so far; try again shortly"
+    return f"{subject} not found in that season"
+
+
+def describe_selection(table, player_id, team_abv):
+    # Seasons are ingested in the background, so flag answers computed from part of the season
+    selection = {"Season": table.season, "DatesIngested": len(table.dates), "Ingesting": is_ingesting(table.season)}
+    if player_id is not None:
+        selection.update(PlayerID=player_id, **table.players.get(player_id, {}))
+    if team_abv:
+        selection["Team"] = team_abv.upper()
+    return selection
+
+
+@app.get("/season_averages")
+async def get_season_averages(
+    season: int,
+    message,
+    player_id: Optional[int] = None,
+    player_name: Optional[str] = None,
+    team_abv: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    table, rows, player_id = await select_season_rows(season, player_id, player_name, team_abv, start_date, end_date)
+    return {**describe_selection(table, player_id, team_abv), "averages": table.averages(rows)}
+
+
+@app.get("/season_totals")
+async def get_season_totals(
+    season: int,
+    message,
+    player_id: Optional[int] = None,
+    player_name: Optional[str] = None,
+    team_abv: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    table, rows, player_id = await select_season_rows(season, player_id, player_name, team_abv, start_date, end_date)
+    return {**describe_selection(table, player_id, team_abv), "totals": table.totals(rows)}
+
+
+@app.get("/season_splits")
+async def get_season_splits(
+    season: int,
+    message,
+    split: str = "home_away",
+    player_id: Optional[int] = None,
+    player_name: Optional[str] = None,
+    team_abv: Optional[str] = None,
+):
+    if split not in SPLITS:
+        raise HTTPException(status_code=400, detail=f"split must be one of {', '.join(SPLITS)}")
+    table, rows, player_id = await select_season_rows(season, player_id, player_name, team_abv, None, None)
+    return {**describe_selection(table, player_id, team_abv), "split": split, "splits": table.splits(rows, split)}
+
+
+@app.get("/team_season_stats")
+async def get_team_season_stats(season: int, team_abv: str, message, last_n: Optional[int] = None):
+    # Answered from aggregates maintained as each day is ingested
+    table = await get_season_table(season)
+    summary = table.team_summary(team_abv, last_n)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=not_found_detail("Team", table))
+    return {**describe_selection(table, None, team_abv), **summary}
+
+
+@app.get("/player_season_stats")
+async def get_player_season_stats(
+    season: int,
+    message,
+    player_id: Optional[int] = None,
+    player_name: Optional[str] = None,
+    last_n: Optional[int] = None,
+):
+    if player_id is None and not player_name:
+        raise HTTPException(status_code=400, detail="One of player_name or player_id is required")
+    table = await get_season_table(season)
+    resolved_player_id = table.resolve_player(player_id, player_name)
+    if resolved_player_id is None and player_name:
+        resolved_player_id = player_name_directory.resolve(player_name)
+    summary = table.player_summary(resolved_player_id, last_n) if resolved_player_id is not None else None
+    if summary is None:
+        raise HTTPException(status_code=404, detail=not_found_detail("Player", table))
+    return {**describe_selection(table, resolved_player_id, None), **summary}
+
 
 @app.on_event("startup")
 async def startup():
     global datastore
     datastore = await get_datastore()
+    route_paths.update(route.path for route in app.routes)
+    load_archives()
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+        start_ingestion(sportsdata.current_season())
+    live_game_tracker.start()
+    player_name_directory.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await prefetch_scheduler.stop()
+    await stop_ingestions()
+    await live_game_tracker.stop()
+    await player_name_directory.stop()
+    await sportsdata.close_sportsdata_client()
+    stop_logging()
 
 
 def start():
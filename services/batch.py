@@ -0,0 +1,89 @@
+import asyncio
+import datetime
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+# Read environment variables for batch requests
+BATCH_CONCURRENCY = int(os.environ.get("NBA_BATCH_CONCURRENCY", 8))
+
+# Constants
+MAX_BATCH_DAYS = 31  # The longest date range one batch request may cover
+MAX_BATCH_ITEMS = 30  # The most players or teams one batch request may name
+
+K = TypeVar("K", bound=Hashable)
+
+
+def parse_list(value: Optional[str]) -> List[str]:
+    """
+    Split a comma separated query parameter, dropping blanks and duplicates
+    while keeping the request order.
+    """
+    if not value:
+        return []
+    items = [item.strip() for item in value.split(",")]
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def date_range(start_date: str, end_date: str, max_days: int = MAX_BATCH_DAYS) -> List[str]:
+    """
+    List the ISO dates from start_date to end_date, both included.
+
+    Raises:
+        ValueError: If a date is malformed, the range is reversed or it spans more than max_days.
+    """
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    if end < start:
+        raise ValueError("end_date is before start_date")
+    days = (end - start).days + 1
+    if days > max_days:
+        raise ValueError(f"A date range may cover at most {max_days} days")
+    return [(start + datetime.timedelta(days=i)).isoformat() for i in range(days)]
+
+
+async def gather_bounded(
+    keys: Iterable[K],
+    fetch: Callable[[K], Awaitable[Any]],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> Dict[K, Any]:
+    """
+    Run fetch for every key concurrently, with at most concurrency calls in
+    flight. A failing key does not fail the batch.
+
+    Args:
+        keys: The keys to fetch, e.g. dates or team abbreviations.
+        fetch: The coroutine function fetching one key.
+        concurrency: The maximum number of calls in flight.
+
+    Returns:
+        A dict from each key, in order, to its result or to the exception it raised.
+    """
+    keys = list(dict.fromkeys(keys))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _fetch(key: K) -> Any:
+        async with semaphore:
+            return await fetch(key)
+
+    results = await asyncio.gather(*[_fetch(key) for key in keys], return_exceptions=True)
+    for result in results:
+        # Cancellation is not a per-key failure
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+    return dict(zip(keys, results))
+
+
+def split_errors(results: Dict[K, Any]) -> Tuple[Dict[K, Any], Dict[K, str]]:
+    """
+    Separate the successful results of gather_bounded from the failed keys.
+
+    Returns:
+        The successful results and a dict from each failed key to its error message.
+    """
+    values = {key: result for key, result in results.items() if not isinstance(result, BaseException)}
+    errors = {
+        key: str(result) or type(result).__name__
+        for key, result in results.items()
+        if isinstance(result, BaseException)
+    }
+    return values, errors
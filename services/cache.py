@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Constants
+DEFAULT_MAX_ENTRIES = 4096  # The maximum number of entries kept before evicting the least recently used
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: Optional[float]):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at  # None means the entry never expires
+
+    def is_fresh(self, now: float) -> bool:
+        return self.expires_at is None or now < self.expires_at
+
+    def stale_for(self, now: float) -> float:
+        """Return the number of seconds since the entry expired, 0 while it is fresh."""
+        return 0.0 if self.is_fresh(now) else now - self.expires_at
+
+
+class TTLCache:
+    """
+    In-memory cache where every entry carries its own time to live.
+
+    Entries are evicted least recently used first once max_entries is reached,
+    including entries that never expire.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Return the fresh entry for key, or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or not entry.is_fresh(self.clock()):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def get_stale(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Return the entry for key even if it has expired, or None if it is
+        missing. Expired entries are kept until evicted, so they can be served
+        while the upstream is revalidated or unavailable.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        """
+        Store value under key for ttl seconds, or forever if ttl is None.
+        """
+        now = self.clock()
+        expires_at = None if ttl is None else now + ttl
+        self._entries[key] = CacheEntry(value, now, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1,10 +1,16 @@
 from typing import Dict, List, Optional, Tuple
+import logging
+import time
 import uuid
 from models.models import Document, DocumentChunk, DocumentChunkMetadata
 
 import tiktoken
 
-from services.openai import get_embeddings
+from services.embedding_cache import aget_chunk_embeddings
+from services.embedding_batcher import AdaptiveEmbeddingBatcher
+from services.metrics import CallbackGauge, registry
+
+logger = logging.getLogger(__name__)
 
 # Global variables
 tokenizer = tiktoken.get_encoding(
@@ -15,10 +21,23 @@ tokenizer = tiktoken.get_encoding(
 CHUNK_SIZE = 200  # The target size of each text chunk in tokens
 MIN_CHUNK_SIZE_CHARS = 350  # The minimum size of each text chunk in characters
 MIN_CHUNK_LENGTH_TO_EMBED = 5  # Discard chunks shorter than this
-EMBEDDINGS_BATCH_SIZE = 128  # The number of embeddings to request at a time
 MAX_NUM_CHUNKS = 10000  # The maximum number of chunks to generate from a text
 
 
+# The batcher shared by every ingestion, so its token budget keeps what it learned
+embedding_batcher = AdaptiveEmbeddingBatcher(
+    lambda text: len(tokenizer.encode(text, disallowed_special=()))
+)
+
+registry.register(
+    CallbackGauge(
+        "embedding_token_budget",
+        "The current per-request token budget of the ingestion embedding batcher.",
+        lambda: {(): embedding_batcher.token_budget},
+    )
+)
+
+
 def get_text_chunks(text: str, chunk_token_size: Optional[int]) -> List[str]:
     """
     Split a text into chunks of ~CHUNK_SIZE tokens, based on punctuation and newline boundaries.
@@ -146,7 +165,7 @@ def create_document_chunks(
     return doc_chunks, doc_id
 
 
-def get_document_chunks(
+async def get_document_chunks(
     documents: List[Document], chunk_token_size: Optional[int]
 ) -> Dict[str, List[DocumentChunk]]:
     """
@@ -180,23 +199,31 @@ def get_document_chunks(
     if not all_chunks:
         return {}
 
-    # Get all the embeddings for the document chunks in batches, using get_embeddings
-    embeddings: List[List[float]] = []
-    for i in range(0, len(all_chunks), EMBEDDINGS_BATCH_SIZE):
-        # Get the text of the chunks in the current batch
-        batch_texts = [
-            chunk.text for chunk in all_chunks[i : i + EMBEDDINGS_BATCH_SIZE]
-        ]
-
-        # Get the embeddings for the batch texts
-        batch_embeddings = get_embeddings(batch_texts)
-
-        # Append the batch embeddings to the embeddings list
-        embeddings.extend(batch_embeddings)
+    # Get all the embeddings for the document chunks, only embedding text that is not cached yet,
+    # in batches packed up to the batcher's token budget. The batcher is shared by concurrent
+    # ingestions, so the throughput of this call is measured here.
+    embedded_tokens, embedding_seconds = 0, 0.0
+
+    async def embed(texts: List[str]):
+        nonlocal embedded_tokens, embedding_seconds
+        start = time.perf_counter()
+        try:
+            return await embedding_batcher.embed(texts)
+        finally:
+            embedding_seconds += time.perf_counter() - start
+            embedded_tokens += sum(embedding_batcher.count_tokens(text) for text in texts)
+
+    embeddings = await aget_chunk_embeddings([chunk.text for chunk in all_chunks], embed=embed)
+    if embedded_tokens and embedding_seconds:
+        logger.info(
+            f"Embedded {embedded_tokens} tokens in {embedding_seconds:.1f}s "
+            f"({embedded_tokens / embedding_seconds:.0f} tokens/s), "
+            f"token budget {embedding_batcher.token_budget}"
+        )
 
     # Update the document chunk objects with the embeddings
     for i, chunk in enumerate(all_chunks):
-        # Assign the embedding from the embeddings list to the chunk object
+        # Assign the chunk its row of the embeddings array, a view rather than a copy
         chunk.embedding = embeddings[i]
 
     return chunks
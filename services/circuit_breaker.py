@@ -0,0 +1,106 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+# Constants
+WINDOW_SIZE = 20  # The number of recent calls the failure and slow call rates are computed over
+MIN_CALLS = 10  # Calls needed in the window before the breaker may trip
+FAILURE_RATE_THRESHOLD = 0.5  # The fraction of failed calls that trips the breaker
+SLOW_CALL_THRESHOLD = 2.0  # Seconds after which a successful call counts as slow
+SLOW_CALL_RATE_THRESHOLD = 0.8  # The fraction of slow calls that trips the breaker
+OPEN_DURATION = 15.0  # Seconds the breaker stays open before letting a probe call through
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing or keeps being slow.
+
+    The breaker tracks the outcome of the last window_size calls. Once at
+    least min_calls are recorded and either the failure rate or the slow call
+    rate reaches its threshold, it opens and rejects calls for open_duration
+    seconds. It then lets a single probe call through. A successful, fast
+    probe closes it again. Any other outcome reopens it.
+    """
+
+    def __init__(
+        self,
+        window_size: int = WINDOW_SIZE,
+        min_calls: int = MIN_CALLS,
+        failure_rate_threshold: float = FAILURE_RATE_THRESHOLD,
+        slow_call_threshold: float = SLOW_CALL_THRESHOLD,
+        slow_call_rate_threshold: float = SLOW_CALL_RATE_THRESHOLD,
+        open_duration: float = OPEN_DURATION,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_duration = open_duration
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._probing = False
+        # Each call is recorded as (failed, slow)
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+
+    def allow(self) -> bool:
+        """
+        Return whether a call may go upstream now. In the half-open state only
+        one probe call is allowed at a time.
+        """
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.open_duration:
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self, duration: float) -> None:
+        slow = duration >= self.slow_call_threshold
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if slow:
+                self._open()
+            else:
+                self._close()
+            return
+        self._record(False, slow)
+
+    def record_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._open()
+            return
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        self._outcomes.append((failed, slow))
+        if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if (
+            failures / calls >= self.failure_rate_threshold
+            or slow_calls / calls >= self.slow_call_rate_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.trips += 1
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.opened_at = None
+        self._outcomes.clear()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from services.embedding_cache import aget_query_embedding
+from services.metrics import stage
+from services.partitions import (
+    DEFAULT_NAMESPACE,
+    VECTOR_DATE_PARTITIONS,
+    list_namespaces,
+    search_partitions,
+)
+from services.responses import SEARCH_RESULT_FIELDS, project
+
+logger = logging.getLogger(__name__)
+
+# Constants
+EMBEDDING_TIMEOUT = 5.0  # Seconds the message embedding of a combined NBA request may take
+SEARCH_TIMEOUT = 5.0  # Seconds the vector search of a combined NBA request may take
+TOP_K = 10  # The number of context matches returned
+
+
+def query_index(index: Any, vector: List[float], namespace: str, filter: Optional[Dict[str, Any]] = None):
+    return asyncio.to_thread(
+        index.query,
+        vector=vector,
+        filter=filter,
+        namespace=namespace,
+        top_k=TOP_K,
+        include_metadata=True,
+    )
+
+
+async def search_context(
+    index: Any,
+    message: str,
+    filter: Optional[Dict[str, Any]] = None,
+    start_date: Any = None,
+    end_date: Any = None,
+) -> List[Dict[str, Any]]:
+    """
+    Embed a message and search the NBA context index, each stage within its own timeout.
+
+    With a date range, only the monthly partitions around it are searched,
+    widening when there are too few matches and finally falling back to the
+    default namespace with the metadata filter.
+    """
+    with stage("embedding"):
+        embedding = await asyncio.wait_for(aget_query_embedding(message), EMBEDDING_TIMEOUT)
+    # The Pinecone client only accepts lists of floats
+    info_vector_list = embedding.tolist()
+
+    async def search_default_namespace():
+        return (await query_index(index, info_vector_list, DEFAULT_NAMESPACE, filter))["matches"]
+
+    async def search_partition(namespace):
+        return (await query_index(index, info_vector_list, namespace))["matches"]
+
+    async def search():
+        if not VECTOR_DATE_PARTITIONS or start_date is None:
+            return await search_default_namespace()
+        return await search_partitions(
+            search_partition,
+            start_date,
+            end_date or start_date,
+            top_k=TOP_K,
+            namespaces=await list_namespaces(index),
+            fallback=search_default_namespace,
+        )
+
+    with stage("vector_search"):
+        matches = await asyncio.wait_for(search(), SEARCH_TIMEOUT)
+    return [
+        project(match.to_dict() if hasattr(match, "to_dict") else dict(match), SEARCH_RESULT_FIELDS)
+        for match in matches
+    ]
+
+
+def start_search(
+    index: Any,
+    message: Optional[str],
+    filter: Optional[Dict[str, Any]] = None,
+    start_date: Any = None,
+    end_date: Any = None,
+) -> Optional["asyncio.Future[List[Dict[str, Any]]]"]:
+    # Start the semantic search before the stats fetch so both run concurrently
+    if not message:
+        return None
+    return asyncio.ensure_future(search_context(index, message, filter, start_date, end_date))
+
+
+async def finish_search(search_task: Optional["asyncio.Future[List[Dict[str, Any]]]"]) -> Any:
+    # The search only adds context, so a slow or failing search degrades to no results
+    if search_task is None:
+        return "No vector results found"
+    try:
+        return await search_task
+    except Exception as e:
+        logger.warning(f"Context search failed: {e!r}")
+        return []
+
+
+def cancel_search(search_task: Optional["asyncio.Future[List[Dict[str, Any]]]"]) -> None:
+    # Called when the stats fetch fails, so the search does not outlive the request
+    if search_task is not None:
+        search_task.cancel()
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import EMBEDDING_REQUEST_DURATION, EMBEDDING_TOKENS
+from services.embeddings import get_embedding_provider
+from services.openai import EMBEDDING_CONCURRENCY
+from services.rate_limiter import BULK
+
+# Read environment variables for embedding batching
+EMBEDDING_TOKEN_BUDGET = int(os.environ.get("EMBEDDING_TOKEN_BUDGET", 50000))  # The most tokens per embeddings request
+EMBEDDING_TARGET_LATENCY = float(os.environ.get("EMBEDDING_TARGET_LATENCY", 10.0))  # Seconds; slower requests shrink batches
+
+# Constants
+MIN_TOKEN_BUDGET = 1000  # The smallest per-request token budget the batcher shrinks to
+MAX_INPUTS_PER_REQUEST = 2048  # The most texts OpenAI accepts in one embeddings request
+MAX_EMBEDDING_ATTEMPTS = 3  # Attempts per text before giving up
+EMBEDDING_RETRY_BACKOFF = 1.0  # Base delay in seconds before retrying a failed batch, doubled each attempt
+
+
+class AdaptiveEmbeddingBatcher:
+    """
+    Embeds texts in batches packed by token count rather than by number of
+    texts, so long chunks never overflow a request and short ones are not
+    spread over many round trips.
+
+    The per-request token budget adapts to the API: it grows additively after
+    requests faster than EMBEDDING_TARGET_LATENCY, shrinks by a quarter after
+    slower ones and halves after an error. A failed batch is split and retried.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        max_token_budget: int = EMBEDDING_TOKEN_BUDGET,
+        min_token_budget: int = MIN_TOKEN_BUDGET,
+        target_latency: float = EMBEDDING_TARGET_LATENCY,
+        concurrency: int = EMBEDDING_CONCURRENCY,
+        request: Optional[Callable[[List[str]], Awaitable[np.ndarray]]] = None,
+    ):
+        self.count_tokens = count_tokens
+        self.max_token_budget = max_token_budget
+        self.min_token_budget = min(min_token_budget, max_token_budget)
+        self.token_budget = max_token_budget
+        self.target_latency = target_latency
+        self.concurrency = concurrency
+        self.request = request
+        self.tokens = 0  # Tokens embedded so far
+        self.seconds = 0.0  # Wall time spent in embed() so far
+
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+    def _adapt(self, latency: Optional[float]) -> None:
+        if latency is None:
+            self.token_budget = max(self.min_token_budget, self.token_budget // 2)
+        elif latency > self.target_latency:
+            self.token_budget = max(self.min_token_budget, self.token_budget * 3 // 4)
+        else:
+            self.token_budget = min(self.max_token_budget, self.token_budget + self.max_token_budget // 10)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, requesting up to `concurrency` batches at once.
+
+        Returns:
+            A float32 array with the embedding of each text as a row, in the order of texts.
+
+        Raises:
+            Exception: The last error of a text that failed MAX_EMBEDDING_ATTEMPTS times.
+        """
+        start = time.perf_counter()
+        # Without an explicit request function, each batch is one attempt of the embedding provider
+        request = self.request or functools.partial(get_embedding_provider().arequest, priority=BULK)
+        token_counts = [self.count_tokens(text) for text in texts]
+        # Allocated once the first response tells the dimension
+        embeddings: Optional[np.ndarray] = None
+        retries: Deque[Tuple[List[int], int]] = deque()  # (text indexes, attempt) of failed batches
+        next_index = 0
+
+        def next_batch() -> Optional[Tuple[List[int], int]]:
+            nonlocal next_index
+            if retries:
+                return retries.popleft()
+            if next_index >= len(texts):
+                return None
+            batch, tokens = [], 0
+            while (
+                next_index < len(texts)
+                and len(batch) < MAX_INPUTS_PER_REQUEST
+                and (not batch or tokens + token_counts[next_index] <= self.token_budget)
+            ):
+                batch.append(next_index)
+                tokens += token_counts[next_index]
+                next_index += 1
+            return batch, 1
+
+        async def worker() -> None:
+            nonlocal embeddings
+            while True:
+                item = next_batch()
+                if item is None:
+                    return
+                batch, attempt = item
+                request_start = time.perf_counter()
+                try:
+                    results = await request([texts[i] for i in batch])
+                except Exception:
+                    latency = time.perf_counter() - request_start
+                    EMBEDDING_REQUEST_DURATION.observe(latency, outcome="error")
+                    self._adapt(None)
+                    if attempt >= MAX_EMBEDDING_ATTEMPTS:
+                        raise
+                    # Retry in halves, in case the batch itself was the problem
+                    middle = (len(batch) + 1) // 2
+                    retries.extend(
+                        (half, attempt + 1) for half in (batch[:middle], batch[middle:]) if half
+                    )
+                    await asyncio.sleep(EMBEDDING_RETRY_BACKOFF * 2 ** (attempt - 1))
+                    continue
+                latency = time.perf_counter() - request_start
+                EMBEDDING_REQUEST_DURATION.observe(latency, outcome="success")
+                self._adapt(latency)
+                tokens = sum(token_counts[i] for i in batch)
+                EMBEDDING_TOKENS.inc(tokens)
+                self.tokens += tokens
+                results = np.asarray(results, dtype=np.float32)
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), results.shape[1]), dtype=np.float32)
+                embeddings[batch] = results
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, self.concurrency))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # Stop the other workers rather than leave them embedding for nothing
+            for task in workers:
+                task.cancel()
+            raise
+        finally:
+            self.seconds += time.perf_counter() - start
+        if embeddings is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return embeddings
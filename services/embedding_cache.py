@@ -0,0 +1,366 @@
+import asyncio
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.embeddings import get_embedding_provider
+from services.metrics import CallbackGauge, registry
+from services.rate_limiter import BULK
+
+# Read environment variables for the query and ingestion embedding caches
+QUERY_EMBEDDING_CACHE_PATH = os.environ.get(
+    "QUERY_EMBEDDING_CACHE_PATH", "query_embedding_cache.sqlite3"
+)
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_MAX_ENTRIES", 50000)
+)
+INGEST_EMBEDDING_CACHE_PATH = os.environ.get(
+    "INGEST_EMBEDDING_CACHE_PATH", "ingest_embedding_cache.sqlite3"
+)
+INGEST_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("INGEST_EMBEDDING_CACHE_MAX_ENTRIES", 100000)
+)
+
+# Constants
+MEMORY_CACHE_SIZE = 2048  # The number of embeddings kept in the in-memory tier
+INGEST_MEMORY_CACHE_SIZE = 0  # Ingested chunks rarely repeat within a process, so only the disk tier is used
+SQLITE_MAX_PARAMETERS = 500  # Keys looked up per SQLite statement
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a message so trivially different phrasings share a cache entry.
+    """
+    return " ".join(text.casefold().split())
+
+
+def cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-memory LRU in front of a SQLite file that
+    survives restarts. Embeddings are float32 arrays, stored on disk as their
+    bytes.
+
+    With max_entries, the disk tier is bounded and evicts the least recently
+    used embeddings. The cache is thread safe, so it can be used from worker
+    threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        memory_size: int = MEMORY_CACHE_SIZE,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, model TEXT, embedding BLOB, last_used REAL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._db.commit()
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._disk_entries if self._db is not None else len(self._memory)
+
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up several keys at once, reading the disk tier in a few
+        statements.
+
+        Returns:
+            A dict from each key found to its embedding.
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[key] = embedding
+                else:
+                    missing.append(key)
+
+            if self._db is not None and missing:
+                for i in range(0, len(missing), SQLITE_MAX_PARAMETERS):
+                    batch = missing[i : i + SQLITE_MAX_PARAMETERS]
+                    rows = self._db.execute(
+                        f"SELECT key, embedding FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                    for key, blob in rows:
+                        embedding = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, embedding)
+                        found[key] = embedding
+                disk_hits = [key for key in missing if key in found]
+                if disk_hits:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in disk_hits],
+                    )
+                    self._db.commit()
+                self.disk_hits += len(disk_hits)
+
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def set(self, key: str, model: str, embedding: np.ndarray) -> None:
+        self.set_many([(key, model, embedding)])
+
+    def set_many(self, entries: Iterable[Tuple[str, str, np.ndarray]]) -> None:
+        """
+        Store several (key, model, embedding) entries in one transaction.
+        """
+        entries = [(key, model, np.asarray(embedding, dtype=np.float32)) for key, model, embedding in entries]
+        with self._lock:
+            for key, _, embedding in entries:
+                self._remember(key, embedding)
+            if self._db is not None and entries:
+                now = time.time()
+                # The number of rows inserted keeps the entry count without counting the table
+                inserted = self._db.executemany(
+                    "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)",
+                    [(key, model, embedding.tobytes(), now) for key, model, embedding in entries],
+                ).rowcount
+                if inserted < len(entries):
+                    self._db.executemany(
+                        "UPDATE embeddings SET model = ?, embedding = ?, last_used = ? WHERE key = ?",
+                        [(model, embedding.tobytes(), now, key) for key, model, embedding in entries],
+                    )
+                self._db.commit()
+                self._disk_entries += inserted
+                self._evict()
+
+    def _remember(self, key: str, embedding: np.ndarray) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        if self.max_entries is None or self._disk_entries <= self.max_entries:
+            return
+        excess = self._disk_entries - self.max_entries
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._db.commit()
+        self._disk_entries -= excess
+        self.evictions += excess
+
+    def export(self, path: str) -> int:
+        """
+        Write a consistent copy of the disk tier to a new SQLite file.
+
+        Returns:
+            The number of embeddings exported.
+        """
+        if self._db is None:
+            raise ValueError("Only a cache with a disk tier can be exported")
+        with self._lock:
+            destination = sqlite3.connect(path)
+            try:
+                self._db.backup(destination)
+            finally:
+                destination.close()
+            return self._disk_entries
+
+    def import_from(self, path: str) -> int:
+        """
+        Add the embeddings of an exported cache file that this cache does not
+        hold yet, then evict down to max_entries.
+
+        Returns:
+            The number of embeddings imported.
+        """
+        if self._db is None:
+            raise ValueError("Only a cache with a disk tier can import")
+        with self._lock:
+            before = self._disk_entries
+            self._db.execute("ATTACH DATABASE ? AS imported", (path,))
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO embeddings SELECT key, model, embedding, last_used FROM imported.embeddings"
+                )
+                self._db.commit()
+            finally:
+                self._db.execute("DETACH DATABASE imported")
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            imported = self._disk_entries - before
+            self._evict()
+            return imported
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_query_cache: Optional[EmbeddingCache] = None
+
+
+def get_query_embedding_cache() -> EmbeddingCache:
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = EmbeddingCache(
+            QUERY_EMBEDDING_CACHE_PATH, max_entries=QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    return _query_cache
+
+
+_ingest_cache: Optional[EmbeddingCache] = None
+
+
+def get_ingest_embedding_cache() -> EmbeddingCache:
+    global _ingest_cache
+    if _ingest_cache is None:
+        _ingest_cache = EmbeddingCache(
+            INGEST_EMBEDDING_CACHE_PATH,
+            memory_size=INGEST_MEMORY_CACHE_SIZE,
+            max_entries=INGEST_EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    return _ingest_cache
+
+
+def _cache_lookups(cache: Optional[EmbeddingCache]):
+    if cache is None:
+        return {}
+    return {
+        ("memory_hit",): cache.memory_hits,
+        ("disk_hit",): cache.disk_hits,
+        ("miss",): cache.misses,
+    }
+
+
+registry.register(
+    CallbackGauge(
+        "query_embedding_cache_lookups_total",
+        "Query embedding cache lookups by result.",
+        lambda: _cache_lookups(_query_cache),
+        ["result"],
+        type="counter",
+    )
+)
+registry.register(
+    CallbackGauge(
+        "ingest_embedding_cache_lookups_total",
+        "Ingestion embedding cache lookups by result.",
+        lambda: _cache_lookups(_ingest_cache),
+        ["result"],
+        type="counter",
+    )
+)
+
+
+async def aget_query_embedding(
+    message: str,
+    model: Optional[str] = None,
+    embed: Optional[Callable[[List[str]], Awaitable[np.ndarray]]] = None,
+) -> np.ndarray:
+    """
+    Embed a user message, reusing the embedding of any earlier message with
+    the same normalized text. A cache miss awaits the async embedding client
+    instead of holding a worker thread for the OpenAI round trip.
+
+    Args:
+        message: The message to embed.
+        model: The embedding model name, part of the cache key. Defaults to the embedding provider's.
+        embed: The function computing embeddings on a cache miss. Defaults to the embedding provider.
+
+    Returns:
+        The embedding of the message as a float32 array.
+    """
+    provider = get_embedding_provider()
+    model = model or provider.model
+    embed = embed or provider.aembed
+    cache = get_query_embedding_cache()
+    normalized = normalize_text(message)
+    key = cache_key(normalized, model)
+    # Lookups can read the SQLite file, so they run in a worker thread
+    embedding = await asyncio.to_thread(cache.get, key)
+    if embedding is None:
+        embedding = np.asarray((await embed([normalized]))[0], dtype=np.float32)
+        await asyncio.to_thread(cache.set, key, model, embedding)
+    return embedding
+
+
+async def aget_chunk_embeddings(
+    texts: List[str],
+    model: Optional[str] = None,
+    embed: Optional[Callable[[List[str]], Awaitable[np.ndarray]]] = None,
+) -> np.ndarray:
+    """
+    Embed document chunks, only calling embed for texts whose exact content
+    has not been embedded with the model before.
+
+    Args:
+        texts: The chunk texts to embed.
+        model: The embedding model name, part of the cache key. Defaults to the embedding provider's.
+        embed: The function computing embeddings of the cache misses. Defaults to the embedding provider.
+
+    Returns:
+        A float32 array with the embedding of each text as a row, in the order of texts.
+    """
+    provider = get_embedding_provider()
+    model = model or provider.model
+    embed = embed or functools.partial(provider.aembed, priority=BULK)
+    cache = get_ingest_embedding_cache()
+    keys = [cache_key(text, model) for text in texts]
+    found = await asyncio.to_thread(cache.get_many, keys)
+
+    # Embed each missing text once, even if it repeats
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    if missing:
+        embeddings = np.asarray(await embed(list(missing.values())), dtype=np.float32)
+        new_entries = dict(zip(missing, embeddings))
+        await asyncio.to_thread(
+            cache.set_many, [(key, model, embedding) for key, embedding in new_entries.items()]
+        )
+        found.update(new_entries)
+    if not found:
+        return np.empty((len(keys), 0), dtype=np.float32)
+
+    # Copy every embedding into one contiguous array rather than keeping a small array per chunk
+    dimension = len(next(iter(found.values())))
+    result = np.empty((len(keys), dimension), dtype=np.float32)
+    for i, key in enumerate(keys):
+        result[i] = found[key]
+    return result
@@ -0,0 +1,92 @@
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+
+from services.openai import (
+    EMBEDDING_MODEL,
+    EMBEDDING_MODEL_DIMENSION,
+    acreate_embeddings,
+    aget_embeddings,
+    get_embeddings,
+)
+from services.rate_limiter import INTERACTIVE
+
+# Read environment variables for the embedding provider
+EMBEDDING_PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "openai")
+EMBEDDING_DIMENSION = int(os.environ.get("EMBEDDING_DIMENSION", EMBEDDING_MODEL_DIMENSION))
+
+
+class EmbeddingProvider(ABC):
+    """
+    Turns texts into embeddings of a fixed dimension. Every method returns a
+    float32 array with the embedding of each text as a row, in the order of
+    texts.
+    """
+
+    model: str  # Names the embeddings in cache keys, so providers never share entries
+    dimension: int
+
+    @abstractmethod
+    def embed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        """Embed texts, blocking the calling thread."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aembed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        """Embed texts without blocking the event loop, retrying failures."""
+        raise NotImplementedError
+
+    async def arequest(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        """
+        Embed texts in a single attempt, for callers that batch and retry
+        themselves like the ingestion batcher.
+        """
+        return await self.aembed(texts, priority)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeds texts with OpenAI's EMBEDDING_MODEL, within the shared rate limits."""
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        if dimension != EMBEDDING_MODEL_DIMENSION:
+            raise ValueError(
+                f"{EMBEDDING_MODEL} embeddings have {EMBEDDING_MODEL_DIMENSION} dimensions, not {dimension}"
+            )
+        self.model = EMBEDDING_MODEL
+        self.dimension = dimension
+
+    def embed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        return get_embeddings(texts, priority)
+
+    async def aembed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        return await aget_embeddings(texts, priority=priority)
+
+    async def arequest(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        return await acreate_embeddings(texts, priority)
+
+
+def create_embedding_provider(
+    provider: str = EMBEDDING_PROVIDER, dimension: int = EMBEDDING_DIMENSION
+) -> EmbeddingProvider:
+    match provider:
+        case "openai":
+            return OpenAIEmbeddingProvider(dimension)
+        case "hashing":
+            from services.hashing_embeddings import HashingEmbeddingProvider
+
+            return HashingEmbeddingProvider(dimension)
+        case _:
+            raise ValueError(f"Unsupported embedding provider: {provider}")
+
+
+_provider: Optional[EmbeddingProvider] = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Return the process-wide provider chosen by EMBEDDING_PROVIDER."""
+    global _provider
+    if _provider is None:
+        _provider = create_embedding_provider()
+    return _provider
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+from services.embeddings import EMBEDDING_DIMENSION, EmbeddingProvider
+from services.rate_limiter import INTERACTIVE
+
+# Constants
+TOKEN_PATTERN = re.compile(r"\w+")  # What counts as a word
+HASH_CACHE_SIZE = 1 << 16  # Distinct features whose hashes are kept, since words repeat across texts
+INLINE_TEXTS = 16  # Larger calls are embedded in a worker thread to keep the event loop free
+
+
+@functools.lru_cache(maxsize=HASH_CACHE_SIZE)
+def feature_hash(feature: str) -> int:
+    # A stable 64-bit hash; Python's own hash() is salted per process
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds texts on the CPU, without network access or model files, by
+    feature hashing.
+
+    Every word and pair of adjacent words is hashed to one of dimension
+    buckets with a sign taken from the hash. Counts are dampened
+    logarithmically and each embedding is L2 normalized, so dot products are
+    cosine similarities. Texts score as similar when they share words, with no
+    notion of meaning. It suits tests, benchmarks and servers running offline,
+    over an index built with the same provider.
+    """
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        if dimension <= 0:
+            raise ValueError("The embedding dimension must be positive")
+        self.dimension = dimension
+        self.model = f"feature-hashing-{dimension}"
+
+    def _embed_into(self, text: str, row: np.ndarray) -> None:
+        words = TOKEN_PATTERN.findall(text.casefold())
+        features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        if not features:
+            return
+        hashes = np.fromiter((feature_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+        indexes = (hashes % np.uint64(self.dimension)).astype(np.intp)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+        np.add.at(row, indexes, signs)
+        np.copyto(row, np.sign(row) * np.log1p(np.abs(row)))
+        norm = np.linalg.norm(row)
+        if norm:
+            row /= norm
+
+    def embed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for text, row in zip(texts, embeddings):
+            self._embed_into(text, row)
+        return embeddings
+
+    async def aembed(self, texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+        if len(texts) <= INLINE_TEXTS:
+            return self.embed(texts, priority)
+        return await asyncio.to_thread(self.embed, texts, priority)
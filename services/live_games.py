@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from services import sportsdata
+from services.prefetch import SCHEDULE_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+# Constants
+LIVE_POLL_INTERVAL = 5.0  # Seconds between GamesByDate polls while a game is in progress
+IDLE_POLL_INTERVAL = 60.0  # Seconds between polls when no game is in progress
+MAX_TRACKED_DAYS = 64  # The number of days whose game versions are kept in memory
+
+
+class DayState:
+    __slots__ = ("payload", "version", "games", "versions")
+
+    def __init__(self):
+        self.payload: Any = None  # The last snapshot, to skip diffing an unchanged cache entry
+        self.version = 0  # The highest game version of the day
+        self.games: Dict[Any, Dict[str, Any]] = {}  # GameID -> last seen game
+        self.versions: Dict[Any, int] = {}  # GameID -> version at which it last changed
+
+
+class LiveGameTracker:
+    """
+    Keeps a version number for every game of a day.
+
+    Each GamesByDate snapshot is diffed against the previous one, and every
+    game that changed is stamped with the next version of its day. Clients can
+    then revalidate with an ETag or ask only for games changed since a version.
+
+    Versions are only meaningful within one process, so the tokens handed to
+    clients carry a random epoch. A token from another process or an earlier
+    run gets the full list of games rather than an empty diff.
+    """
+
+    def __init__(self, max_days: int = MAX_TRACKED_DAYS):
+        self.max_days = max_days
+        self.epoch = secrets.token_hex(4)
+        self._days: "OrderedDict[str, DayState]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, day: str, games: Any) -> int:
+        """
+        Diff a GamesByDate snapshot against the previous one for the day.
+
+        Returns:
+            The current version of the day.
+        """
+        state = self._days.get(day)
+        if state is None:
+            state = self._days[day] = DayState()
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+        self._days.move_to_end(day)
+
+        if games is state.payload or not isinstance(games, list):
+            return state.version
+        state.payload = games
+
+        changed = [
+            game
+            for game in games
+            if state.games.get(game.get("GameID")) != game
+        ]
+        if changed:
+            state.version += 1
+            for game in changed:
+                state.games[game.get("GameID")] = game
+                state.versions[game.get("GameID")] = state.version
+        return state.version
+
+    def version(self, day: str) -> int:
+        state = self._days.get(day)
+        return state.version if state else 0
+
+    def version_token(self, day: str) -> str:
+        """Return the day's version as handed to clients, e.g. "3f9a0c1e.4"."""
+        return f"{self.epoch}.{self.version(day)}"
+
+    def _parse_token(self, token: str) -> Optional[int]:
+        epoch, _, version = token.partition(".")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def changed_since(self, day: str, since_version: str) -> List[Dict[str, Any]]:
+        """
+        Return the games of the day that changed after the version token
+        since_version, or every game of the day if the token was not issued by
+        this tracker or is ahead of it.
+        """
+        state = self._days.get(day)
+        if state is None:
+            return []
+        since = self._parse_token(since_version)
+        if since is None or since > state.version:
+            return list(state.games.values())
+        return [
+            state.games[game_id]
+            for game_id, version in state.versions.items()
+            if version > since
+        ]
+
+    @staticmethod
+    def etag(payload: Any, *variants: Optional[str]) -> str:
+        """
+        Return an ETag hashing the response content, so it is the same in
+        every process serving the same data. Variants, such as the message a
+        response was searched with, are hashed into the tag.
+        """
+        digest = hashlib.sha1()
+        digest.update(json.dumps(payload, sort_keys=True, default=str).encode())
+        for variant in variants:
+            digest.update(b"\x1f" + (variant or "").encode())
+        return f'W/"{digest.hexdigest()[:20]}"'
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll(self) -> float:
+        """
+        Poll today's games once and return the seconds until the next poll.
+        """
+        day = datetime.datetime.now(SCHEDULE_TIMEZONE).date().isoformat()
+        games = await sportsdata.get_games_by_date(day)
+        self.update(day, games)
+        live = isinstance(games, list) and any(
+            game.get("Status") == "InProgress" for game in games
+        )
+        return LIVE_POLL_INTERVAL if live else IDLE_POLL_INTERVAL
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live game poll failed: {e}")
+                delay = IDLE_POLL_INTERVAL
+            await asyncio.sleep(delay)
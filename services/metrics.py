@@ -0,0 +1,255 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The route being served, so stage timings can be attributed to it
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_route", default="none"
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {value:g}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [
+                ("", _format_labels(self.label_names, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class CallbackGauge(Metric):
+    """
+    A gauge, or counter, whose samples are read from a callback at scrape time,
+    for state that is already counted elsewhere such as cache hit counters.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labels: Sequence[str] = (),
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labels)
+        self.type = type
+        self.callback = callback
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [
+            ("", _format_labels(self.label_names, key), value)
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, self._counts[key]):
+                    cumulative += count
+                    labels = _format_labels(self.label_names + ("le",), key + (bound,))
+                    samples.append(("_bucket", labels, cumulative))
+                labels = _format_labels(self.label_names, key)
+                samples.append(("_sum", labels, self._sums[key]))
+                samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(
+    Histogram("nba_request_duration_seconds", "Time to serve a request.", ["route", "status"])
+)
+STAGE_DURATION = registry.register(
+    Histogram(
+        "nba_stage_duration_seconds",
+        "Time spent in each stage of a request: upstream, embedding, vector_search or serialization.",
+        ["route", "stage"],
+    )
+)
+REQUESTS_IN_FLIGHT = registry.register(
+    Gauge("nba_requests_in_flight", "Requests currently being served.", ["route"])
+)
+UPSTREAM_IN_FLIGHT = registry.register(
+    Gauge("sportsdata_requests_in_flight", "sportsdata.io requests currently in flight.")
+)
+UPSTREAM_DURATION = registry.register(
+    Histogram("sportsdata_request_duration_seconds", "Time of each sportsdata.io request attempt.", ["endpoint"])
+)
+UPSTREAM_ERRORS = registry.register(
+    Counter("sportsdata_errors_total", "Failed sportsdata.io request attempts.", ["endpoint", "kind"])
+)
+UPSTREAM_STALE = registry.register(
+    Counter(
+        "sportsdata_stale_served_total",
+        "sportsdata.io payloads served after expiring, by reason: revalidating, error or circuit_open.",
+        ["reason"],
+    )
+)
+EMBEDDING_TOKENS = registry.register(
+    Counter("embedding_tokens_total", "Tokens embedded during ingestion; its rate is the embedding throughput.")
+)
+EMBEDDING_REQUEST_DURATION = registry.register(
+    Histogram(
+        "embedding_request_duration_seconds",
+        "Time of each ingestion embeddings request, by outcome.",
+        ["outcome"],
+    )
+)
+OPENAI_RATE_LIMIT_WAIT = registry.register(
+    Counter(
+        "openai_rate_limit_wait_seconds_total",
+        "Seconds OpenAI calls waited for the rate limiter, by priority: interactive or bulk.",
+        ["priority"],
+    )
+)
+OPENAI_THROTTLED = registry.register(
+    Counter("openai_throttled_total", "OpenAI calls rejected with a 429.", ["endpoint"])
+)
+DATASTORE_DURATION = registry.register(
+    Histogram(
+        "datastore_stage_duration_seconds",
+        "Time spent in each stage of a DataStore upsert or query.",
+        ["operation", "stage"],
+    )
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a stage of the request being served.
+    """
+    with STAGE_DURATION.time(route=current_route.get(), stage=name):
+        yield
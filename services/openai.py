@@ -1,38 +1,180 @@
-from typing import List
+import asyncio
+import os
+import weakref
+from typing import Any, Dict, List
+import numpy as np
 import openai
+from openai import api_requestor, util
 
 
-from tenacity import retry, wait_random_exponential, stop_after_attempt
+from tenacity import RetryCallState, retry, wait_random_exponential, stop_after_attempt
 
+from services.rate_limiter import BULK, INTERACTIVE, RateLimiter, get_rate_limiter
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
-def get_embeddings(texts: List[str]) -> List[List[float]]:
+EMBEDDING_MODEL = "text-embedding-ada-002"  # The OpenAI model used for every embedding
+EMBEDDING_MODEL_DIMENSION = 1536  # The size of EMBEDDING_MODEL's embeddings
+
+# Read environment variables for the async embedding client
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", 4))
+
+# Constants
+EMBEDDINGS_BATCH_SIZE = 128  # The number of texts embedded per request
+CHARS_PER_TOKEN = 4  # A rough count for English text, to estimate tokens without a tokenizer
+COMPLETION_TOKENS_ESTIMATE = 256  # Tokens reserved for a chat completion until its usage is known
+
+# One limit on embedding requests in flight per event loop, shared by every caller
+_request_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+_backoff = wait_random_exponential(min=1, max=20)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    # After a 429 the rate limiter already pauses every call until the reset time
+    if isinstance(retry_state.outcome.exception(), openai.error.RateLimitError):
+        return 0.0
+    return _backoff(retry_state)
+
+
+def _handle_response(limiter: RateLimiter, response: Any, api_key: str, tokens: int) -> Any:
+    # openai 0.27 keeps the response headers only on this attribute
+    limiter.update_from_headers(response._headers)
+    usage = response.data.get("usage") or {}
+    limiter.settle(tokens, usage.get("total_tokens"))
+    return util.convert_to_openai_object(response, api_key)
+
+
+def _post(url: str, params: Dict[str, Any], tokens: int, priority: str) -> Any:
+    """
+    Make one OpenAI API request once the rate limiter of its model has room
+    for it, and feed that limiter the rate limit headers of the response.
+    """
+    limiter = get_rate_limiter(params["model"])
+    limiter.acquire(tokens, priority)
+    try:
+        response, _, api_key = api_requestor.APIRequestor().request("post", url, params=params)
+    except openai.error.RateLimitError as e:
+        limiter.throttle(e.headers, url)
+        raise
+    return _handle_response(limiter, response, api_key, tokens)
+
+
+async def _apost(url: str, params: Dict[str, Any], tokens: int, priority: str) -> Any:
+    """Like _post, but waits for the rate limiter and the response without blocking the event loop."""
+    limiter = get_rate_limiter(params["model"])
+    await limiter.aacquire(tokens, priority)
+    try:
+        response, _, api_key = await api_requestor.APIRequestor().arequest("post", url, params=params)
+    except openai.error.RateLimitError as e:
+        limiter.throttle(e.headers, url)
+        raise
+    return _handle_response(limiter, response, api_key, tokens)
+
+
+def to_embedding_array(response: Any) -> np.ndarray:
+    """
+    Copy the embeddings of an OpenAI response into one contiguous float32
+    array with a row per input.
+    """
+    return np.array([result["embedding"] for result in response["data"]], dtype=np.float32)
+
+
+@retry(wait=_retry_wait, stop=stop_after_attempt(3))
+def get_embeddings(texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
     """
     Embed texts using OpenAI's ada model.
 
     Args:
         texts: The list of texts to embed.
+        priority: INTERACTIVE for calls a user waits on, BULK for ingestion.
 
     Returns:
-        A list of embeddings, each of which is a list of floats.
+        A float32 array with the embedding of each text as a row.
 
     Raises:
         Exception: If the OpenAI API call fails.
     """
     # Call the OpenAI API to get the embeddings
-    response = openai.Embedding.create(input=texts, model="text-embedding-ada-002")
+    response = _post(
+        "/embeddings",
+        {"input": texts, "model": EMBEDDING_MODEL},
+        sum(estimate_tokens(text) for text in texts),
+        priority,
+    )
+
+    # Return the embeddings as the rows of a float32 array
+    return to_embedding_array(response)
+
+
+def _embedding_request_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _request_slots.get(loop)
+    if slots is None:
+        slots = _request_slots[loop] = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    return slots
+
+
+async def acreate_embeddings(texts: List[str], priority: str = INTERACTIVE) -> np.ndarray:
+    """
+    Make one embeddings request, without retries, within the process-wide
+    limit of EMBEDDING_CONCURRENCY requests in flight and the OpenAI rate limits.
+    """
+    async with _embedding_request_slots():
+        response = await _apost(
+            "/embeddings",
+            {"input": texts, "model": EMBEDDING_MODEL},
+            sum(estimate_tokens(text) for text in texts),
+            priority,
+        )
+    return to_embedding_array(response)
+
+
+_aget_embeddings_batch = retry(wait=_retry_wait, stop=stop_after_attempt(3))(acreate_embeddings)
 
-    # Extract the embedding data from the response
-    data = response["data"]  # type: ignore
 
-    # Return the embeddings as a list of lists of floats
-    return [result["embedding"] for result in data]
+async def aget_embeddings(
+    texts: List[str], batch_size: int = EMBEDDINGS_BATCH_SIZE, priority: str = INTERACTIVE
+) -> np.ndarray:
+    """
+    Embed texts using OpenAI's ada model without blocking the event loop.
+
+    The texts are split into batches of batch_size, which are requested
+    concurrently. At most EMBEDDING_CONCURRENCY requests are in flight across
+    every caller in the process.
+
+    Args:
+        texts: The list of texts to embed.
+        batch_size: The number of texts per request.
+        priority: INTERACTIVE for calls a user waits on, BULK for ingestion.
+
+    Returns:
+        A float32 array with the embedding of each text as a row, in the order of texts.
+
+    Raises:
+        Exception: If an OpenAI API call fails after its retries.
+    """
+    batches = await asyncio.gather(
+        *[
+            _aget_embeddings_batch(texts[i : i + batch_size], priority)
+            for i in range(0, len(texts), batch_size)
+        ]
+    )
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.concatenate(batches)
 
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
+@retry(wait=_retry_wait, stop=stop_after_attempt(3))
 def get_chat_completion(
     messages,
     model="gpt-3.5-turbo",  # use "gpt-4" for better results
+    priority=BULK,
 ):
     """
     Generate a chat completion using OpenAI's chat completion API.
@@ -40,6 +182,7 @@ def get_chat_completion(
     Args:
         messages: The list of messages in the chat history.
         model: The name of the model to use for the completion. Default is gpt-3.5-turbo, which is a fast, cheap and versatile model. Use gpt-4 for higher quality but slower results.
+        priority: BULK for document processing, INTERACTIVE for calls a user waits on.
 
     Returns:
         A string containing the chat completion.
@@ -48,9 +191,11 @@ def get_chat_completion(
         Exception: If the OpenAI API call fails.
     """
     # call the OpenAI chat completion API with the given messages
-    response = openai.ChatCompletion.create(
-        model=model,
-        messages=messages,
+    response = _post(
+        "/chat/completions",
+        {"model": model, "messages": messages},
+        sum(estimate_tokens(message["content"]) for message in messages) + COMPLETION_TOKENS_ESTIMATE,
+        priority,
     )
 
     choices = response["choices"]  # type: ignore
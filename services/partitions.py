@@ -0,0 +1,205 @@
+import asyncio
+import datetime
+import os
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Set
+
+import arrow
+
+from services.cache import TTLCache
+
+# Read environment variables for date partitioning of the vector index
+VECTOR_DATE_PARTITIONS = os.environ.get("VECTOR_DATE_PARTITIONS", "true").lower() == "true"
+VECTOR_PARTITION_PREFIX = os.environ.get("VECTOR_PARTITION_PREFIX", "nba")
+
+# Constants
+DEFAULT_NAMESPACE = ""  # Undated vectors, and everything written before partitioning
+MIN_HITS = 3  # Fewer matches than this widens the search
+MAX_WIDEN_MONTHS = 2  # Months added on each side of the range before falling back
+NAMESPACES_TTL = 60.0  # Seconds the list of an index's namespaces is cached
+UNDATED_SEARCH_MONTHS = 12  # The most recent monthly namespaces searched by a query without dates
+
+_namespaces = TTLCache(max_entries=16)
+
+
+def to_date(value: Any) -> Optional[datetime.date]:
+    """
+    Parse a date, a datetime or any date string arrow understands, or return
+    None if it cannot be parsed.
+    """
+    if value is None or isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return value
+    try:
+        return arrow.get(value).date()
+    except (arrow.parser.ParserError, TypeError, ValueError):
+        return None
+
+
+def shift_months(day: datetime.date, months: int) -> datetime.date:
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_for(value: Any) -> str:
+    """
+    Return the namespace a vector dated value is written to: one per month,
+    e.g. "nba-2023-04", or the default namespace if it has no date.
+    """
+    day = to_date(value)
+    if day is None:
+        return DEFAULT_NAMESPACE
+    return f"{VECTOR_PARTITION_PREFIX}-{day.year:04d}-{day.month:02d}"
+
+
+def partitions_between(start: datetime.date, end: datetime.date) -> List[str]:
+    """
+    Return the namespaces of every month from start to end, both included.
+    """
+    partitions = []
+    month = shift_months(start, 0)
+    while month <= end:
+        partitions.append(partition_for(month))
+        month = shift_months(month, 1)
+    return partitions
+
+
+def _score(match: Any) -> float:
+    score = getattr(match, "score", None)
+    return score if score is not None else match["score"]
+
+
+async def search_partitions(
+    query: Callable[[str], Awaitable[List[Any]]],
+    start: datetime.date,
+    end: datetime.date,
+    top_k: int,
+    namespaces: Optional[Collection[str]] = None,
+    fallback: Optional[Callable[[], Awaitable[List[Any]]]] = None,
+    min_hits: int = MIN_HITS,
+    max_widen: int = MAX_WIDEN_MONTHS,
+) -> List[Any]:
+    """
+    Search only the monthly partitions covering start to end. While there are
+    fewer than min_hits matches, widen the range by a month on each side, up
+    to max_widen months, and finally run the fallback search.
+
+    Args:
+        query: Searches one namespace and returns its matches, each with a score.
+        start: The first day of the range.
+        end: The last day of the range.
+        top_k: The number of matches to return.
+        namespaces: The namespaces that exist, to skip empty months; None queries every month.
+        fallback: A last search, e.g. of the default namespace with a metadata filter.
+        min_hits: The number of matches below which the search widens.
+        max_widen: The most months to add on each side of the range.
+
+    Returns:
+        The top_k matches of every namespace searched, best first.
+    """
+    searched: Set[str] = set()
+    matches: List[Any] = []
+    for months in range(max_widen + 1):
+        partitions = [
+            partition
+            for partition in partitions_between(shift_months(start, -months), shift_months(end, months))
+            if partition not in searched and (namespaces is None or partition in namespaces)
+        ]
+        searched.update(partitions)
+        for results in await asyncio.gather(*[query(partition) for partition in partitions]):
+            matches.extend(results)
+        if len(matches) >= min_hits:
+            break
+    else:
+        if fallback is not None:
+            matches.extend(await fallback())
+    matches.sort(key=_score, reverse=True)
+    return matches[:top_k]
+
+
+def recent_partitions(namespaces: Collection[str]) -> List[str]:
+    """
+    Return the monthly namespaces that exist, newest first.
+    """
+    prefix = f"{VECTOR_PARTITION_PREFIX}-"
+    return sorted((namespace for namespace in namespaces if namespace.startswith(prefix)), reverse=True)
+
+
+async def search_recent_partitions(
+    query: Callable[[str], Awaitable[List[Any]]],
+    top_k: int,
+    namespaces: Collection[str],
+    months: int = UNDATED_SEARCH_MONTHS,
+) -> List[Any]:
+    """
+    Search a query without a date range. The default namespace and the most
+    recent months are searched first, so the fan-out of a typical query does
+    not grow with the age of the index; older months are only searched when
+    those return fewer than top_k matches.
+
+    Returns:
+        The top_k matches of every namespace searched, best first.
+    """
+    partitions = recent_partitions(namespaces)
+    months = max(months, 0)
+    matches: List[Any] = []
+    for group in ([DEFAULT_NAMESPACE] + partitions[:months], partitions[months:]):
+        if not group or len(matches) >= top_k:
+            continue
+        for results in await asyncio.gather(*[query(namespace) for namespace in group]):
+            matches.extend(results)
+    matches.sort(key=_score, reverse=True)
+    return matches[:top_k]
+
+
+async def search_filtered_partitions(
+    query: Callable[[str, Dict[str, Any]], Awaitable[List[Any]]],
+    filter: Dict[str, Any],
+    start: datetime.date,
+    end: datetime.date,
+    top_k: int,
+    namespaces: Optional[Collection[str]] = None,
+) -> List[Any]:
+    """
+    Search the months of a date range with a metadata filter that already
+    restricts the vectors to that range. Neighbouring months cannot match
+    such a filter, so the search is not widened; the default namespace,
+    holding undated vectors and those written before partitioning, is the
+    only fallback.
+
+    Args:
+        query: Searches one namespace with a filter and returns its matches.
+        filter: The metadata filter, sent unchanged to every namespace.
+        start: The first day of the range.
+        end: The last day of the range.
+        top_k: The number of matches to return.
+        namespaces: The namespaces that exist, to skip empty months.
+
+    Returns:
+        The top_k matches of every namespace searched, best first.
+    """
+    return await search_partitions(
+        lambda namespace: query(namespace, filter),
+        start,
+        end,
+        top_k,
+        namespaces=namespaces,
+        fallback=lambda: query(DEFAULT_NAMESPACE, filter),
+        max_widen=0,
+    )
+
+
+async def list_namespaces(index: Any) -> Set[str]:
+    """
+    Return the namespaces of a Pinecone index, cached for NAMESPACES_TTL seconds.
+    """
+    entry = _namespaces.get(id(index))
+    if entry is not None:
+        return entry.value
+    stats = await asyncio.to_thread(index.describe_index_stats)
+    namespaces = set((stats.get("namespaces") or {}).keys()) | {DEFAULT_NAMESPACE}
+    _namespaces.set(id(index), namespaces, NAMESPACES_TTL)
+    return namespaces
+
+
+def forget_namespaces(index: Any) -> None:
+    """Drop the cached namespaces of an index, e.g. after writing to a new one."""
+    _namespaces.delete(id(index))
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services import sportsdata
+from services.player_stats import PlayerStatsIndex, normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Constants
+REFRESH_INTERVAL = 6 * 3600.0  # Seconds between roster refreshes
+ERROR_BACKOFF = 300.0  # Seconds to wait after a failed refresh
+MIN_SIMILARITY = 0.5  # The minimum trigram similarity for a fuzzy match
+MIN_MARGIN = 0.2  # The similarity lead a fuzzy match needs over the runner-up
+
+# Nicknames resolving to a full player name
+NICKNAMES = {
+    "king james": "lebron james",
+    "the king": "lebron james",
+    "greek freak": "giannis antetokounmpo",
+    "the greek freak": "giannis antetokounmpo",
+    "the joker": "nikola jokic",
+    "joker": "nikola jokic",
+    "chef curry": "stephen curry",
+    "the beard": "james harden",
+    "the process": "joel embiid",
+    "the brow": "anthony davis",
+    "ad": "anthony davis",
+    "kd": "kevin durant",
+    "cp3": "chris paul",
+    "dame": "damian lillard",
+    "dame time": "damian lillard",
+    "spida": "donovan mitchell",
+    "ant": "anthony edwards",
+    "ant man": "anthony edwards",
+    "sga": "shai gilgeous-alexander",
+    "jimmy buckets": "jimmy butler",
+    "zo": "lonzo ball",
+    "melo": "carmelo anthony",
+    "klay": "klay thompson",
+    "dray": "draymond green",
+    "pg13": "paul george",
+    "the claw": "kawhi leonard",
+    "book": "devin booker",
+}
+
+# Short first names people use in place of the roster first name
+FIRST_NAME_ALIASES = {
+    "steph": "stephen",
+    "mike": "michael",
+    "nic": "nicolas",
+    "chris": "christopher",
+    "matt": "matthew",
+    "nick": "nicholas",
+    "alex": "alexander",
+    "tim": "timothy",
+    "joe": "joseph",
+    "jon": "jonathan",
+    "will": "william",
+    "bill": "william",
+}
+
+
+class AmbiguousPlayerNameError(ValueError):
+    """Raised when a name, such as a shared last name, matches several players."""
+
+    def __init__(self, name: str, candidates: List[Dict[str, Any]]):
+        self.name = name
+        self.candidates = candidates
+        options = ", ".join(
+            f"{player['Name']} ({player.get('Team') or 'no team'}, PlayerID {player['PlayerID']})"
+            for player in candidates
+        )
+        super().__init__(f'"{name}" matches several players: {options}. Use the full name or the PlayerID.')
+
+
+def name_key(name: str) -> str:
+    """
+    Reduce a name to lowercase ascii letters, digits and single spaces, so
+    "P.J. Washington Jr." and "pj washington jr" share a key.
+    """
+    normalized = normalize_name(name).replace("-", " ")
+    return " ".join(re.sub(r"[^a-z0-9 ]", "", normalized).split())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    """
+    Resolves free-form player names to PlayerIDs without any upstream call.
+
+    Exact names, nicknames, common first-name aliases and last names are
+    dictionary lookups. Anything else falls back to a trigram inverted index
+    ranked by Dice similarity, which tolerates typos and missing accents but
+    only resolves a name clearly closer to one player than to any other.
+    """
+
+    def __init__(self, players: Iterable[Dict[str, Any]]):
+        self.players: Dict[int, Dict[str, Any]] = {}
+        self.exact: Dict[str, int] = {}
+        self.last_names: Dict[str, List[int]] = defaultdict(list)
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.gram_counts: Dict[int, int] = {}
+
+        for player in players:
+            player_id = player.get("PlayerID")
+            name = " ".join(
+                part for part in (player.get("FirstName"), player.get("LastName")) if part
+            ) or player.get("Name")
+            if player_id is None or not name or player_id in self.players:
+                continue
+            key = name_key(name)
+            self.players[player_id] = {"PlayerID": player_id, "Name": name, "Team": player.get("Team")}
+            self.exact[key] = player_id
+            if player.get("LastName"):
+                self.last_names[name_key(player["LastName"])].append(player_id)
+            grams = trigrams(key)
+            self.gram_counts[player_id] = len(grams)
+            for gram in grams:
+                self.postings[gram].append(player_id)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def search(self, name: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Return up to limit (PlayerID, similarity) pairs, best match first.
+        """
+        grams = trigrams(name_key(name))
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for player_id in self.postings.get(gram, ()):
+                overlaps[player_id] += 1
+        scored = [
+            (player_id, 2 * overlap / (len(grams) + self.gram_counts[player_id]))
+            for player_id, overlap in overlaps.items()
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def resolve(self, name: str) -> Optional[int]:
+        """
+        Return the PlayerID best matching a name, or None if no player is
+        close or the closest is not clearly ahead of the runner-up, as for a
+        retired player sharing a first name with one player and a last name
+        with another.
+
+        Raises:
+            AmbiguousPlayerNameError: If the name is a last name shared by several players.
+        """
+        key = name_key(name)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key]
+
+        nickname = NICKNAMES.get(key)
+        if nickname is not None and name_key(nickname) in self.exact:
+            return self.exact[name_key(nickname)]
+
+        first, _, rest = key.partition(" ")
+        if first in FIRST_NAME_ALIASES and rest:
+            aliased = f"{FIRST_NAME_ALIASES[first]} {rest}"
+            if aliased in self.exact:
+                return self.exact[aliased]
+
+        last_name_ids = self.last_names.get(key, ())
+        if len(last_name_ids) == 1:
+            return last_name_ids[0]
+        if len(last_name_ids) > 1:
+            raise AmbiguousPlayerNameError(name, [self.players[player_id] for player_id in last_name_ids])
+
+        matches = self.search(key, limit=2)
+        if not matches or matches[0][1] < MIN_SIMILARITY:
+            return None
+        if len(matches) > 1 and matches[0][1] - matches[1][1] < MIN_MARGIN:
+            return None
+        return matches[0][0]
+
+
+class PlayerNameDirectory:
+    """
+    Holds the current PlayerNameIndex, rebuilt from every team's PlayersBasic
+    roster at startup and then periodically in the background.
+    """
+
+    def __init__(self):
+        self.index = PlayerNameIndex([])
+        self._task: Optional[asyncio.Task] = None
+
+    def resolve(self, name: str) -> Optional[int]:
+        return self.index.resolve(name)
+
+    def lookup(
+        self,
+        player_stats_index: PlayerStatsIndex,
+        player_ids: Iterable[Any] = (),
+        player_names: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the stats of the requested players on one date. Each name is
+        matched exactly against the day's stat lines first, so a player who is
+        not on a current roster is still found; the roster index only resolves
+        the names the day's stat lines do not hold.
+
+        Raises:
+            AmbiguousPlayerNameError: If a name left to the index matches several players.
+        """
+        player_ids = list(player_ids)
+        player_names = list(player_names)
+        for name in player_names:
+            if player_stats_index.get_by_name(name) is None:
+                resolved_id = self.resolve(name)
+                if resolved_id is not None:
+                    player_ids.append(resolved_id)
+        return player_stats_index.lookup_many(player_ids, player_names)
+
+    async def refresh(self) -> None:
+        teams = await sportsdata.get_teams()
+        keys = [team["Key"] for team in teams if team.get("Key") and team.get("Active", True)]
+        rosters = await asyncio.gather(
+            *[sportsdata.get_players_basic(key) for key in keys], return_exceptions=True
+        )
+        players = [
+            player
+            for roster in rosters
+            if isinstance(roster, list)
+            for player in roster
+        ]
+        if players:
+            self.index = PlayerNameIndex(players)
+        logger.info(f"Player name index rebuilt with {len(self.index)} players")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = REFRESH_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Player name index refresh failed: {e}")
+                delay = ERROR_BACKOFF
+            await asyncio.sleep(delay)
@@ -0,0 +1,139 @@
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from services import sportsdata
+from services.cache import TTLCache
+
+# The player game stat fields exposed by the NBA routes, in response order
+PLAYER_STAT_FIELDS = [
+    "StatID",
+    "TeamID",
+    "PlayerID",
+    "Season",
+    "Name",
+    "Team",
+    "Position",
+    "Started",
+    "Updated",
+    "Games",
+    "Minutes",
+    "Seconds",
+    "FieldGoalsMade",
+    "FieldGoalsAttempted",
+    "FieldGoalsPercentage",
+    "EffectiveFieldGoalsPercentage",
+    "TwoPointersMade",
+    "TwoPointersAttempted",
+    "TwoPointersPercentage",
+    "ThreePointersMade",
+    "ThreePointersAttempted",
+    "ThreePointersPercentage",
+    "FreeThrowsMade",
+    "FreeThrowsAttempted",
+    "FreeThrowsPercentage",
+    "OffensiveRebounds",
+    "DefensiveRebounds",
+    "Rebounds",
+    "OffensiveReboundsPercentage",
+    "DefensiveReboundsPercentage",
+    "TotalReboundsPercentage",
+    "Assists",
+    "Steals",
+    "BlockedShots",
+    "Turnovers",
+    "PersonalFouls",
+    "Points",
+    "TrueShootingAttempts",
+    "TrueShootingPercentage",
+    "PlayerEfficiencyRating",
+    "AssistsPercentage",
+    "StealsPercentage",
+    "BlocksPercentage",
+    "TurnOversPercentage",
+    "UsageRatePercentage",
+    "PlusMinus",
+    "DoubleDoubles",
+    "TripleDoubles",
+]
+
+# Constants
+MAX_CACHED_DATES = 512  # The number of per-date indexes kept in memory
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a player name for lookups: accents removed, case folded and
+    whitespace collapsed, so "Nikola Jokić" and "nikola  jokic" match.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def filter_player_stats(player: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: player.get(field) for field in PLAYER_STAT_FIELDS}
+
+
+class PlayerStatsIndex:
+    """
+    The player game stats of one date, projected once and indexed by PlayerID
+    and by normalized name.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            stats = filter_player_stats(record)
+            if stats["PlayerID"] is not None:
+                self.by_id[stats["PlayerID"]] = stats
+            if stats["Name"]:
+                self.by_name[normalize_name(stats["Name"])] = stats
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get_by_id(self, player_id: Any) -> Optional[Dict[str, Any]]:
+        try:
+            return self.by_id.get(int(player_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_name(self, player_name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(normalize_name(player_name))
+
+    def lookup_many(
+        self,
+        player_ids: Iterable[Any] = (),
+        player_names: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the stats of every requested player found on this date, in
+        request order and without duplicates.
+        """
+        found: Dict[Any, Dict[str, Any]] = {}
+        for stats in [self.get_by_id(i) for i in player_ids] + [
+            self.get_by_name(n) for n in player_names
+        ]:
+            if stats is not None:
+                found.setdefault(stats["PlayerID"], stats)
+        return list(found.values())
+
+
+# Indexes are keyed by date and reused while the underlying payload is the
+# same object, i.e. while the upstream cache entry is still fresh
+_indexes = TTLCache(max_entries=MAX_CACHED_DATES)
+
+
+async def get_player_stats_index(date: str) -> PlayerStatsIndex:
+    """
+    Return the indexed player game stats for a date, building the index only
+    when the upstream payload for that date has changed.
+    """
+    payload = await sportsdata.get_player_game_stats_by_date(date)
+    entry = _indexes.get(date)
+    if entry is not None and entry.value[0] is payload:
+        return entry.value[1]
+    index = PlayerStatsIndex(payload if isinstance(payload, list) else [])
+    _indexes.set(date, (payload, index), ttl=None)
+    return index
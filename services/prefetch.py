@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import logging
+import os
+from typing import Any, Dict, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from services import sportsdata
+
+logger = logging.getLogger(__name__)
+
+# Read environment variables for the prefetch scheduler
+PREFETCH_ENABLED = os.environ.get("NBA_PREFETCH_ENABLED", "true").lower() == "true"
+
+# Constants
+PREFETCH_LEAD_TIME = datetime.timedelta(minutes=5)  # How long before tip-off caches are warmed
+LIVE_POLL_INTERVAL = 30.0  # Seconds between schedule checks while a game is in progress
+IDLE_INTERVAL = 900.0  # Seconds between schedule checks when nothing is about to happen
+ERROR_BACKOFF = 60.0  # Seconds to wait after a failed schedule check
+SCHEDULE_TIMEZONE = ZoneInfo("America/New_York")  # sportsdata.io game days are US Eastern
+
+FINAL_STATUSES = {"Final", "F/OT"}
+
+
+def parse_utc(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return None
+
+
+def is_final(game: Dict[str, Any]) -> bool:
+    return bool(game.get("IsClosed")) or game.get("Status") in FINAL_STATUSES
+
+
+class PrefetchScheduler:
+    """
+    Warms the sportsdata.io caches around today's games.
+
+    Shortly before each tip-off, and again as soon as a game is final, the
+    scores, box scores, standings and both teams' rosters are refetched so the
+    requests that spike around those moments are served from memory.
+    """
+
+    def __init__(self, lead_time: datetime.timedelta = PREFETCH_LEAD_TIME):
+        self.lead_time = lead_time
+        self._task: Optional[asyncio.Task] = None
+        self._day: Optional[str] = None
+        self._warmed: Set[Tuple[Any, str]] = set()  # (GameID, "pregame" or "final")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Prefetch schedule check failed: {e}")
+                delay = ERROR_BACKOFF
+            await asyncio.sleep(delay)
+
+    async def tick(self, now: Optional[datetime.datetime] = None) -> float:
+        """
+        Check today's schedule, warm the caches of games that are about to tip
+        off or just went final, and return the seconds until the next check.
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        day = now.astimezone(SCHEDULE_TIMEZONE).date().isoformat()
+        if day != self._day:
+            self._day = day
+            self._warmed.clear()
+
+        games = await sportsdata.get_games_by_date(day)
+        delay = IDLE_INTERVAL
+        for game in games if isinstance(games, list) else []:
+            tipoff = parse_utc(game.get("DateTimeUTC"))
+            if tipoff is None:
+                continue
+            game_id = game.get("GameID")
+
+            if is_final(game):
+                if (game_id, "final") not in self._warmed:
+                    self._warmed.add((game_id, "final"))
+                    await self.warm(game)
+            elif now >= tipoff - self.lead_time:
+                if (game_id, "pregame") not in self._warmed:
+                    self._warmed.add((game_id, "pregame"))
+                    await self.warm(game)
+                # Keep polling until the game goes final
+                delay = min(delay, LIVE_POLL_INTERVAL)
+            else:
+                delay = min(delay, (tipoff - self.lead_time - now).total_seconds())
+
+        return max(delay, 1.0)
+
+    async def warm(self, game: Dict[str, Any]) -> None:
+        day = game["Day"][:10] if game.get("Day") else self._day
+        fetches = [
+            sportsdata.get_games_by_date(day, refresh=True),
+            sportsdata.get_player_game_stats_by_date(day, refresh=True),
+        ]
+        if game.get("Season"):
+            fetches.append(sportsdata.get_standings(game["Season"], refresh=True))
+        for team in (game.get("HomeTeam"), game.get("AwayTeam")):
+            if team:
+                fetches.append(sportsdata.get_players_basic(team, refresh=True))
+
+        results = await asyncio.gather(*fetches, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        logger.info(
+            f"Prefetched game {game.get('GameID')} ({game.get('Status')}): "
+            f"{len(results) - len(errors)} ok, {len(errors)} failed"
+        )
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+from services.metrics import OPENAI_RATE_LIMIT_WAIT, OPENAI_THROTTLED, CallbackGauge, registry
+
+# Read environment variables for the OpenAI rate limits of the organization, applied to each model
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", 3000))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_TOKENS_PER_MINUTE", 1000000))
+
+# Constants
+INTERACTIVE = "interactive"  # Calls a user is waiting on, e.g. query embeddings
+BULK = "bulk"  # Ingestion and document processing calls
+BULK_HEADROOM = 0.1  # The fraction of each bucket bulk calls leave for interactive ones
+YIELD_INTERVAL = 0.05  # Seconds a bulk call waits while an interactive call is queued
+MAX_WAIT_STEP = 1.0  # The longest single sleep, so limits learned from headers apply quickly
+DEFAULT_RETRY_AFTER = 1.0  # Seconds to pause after a 429 that names no reset time
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate limit reset time such as "20ms", "1s" or "6m0s", or a plain
+    number of seconds, into seconds. Returns None if it cannot be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    A bucket holding up to per_minute units, refilled continuously at
+    per_minute units per minute. Its level may go negative when a request
+    costs more than estimated; the debt is repaid by the refill.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, floor: float) -> float:
+        """Return the seconds until amount can be taken while leaving floor in the bucket."""
+        needed = min(amount + floor, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60 / self.capacity
+
+
+class RateLimiter:
+    """
+    Schedules the OpenAI calls to one model within the organization's
+    requests per minute and tokens per minute for that model, shared by every
+    thread and event loop in the process.
+
+    Each call takes one request and its estimated tokens from two token
+    buckets, waiting until both can pay. Bulk calls leave bulk_headroom of each
+    bucket untouched and step aside while an interactive call is waiting, so
+    user queries are not queued behind an ingestion. The buckets follow the
+    limits and remaining quota the API reports in its x-ratelimit headers, and
+    a 429 pauses every call to the model until the reset time it names.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = OPENAI_TOKENS_PER_MINUTE,
+        bulk_headroom: float = BULK_HEADROOM,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bulk_headroom = bulk_headroom
+        self.clock = clock
+        now = clock()
+        self.requests = TokenBucket(requests_per_minute, now)
+        self.tokens = TokenBucket(tokens_per_minute, now)
+        self.paused_until = 0.0
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int, priority: str) -> float:
+        """
+        Take a request and tokens from the buckets if they can pay now.
+
+        Returns:
+            0 if the call may go ahead, or else the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return min(self.paused_until - now, MAX_WAIT_STEP)
+            if priority == BULK and self._interactive_waiting:
+                return YIELD_INTERVAL
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            headroom = self.bulk_headroom if priority == BULK else 0.0
+            wait = max(
+                self.requests.wait_time(1, headroom * self.requests.capacity),
+                self.tokens.wait_time(tokens, headroom * self.tokens.capacity),
+            )
+            if wait > 0:
+                return min(wait, MAX_WAIT_STEP)
+            self.requests.level -= 1
+            self.tokens.level -= tokens
+            return 0.0
+
+    def _start_waiting(self, priority: str) -> None:
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+
+    def _stop_waiting(self, priority: str, waited: float) -> None:
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting -= 1
+        if waited:
+            OPENAI_RATE_LIMIT_WAIT.inc(waited, priority=priority)
+
+    def acquire(self, tokens: int, priority: str = BULK) -> None:
+        """Block the calling thread until a call costing tokens may be made."""
+        start = self.clock()
+        self._start_waiting(priority)
+        try:
+            while True:
+                delay = self._reserve(tokens, priority)
+                if not delay:
+                    return
+                time.sleep(delay)
+        finally:
+            self._stop_waiting(priority, self.clock() - start)
+
+    async def aacquire(self, tokens: int, priority: str = BULK) -> None:
+        """Wait, without blocking the event loop, until a call costing tokens may be made."""
+        start = self.clock()
+        self._start_waiting(priority)
+        try:
+            while True:
+                delay = self._reserve(tokens, priority)
+                if not delay:
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            self._stop_waiting(priority, self.clock() - start)
+
+    def settle(self, estimated: int, used: Optional[int]) -> None:
+        """Correct the token bucket once a response reports the tokens a call actually used."""
+        if used is None:
+            return
+        with self._lock:
+            self.tokens.level += estimated - used
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Adopt the limits and remaining quota reported by the x-ratelimit
+        response headers. Remaining quota only ever lowers a bucket, since
+        calls still in flight are not counted by the server yet.
+        """
+        if not headers:
+            return
+        with self._lock:
+            now = self.clock()
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                bucket.refill(now)
+                limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+                if limit:
+                    bucket.capacity = limit
+                    bucket.level = min(bucket.level, limit)
+                remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+                if remaining is not None:
+                    bucket.level = min(bucket.level, remaining)
+
+    def throttle(self, headers: Optional[Mapping[str, str]], endpoint: str) -> None:
+        """
+        Pause every call to the model after a 429 until the time named by its
+        Retry-After or x-ratelimit-reset headers, and adopt the limits it reports.
+        """
+        headers = headers or {}
+        OPENAI_THROTTLED.inc(endpoint=endpoint)
+        self.update_from_headers(headers)
+        resets = [
+            parse_duration(headers.get(name))
+            for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        ]
+        delay = max((reset for reset in resets if reset is not None), default=DEFAULT_RETRY_AFTER)
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + delay)
+
+
+# OpenAI enforces its rate limits per model, so each model has its own limiter
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model)
+        if limiter is None:
+            limiter = _rate_limiters[model] = RateLimiter()
+        return limiter
+
+
+def _remaining():
+    with _rate_limiters_lock:
+        limiters = list(_rate_limiters.items())
+    remaining = {}
+    for model, limiter in limiters:
+        now = limiter.clock()
+        with limiter._lock:
+            limiter.requests.refill(now)
+            limiter.tokens.refill(now)
+            remaining[(model, "requests")] = limiter.requests.level
+            remaining[(model, "tokens")] = limiter.tokens.level
+    return remaining
+
+
+registry.register(
+    CallbackGauge(
+        "openai_rate_limit_remaining",
+        "The requests and tokens the OpenAI rate limiter of each model can spend now.",
+        _remaining,
+        ["model", "bucket"],
+    )
+)
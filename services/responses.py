@@ -0,0 +1,157 @@
+import json
+from typing import Any, Hashable, List, Optional, Sequence
+
+from starlette.responses import Response
+
+from services.cache import TTLCache
+from services.metrics import stage
+from services.sportsdata import served_stale
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# The fields each NBA route returns by default; None returns every upstream field
+GAME_FIELDS = [
+    "GameEndDateTime",
+    "GameID",
+    "Season",
+    "SeasonType",
+    "Status",
+    "Day",
+    "DateTime",
+    "AwayTeam",
+    "HomeTeam",
+    "AwayTeamID",
+    "HomeTeamID",
+    "StadiumID",
+    "AwayTeamScore",
+    "HomeTeamScore",
+    "Updated",
+    "IsClosed",
+    "NeutralVenue",
+    "DateTimeUTC",
+]
+
+STANDINGS_FIELDS = [
+    "TeamID",
+    "Key",
+    "City",
+    "Name",
+    "Conference",
+    "Division",
+    "Wins",
+    "Losses",
+    "Percentage",
+    "ConferenceRank",
+    "DivisionRank",
+    "GamesBack",
+    "HomeWins",
+    "HomeLosses",
+    "AwayWins",
+    "AwayLosses",
+    "LastTenWins",
+    "LastTenLosses",
+    "PointsPerGameFor",
+    "PointsPerGameAgainst",
+    "StreakDescription",
+]
+
+ROSTER_FIELDS = [
+    "PlayerID",
+    "Status",
+    "TeamID",
+    "Team",
+    "Jersey",
+    "Position",
+    "FirstName",
+    "LastName",
+    "Height",
+    "Weight",
+    "BirthDate",
+]
+
+# All-Star rosters are a few dozen records, so every field is kept by default
+ALL_STAR_FIELDS = None
+
+SEARCH_RESULT_FIELDS = ["id", "score", "metadata"]
+
+# Constants
+MAX_ENCODED_RESPONSES = 256  # The number of pre-encoded immutable responses kept in memory
+
+
+def parse_fields(
+    fields: Optional[str], default: Optional[Sequence[str]]
+) -> Optional[List[str]]:
+    """
+    Parse a fields= query parameter.
+
+    Args:
+        fields: A comma separated list of field names, "all" for every field, or None for the default.
+        default: The route's default projection.
+
+    Returns:
+        The list of fields to keep, or None to keep every field.
+    """
+    if fields is None:
+        return list(default) if default is not None else None
+    if fields.strip().lower() == "all":
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def project(payload: Any, fields: Optional[Sequence[str]]) -> Any:
+    """
+    Keep only the given fields of a record or of every record in a list.
+    Fields missing from a record are left out.
+    """
+    if fields is None:
+        return payload
+    if isinstance(payload, list):
+        return [project(record, fields) for record in payload]
+    if isinstance(payload, dict):
+        return {field: payload[field] for field in fields if field in payload}
+    return payload
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact JSON bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class NBAJSONResponse(Response):
+    """
+    JSON response encoded straight to bytes. Routes return it directly so
+    FastAPI does not walk the payload with jsonable_encoder first.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, memoryview)):
+            return content
+        stale = served_stale.get()
+        if stale and isinstance(content, dict):
+            # Tell the reader, not just the client, that some data may be out of date
+            content = {**content, "stale_data": {"stale_seconds": round(max(stale.values()))}}
+        with stage("serialization"):
+            return dumps(content)
+
+
+# Encoded bodies of payloads that never change, e.g. archived seasons
+_encoded = TTLCache(max_entries=MAX_ENCODED_RESPONSES)
+
+
+def get_encoded(key: Hashable) -> Optional[bytes]:
+    entry = _encoded.get(key)
+    return entry.value if entry is not None else None
+
+
+def set_encoded(key: Hashable, body: bytes) -> bytes:
+    _encoded.set(key, body, ttl=None)
+    return body
@@ -0,0 +1,145 @@
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Read environment variables for the season archive location
+NBA_ARCHIVE_DIR = os.environ.get("NBA_ARCHIVE_DIR", "archive")
+
+# Binary layout: a header, a table of contents, then 8-byte aligned sections.
+# header:  magic (8s), number of sections (I)
+# entry:   name (24s), dtype (8s, empty for JSON sections), offset (Q), length (Q)
+MAGIC = b"NBAARC01"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<24s8sQQ")
+ALIGNMENT = 8
+
+ARCHIVE_FILENAME = "season_{season}.nbaarc"
+
+# JSON sections holding upstream payloads exactly as they were received
+STANDINGS = "standings"
+ALL_STARS = "all_stars"
+
+# Small JSON sections decoded once when an archive is opened
+DECODED_SECTIONS = (ALL_STARS,)
+
+
+class SeasonArchive:
+    """
+    A completed season snapshot, memory-mapped read only.
+
+    JSON sections hold pre-encoded upstream payloads that can be served as is,
+    and array sections are exposed as NumPy views over the mapping without
+    copying. The DECODED_SECTIONS are decoded once when the archive is opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.season = int(re.findall(r"\d+", os.path.basename(path))[0])
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a season archive")
+        self._sections: Dict[str, Any] = {}
+        for i in range(count):
+            name, dtype, offset, length = ENTRY.unpack_from(
+                self._mmap, HEADER.size + i * ENTRY.size
+            )
+            self._sections[name.rstrip(b"\0").decode()] = (
+                dtype.rstrip(b"\0").decode(),
+                offset,
+                length,
+            )
+        self._decoded = {name: self._decode(name) for name in DECODED_SECTIONS if name in self}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def raw(self, name: str) -> memoryview:
+        _, offset, length = self._sections[name]
+        return self._view[offset : offset + length]
+
+    def json_bytes(self, name: str) -> memoryview:
+        # A view over the mapping, so serving a section as is copies nothing
+        return self.raw(name)
+
+    def json(self, name: str) -> Any:
+        if name in self._decoded:
+            return self._decoded[name]
+        return self._decode(name)
+
+    def _decode(self, name: str) -> Any:
+        return json.loads(self.raw(name).tobytes())
+
+    def array(self, name: str) -> np.ndarray:
+        dtype = self._sections[name][0]
+        return np.frombuffer(self.raw(name), dtype=np.dtype(dtype))
+
+
+def write_archive(path: str, sections: Dict[str, Any]) -> None:
+    """
+    Write a season archive.
+
+    Args:
+        path: The file to write.
+        sections: A dict from section name to either a JSON-serializable payload or a NumPy array.
+    """
+    encoded = []
+    for name, value in sections.items():
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            dtype = value.dtype.str.encode()
+            data = value.tobytes()
+        else:
+            dtype = b""
+            data = json.dumps(value, separators=(",", ":")).encode()
+        encoded.append((name.encode(), dtype, data))
+
+    offset = HEADER.size + ENTRY.size * len(encoded)
+    entries = []
+    for name, dtype, data in encoded:
+        offset += -offset % ALIGNMENT
+        entries.append(ENTRY.pack(name, dtype, offset, len(data)))
+        offset += len(data)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(encoded)))
+        for entry in entries:
+            f.write(entry)
+        for name, dtype, data in encoded:
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+_archives: Dict[int, SeasonArchive] = {}
+
+
+def load_archives(directory: str = NBA_ARCHIVE_DIR) -> Dict[int, SeasonArchive]:
+    """
+    Memory-map every season archive in a directory.
+    """
+    for path in glob.glob(os.path.join(directory, ARCHIVE_FILENAME.format(season="*"))):
+        archive = SeasonArchive(path)
+        _archives[archive.season] = archive
+    return _archives
+
+
+def get_archived_seasons() -> List[int]:
+    return sorted(_archives)
+
+
+def get_archive(season: Any) -> Optional[SeasonArchive]:
+    try:
+        return _archives.get(int(season))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,489 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services import sportsdata
+from services.player_stats import PLAYER_STAT_FIELDS, normalize_name
+from services.season_archive import SeasonArchive, get_archive, get_archived_seasons
+
+logger = logging.getLogger(__name__)
+
+# Fields identifying a stat line rather than measuring it
+ID_FIELDS = {"StatID", "TeamID", "PlayerID", "Season", "Name", "Team", "Position", "Updated"}
+
+# The numeric stat columns kept for every player game, in the order of PLAYER_STAT_FIELDS
+STAT_COLUMNS = [field for field in PLAYER_STAT_FIELDS if field not in ID_FIELDS]
+COLUMN_INDEX = {column: i for i, column in enumerate(STAT_COLUMNS)}
+
+# Per-game rates that cannot be summed; they are averaged instead
+RATE_COLUMNS = [
+    column
+    for column in STAT_COLUMNS
+    if column.endswith("Percentage") or column == "PlayerEfficiencyRating"
+]
+COUNTING_COLUMNS = [column for column in STAT_COLUMNS if column not in RATE_COLUMNS]
+
+SPLITS = ("home_away", "month", "opponent")
+
+# The columns written to and mapped from a season archive
+ARRAY_COLUMNS = ("player_id", "team_id", "opponent_id", "date", "home", "stats")
+
+# Constants
+INGEST_CONCURRENCY = 8  # The number of dates fetched concurrently while ingesting a season
+MAX_LAST_N = 10  # The longest last-N games window kept by the aggregates
+MAX_TABLES = 8  # The number of season tables kept in memory, least recently used evicted first
+REFRESH_INTERVAL = 15 * 60  # Seconds between checks of the schedule for newly completed dates
+
+
+class RunningAggregate:
+    """
+    Running sums of the stat lines of one player or team, overall and by
+    home/away, plus its MAX_LAST_N most recent games. Each game is added in
+    constant time, so answering never revisits the raw stat lines.
+    """
+
+    __slots__ = ("games", "sums", "home_games", "home_sums", "recent")
+
+    def __init__(self):
+        self.games = 0
+        self.sums = np.zeros(len(STAT_COLUMNS))
+        self.home_games = 0
+        self.home_sums = np.zeros(len(STAT_COLUMNS))
+        # (date, stats) of the most recent games, oldest first
+        self.recent: List[Tuple[str, np.ndarray]] = []
+
+    def add(self, date: str, stats: np.ndarray, home: bool) -> None:
+        self.games += 1
+        self.sums += stats
+        if home:
+            self.home_games += 1
+            self.home_sums += stats
+        # Days can be ingested out of order, so keep the window sorted by date
+        bisect.insort(self.recent, (date, stats), key=lambda game: game[0])
+        if len(self.recent) > MAX_LAST_N:
+            self.recent.pop(0)
+
+    def last_n(self, n: int) -> Tuple[int, np.ndarray]:
+        games = self.recent[-n:] if n > 0 else []
+        return len(games), sum((stats for _, stats in games), np.zeros(len(STAT_COLUMNS)))
+
+    def summary(self, last_n: Optional[int] = None, team: bool = False) -> Dict[str, Any]:
+        """
+        Return the totals, per-game averages and home/away per-game averages,
+        and those of the last_n most recent games if given. Team averages
+        leave out per-player rates, which do not add up across players.
+        """
+        columns = COUNTING_COLUMNS if team else STAT_COLUMNS
+        summary = {
+            "totals": _totals(self.sums, self.games),
+            "averages": _averages(self.sums, self.games, columns),
+            "home": _averages(self.home_sums, self.home_games, columns),
+            "away": _averages(self.sums - self.home_sums, self.games - self.home_games, columns),
+        }
+        if last_n is not None:
+            games, sums = self.last_n(min(last_n, MAX_LAST_N))
+            summary["last_n"] = _averages(sums, games, columns)
+        return summary
+
+
+class SeasonAggregates:
+    """
+    Player and team aggregates of a season, updated as each day is ingested.
+    A team's game is the sum of its players' stat lines for that day.
+    """
+
+    def __init__(self):
+        self.players: Dict[int, RunningAggregate] = {}
+        self.teams: Dict[int, RunningAggregate] = {}
+
+    def add_day(
+        self,
+        date: str,
+        player_id: np.ndarray,
+        team_id: np.ndarray,
+        home: np.ndarray,
+        stats: np.ndarray,
+    ) -> None:
+        for i, pid in enumerate(player_id.tolist()):
+            self.players.setdefault(pid, RunningAggregate()).add(date, stats[i], bool(home[i]))
+        for tid in np.unique(team_id).tolist():
+            if tid == 0:
+                continue
+            rows = team_id == tid
+            self.teams.setdefault(tid, RunningAggregate()).add(date, stats[rows].sum(axis=0), bool(home[rows][0]))
+
+
+class SeasonTable:
+    """
+    Columnar store of every player game stat line of one season.
+
+    Each stat line is a row: identifier columns are 1-D arrays and the stat
+    columns form a float64 matrix with one column per STAT_COLUMNS entry.
+    Rows are appended a day at a time and consolidated lazily on the next read,
+    together with row indexes per player and per team.
+    """
+
+    def __init__(self, season: int):
+        self.season = season
+        self.archived = False  # Whether the table was mapped from a completed season archive
+        self.dates: Set[str] = set()
+        self.players: Dict[int, Dict[str, Any]] = {}  # PlayerID -> Name and Team
+        self.player_names: Dict[str, int] = {}  # normalized name -> PlayerID
+        self.teams: Dict[str, int] = {}  # team abbreviation -> TeamID
+        self.player_id = np.empty(0, dtype=np.int64)
+        self.team_id = np.empty(0, dtype=np.int64)
+        self.opponent_id = np.empty(0, dtype=np.int64)
+        self.date = np.empty(0, dtype="datetime64[D]")
+        self.home = np.empty(0, dtype=bool)
+        self.stats = np.empty((0, len(STAT_COLUMNS)), dtype=np.float64)
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._player_rows: Dict[int, np.ndarray] = {}
+        self._team_rows: Dict[int, np.ndarray] = {}
+        self._aggregates: Optional[SeasonAggregates] = SeasonAggregates()
+
+    def __len__(self) -> int:
+        return len(self.player_id) + sum(len(day["player_id"]) for day in self._pending)
+
+    def ingest_day(self, date: str, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Append the PlayerGameStatsByDate records of one date. A date is only
+        ingested once.
+        """
+        if date in self.dates:
+            return
+        records = [record for record in records if record.get("PlayerID") is not None]
+        self.dates.add(date)
+        if not records:
+            return
+
+        for record in records:
+            self.players[record["PlayerID"]] = {"Name": record.get("Name"), "Team": record.get("Team")}
+            if record.get("Name"):
+                self.player_names[normalize_name(record["Name"])] = record["PlayerID"]
+            if record.get("Team") and record.get("TeamID") is not None:
+                self.teams[record["Team"].upper()] = record["TeamID"]
+
+        day = {
+            "player_id": np.array([r["PlayerID"] for r in records], dtype=np.int64),
+            "team_id": np.array([r.get("TeamID") or 0 for r in records], dtype=np.int64),
+            "opponent_id": np.array([r.get("OpponentID") or 0 for r in records], dtype=np.int64),
+            "date": np.full(len(records), np.datetime64(date[:10], "D")),
+            "home": np.array([r.get("HomeOrAway") == "HOME" for r in records], dtype=bool),
+            "stats": np.array(
+                [[r.get(column) or 0 for column in STAT_COLUMNS] for r in records],
+                dtype=np.float64,
+            ),
+        }
+        self._pending.append(day)
+        if self._aggregates is not None:
+            self._aggregates.add_day(date[:10], day["player_id"], day["team_id"], day["home"], day["stats"])
+
+    @property
+    def aggregates(self) -> SeasonAggregates:
+        """
+        The player and team aggregates. Tables mapped from an archive build
+        them in one pass on first use.
+        """
+        if self._aggregates is None:
+            self._consolidate()
+            aggregates = SeasonAggregates()
+            dates = self.date.astype(str)
+            for date in np.unique(dates).tolist():
+                rows = np.flatnonzero(dates == date)
+                aggregates.add_day(
+                    date, self.player_id[rows], self.team_id[rows], self.home[rows], self.stats[rows]
+                )
+            self._aggregates = aggregates
+        return self._aggregates
+
+    def player_summary(self, player_id: int, last_n: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        aggregate = self.aggregates.players.get(player_id)
+        return aggregate.summary(last_n) if aggregate is not None else None
+
+    def team_summary(self, team: str, last_n: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        aggregate = self.aggregates.teams.get(self.teams.get(team.upper(), -1))
+        return aggregate.summary(last_n, team=True) if aggregate is not None else None
+
+    def _consolidate(self) -> None:
+        if not self._pending:
+            return
+        for column in ARRAY_COLUMNS:
+            parts = [getattr(self, column)] + [day[column] for day in self._pending]
+            setattr(self, column, np.concatenate(parts))
+        self._pending = []
+        self._player_rows = _group_rows(self.player_id)
+        self._team_rows = _group_rows(self.team_id)
+
+    def to_archive_sections(self) -> Dict[str, Any]:
+        self._consolidate()
+        sections: Dict[str, Any] = {column: getattr(self, column) for column in ARRAY_COLUMNS}
+        sections["stat_columns"] = STAT_COLUMNS
+        sections["dates"] = sorted(self.dates)
+        sections["players"] = [[player_id, p["Name"], p["Team"]] for player_id, p in self.players.items()]
+        sections["teams"] = self.teams
+        return sections
+
+    @classmethod
+    def from_archive(cls, archive: SeasonArchive) -> "SeasonTable":
+        """
+        Build a table whose columns are read-only views over a memory-mapped
+        season archive.
+        """
+        if archive.json("stat_columns") != STAT_COLUMNS:
+            raise ValueError(f"{archive.path} was built with different stat columns")
+        table = cls(archive.season)
+        table.archived = True
+        for column in ARRAY_COLUMNS:
+            setattr(table, column, archive.array(column))
+        table.stats = table.stats.reshape(-1, len(STAT_COLUMNS))
+        table.dates = set(archive.json("dates"))
+        for player_id, name, team in archive.json("players"):
+            table.players[player_id] = {"Name": name, "Team": team}
+            if name:
+                table.player_names[normalize_name(name)] = player_id
+        table.teams = archive.json("teams")
+        table._aggregates = None
+        table._player_rows = _group_rows(table.player_id)
+        table._team_rows = _group_rows(table.team_id)
+        return table
+
+    def resolve_player(self, player_id: Optional[Any] = None, player_name: Optional[str] = None) -> Optional[int]:
+        if player_id is not None:
+            try:
+                return int(player_id)
+            except (TypeError, ValueError):
+                return None
+        if player_name:
+            return self.player_names.get(normalize_name(player_name))
+        return None
+
+    def select(
+        self,
+        player_id: Optional[int] = None,
+        team: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Return the row numbers matching a player, a team abbreviation and an
+        inclusive date range. Omitted criteria match every row.
+        """
+        self._consolidate()
+        rows = np.arange(len(self.player_id))
+        if player_id is not None:
+            rows = self._player_rows.get(player_id, rows[:0])
+        if team is not None:
+            team_rows = self._team_rows.get(self.teams.get(team.upper(), -1), rows[:0])
+            rows = team_rows if player_id is None else np.intersect1d(rows, team_rows)
+        if start_date is not None:
+            rows = rows[self.date[rows] >= np.datetime64(start_date[:10], "D")]
+        if end_date is not None:
+            rows = rows[self.date[rows] <= np.datetime64(end_date[:10], "D")]
+        return rows
+
+    def totals(self, rows: np.ndarray) -> Dict[str, Any]:
+        self._consolidate()
+        return _totals(self.stats[rows].sum(axis=0), len(rows))
+
+    def averages(self, rows: np.ndarray) -> Dict[str, Any]:
+        self._consolidate()
+        return _averages(self.stats[rows].sum(axis=0), len(rows))
+
+    def splits(self, rows: np.ndarray, by: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-game averages of the rows grouped by home/away, month or
+        opponent.
+        """
+        self._consolidate()
+        if by == "home_away":
+            keys = np.where(self.home[rows], "HOME", "AWAY")
+        elif by == "month":
+            keys = self.date[rows].astype("datetime64[M]").astype(str)
+        elif by == "opponent":
+            keys = self.opponent_id[rows]
+        else:
+            raise ValueError(f"Unsupported split: {by}")
+
+        team_names = {team_id: abbreviation for abbreviation, team_id in self.teams.items()}
+        groups, inverse = np.unique(keys, return_inverse=True)
+        return {
+            str(team_names.get(group, group)) if by == "opponent" else str(group): self.averages(rows[inverse == i])
+            for i, group in enumerate(groups.tolist())
+        }
+
+
+def _totals(sums: np.ndarray, games: int) -> Dict[str, Any]:
+    totals = {column: float(sums[COLUMN_INDEX[column]]) for column in COUNTING_COLUMNS}
+    totals.update(_shooting_percentages(totals))
+    totals["Games"] = int(games)
+    return totals
+
+
+def _averages(sums: np.ndarray, games: int, columns: List[str] = STAT_COLUMNS) -> Dict[str, Any]:
+    if games == 0:
+        return {"Games": 0}
+    averages = {column: round(float(sums[COLUMN_INDEX[column]]) / games, 2) for column in columns}
+    averages.update(_shooting_percentages(_totals(sums, games)))
+    averages["Games"] = int(games)
+    return averages
+
+
+def _group_rows(keys: np.ndarray) -> Dict[int, np.ndarray]:
+    order = np.argsort(keys, kind="stable")
+    groups, starts = np.unique(keys[order], return_index=True)
+    return dict(zip(groups.tolist(), np.split(order, starts[1:])))
+
+
+def _percentage(made: float, attempted: float) -> float:
+    return round(100 * made / attempted, 1) if attempted else 0.0
+
+
+def _shooting_percentages(totals: Dict[str, float]) -> Dict[str, float]:
+    return {
+        "FieldGoalsPercentage": _percentage(totals["FieldGoalsMade"], totals["FieldGoalsAttempted"]),
+        "EffectiveFieldGoalsPercentage": _percentage(
+            totals["FieldGoalsMade"] + 0.5 * totals["ThreePointersMade"], totals["FieldGoalsAttempted"]
+        ),
+        "TwoPointersPercentage": _percentage(totals["TwoPointersMade"], totals["TwoPointersAttempted"]),
+        "ThreePointersPercentage": _percentage(totals["ThreePointersMade"], totals["ThreePointersAttempted"]),
+        "FreeThrowsPercentage": _percentage(totals["FreeThrowsMade"], totals["FreeThrowsAttempted"]),
+        "TrueShootingPercentage": _percentage(totals["Points"], 2 * totals["TrueShootingAttempts"]),
+    }
+
+
+_tables: "OrderedDict[int, SeasonTable]" = OrderedDict()
+_ingestions: Dict[int, "asyncio.Task[SeasonTable]"] = {}
+_ingested_at: Dict[int, float] = {}  # season -> monotonic time its last ingestion finished
+
+
+class SeasonOutOfRangeError(ValueError):
+    """Raised for a season that is neither archived nor up to the current one."""
+
+
+def check_season(season: int) -> None:
+    """
+    Check that a season can be served: from the earliest archived season, or
+    the current one without archives, up to the current season.
+
+    Raises:
+        SeasonOutOfRangeError: If the season is outside that range.
+    """
+    current_season = sportsdata.current_season()
+    first_season = min(get_archived_seasons(), default=current_season)
+    if not first_season <= season <= current_season:
+        raise SeasonOutOfRangeError(f"season must be between {first_season} and {current_season}")
+
+
+def _get_table(season: int) -> SeasonTable:
+    # Keeps at most MAX_TABLES tables, never evicting one that is being ingested
+    table = _tables.get(season)
+    if table is None:
+        archive = get_archive(season)
+        if archive is not None and "player_id" in archive:
+            table = SeasonTable.from_archive(archive)
+        else:
+            table = SeasonTable(season)
+        _tables[season] = table
+    _tables.move_to_end(season)
+    evictable = [s for s in _tables if s != season and not is_ingesting(s)]
+    for evicted in evictable[: max(len(_tables) - MAX_TABLES, 0)]:
+        del _tables[evicted]
+        _ingested_at.pop(evicted, None)
+    return table
+
+
+def get_closed_dates(season_games: Any) -> List[str]:
+    """
+    Return the dates of a season schedule on which every game is closed, i.e.
+    the days whose stat lines will not change anymore.
+    """
+    open_dates: Set[str] = set()
+    closed_dates: Set[str] = set()
+    for game in season_games if isinstance(season_games, list) else []:
+        if not game.get("Day"):
+            continue
+        date = game["Day"][:10]
+        (closed_dates if game.get("IsClosed") else open_dates).add(date)
+    return sorted(closed_dates - open_dates)
+
+
+async def _ingest_season(season: int) -> SeasonTable:
+    table = _get_table(season)
+    try:
+        season_games = await sportsdata.get_season_games(season)
+    except Exception as e:
+        logger.warning(f"Season {season} schedule fetch failed: {e}")
+        _ingested_at[season] = time.monotonic()
+        return table
+    missing_dates = [date for date in get_closed_dates(season_games) if date not in table.dates]
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def _ingest_date(date: str):
+        # A failed day is left out of table.dates, so the next refresh retries it
+        try:
+            async with semaphore:
+                # Each day is kept by the table, so it bypasses the response cache
+                records = await sportsdata.get_player_game_stats_by_date(date, cache=False)
+        except Exception as e:
+            logger.warning(f"Season {season} ingestion of {date} failed: {e}")
+            return
+        table.ingest_day(date, records if isinstance(records, list) else [])
+
+    await asyncio.gather(*[_ingest_date(date) for date in missing_dates])
+    _ingested_at[season] = time.monotonic()
+    return table
+
+
+def start_ingestion(season: int) -> "asyncio.Task[SeasonTable]":
+    """
+    Start ingesting the completed dates of a season the table does not hold
+    yet in the background, unless an ingestion of that season is running.
+    """
+    task = _ingestions.get(season)
+    if task is None or task.done():
+        task = _ingestions[season] = asyncio.create_task(_ingest_season(season))
+    return task
+
+
+def is_ingesting(season: int) -> bool:
+    task = _ingestions.get(season)
+    return task is not None and not task.done()
+
+
+async def ingest_season(season: int) -> SeasonTable:
+    """Ingest every completed date of a season and wait for it, e.g. to archive the season."""
+    return await asyncio.shield(start_ingestion(season))
+
+
+async def stop_ingestions() -> None:
+    tasks = [task for task in _ingestions.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _ingestions.clear()
+
+
+async def get_season_table(season: int) -> SeasonTable:
+    """
+    Return the season table as ingested so far without waiting on upstream
+    calls. Completed dates it does not hold yet are ingested in the
+    background, rechecked every REFRESH_INTERVAL seconds, so requests made
+    during an ingestion are answered from the days already ingested.
+    Archived seasons are complete and are served without any upstream call.
+
+    Raises:
+        SeasonOutOfRangeError: If the season is neither archived nor up to the current one.
+    """
+    check_season(season)
+    table = _get_table(season)
+    if table.archived:
+        return table
+    ingested_at = _ingested_at.get(season)
+    if ingested_at is None or time.monotonic() - ingested_at >= REFRESH_INTERVAL:
+        start_ingestion(season)
+    return table
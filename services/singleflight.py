@@ -0,0 +1,55 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller for a key starts the work; callers arriving while it is in
+    flight await the same result. A caller being cancelled does not cancel the
+    shared work for the others.
+    """
+
+    def __init__(self):
+        self.calls = 0  # Total number of calls to do()
+        self.executions = 0  # Calls that actually ran the work
+        self.deduplicated = 0  # Calls that joined work already in flight
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn for key unless an identical call is already in flight.
+
+        Args:
+            key: Identifies calls that produce the same result.
+            fn: A coroutine function producing the result.
+
+        Returns:
+            The result of the single execution of fn, shared by all callers.
+        """
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.deduplicated += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: "asyncio.Future") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,469 @@
+import asyncio
+import contextvars
+import datetime
+import os
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.cache import CacheEntry, TTLCache
+from services.circuit_breaker import OPEN, CircuitBreaker
+from services.metrics import (
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_STALE,
+    CallbackGauge,
+    registry,
+    stage,
+)
+from services.singleflight import SingleFlight
+
+# Read environment variables for the sportsdata.io client configuration
+SPORTSDATA_BASE_URL = os.environ.get(
+    "SPORTSDATA_BASE_URL", "https://api.sportsdata.io/v3/nba"
+)
+SPORTSDATA_API_KEY = os.environ.get(
+    "SPORTSDATA_API_KEY", "48a287166d5d4ecabd71c344439ee80c"
+)
+
+# Constants
+MAX_CONNECTIONS = int(os.environ.get("SPORTSDATA_MAX_CONNECTIONS", 50))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("SPORTSDATA_MAX_KEEPALIVE", 20))
+KEEPALIVE_EXPIRY = 30.0  # Seconds an idle pooled connection is kept open
+MAX_CONCURRENCY_PER_HOST = int(os.environ.get("SPORTSDATA_MAX_CONCURRENCY", 16))
+CONNECT_TIMEOUT = 3.0  # Seconds to establish a connection (including TLS)
+REQUEST_TIMEOUT = 10.0  # Seconds for the whole request once connected
+MAX_ATTEMPTS = 3  # Attempts per request, including the first one
+RETRY_BACKOFF = 0.2  # Base delay in seconds between attempts, doubled each retry
+RETRY_BUDGET_RATIO = 0.2  # Retries allowed as a fraction of recent requests
+RETRY_BUDGET_MIN_TOKENS = 10.0  # Retries always allowed regardless of traffic
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Cache time to live in seconds for each kind of payload; None caches forever
+LIVE_TTL = 5.0  # Days with a game in progress
+SCHEDULED_TTL = 60.0  # Days whose games have not finished or not started
+STANDINGS_TTL = 600.0  # Standings of the season being played
+ROSTER_TTL = 3600.0  # Team rosters
+FOREVER = None
+
+# How long an expired payload may still be served, in seconds past its expiry
+STALE_WHILE_REVALIDATE = 30.0  # Served at once while a background fetch refreshes it
+STALE_IF_ERROR = 24 * 3600.0  # Served when the upstream fails or the circuit is open
+
+# The upstream paths served stale while handling the current request, with
+# the seconds since each expired; None outside of a request
+served_stale: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "served_stale", default=None
+)
+
+
+class SportsDataError(Exception):
+    """Raised when the sportsdata.io API cannot produce a usable response."""
+
+
+class SportsDataClientError(SportsDataError):
+    """Raised when sportsdata.io rejects a request, e.g. an unknown team; not a sign of upstream trouble."""
+
+    def __init__(self, message: str, path: str, status_code: int):
+        super().__init__(message)
+        self.path = path
+        self.status_code = status_code
+
+
+class CircuitOpenError(SportsDataError):
+    """Raised without calling sportsdata.io while its circuit breaker is open."""
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of the request rate, so a struggling upstream is
+    not hit with a multiple of the normal load.
+
+    Every request deposits `ratio` tokens and every retry withdraws one. The
+    balance is capped at `min_tokens`, so short bursts of retries are allowed
+    while sustained retrying is held to `ratio` of the request volume.
+    """
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_tokens: float = RETRY_BUDGET_MIN_TOKENS,
+    ):
+        self.ratio = ratio
+        self.max_tokens = min_tokens
+        self.tokens = min_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class SportsDataClient:
+    """
+    Shared async client for the sportsdata.io NBA API.
+
+    One pooled httpx.AsyncClient keeps TLS connections alive between requests,
+    a semaphore per host bounds the number of concurrent upstream calls, and
+    failed calls are retried with exponential backoff within a retry budget.
+    """
+
+    def __init__(
+        self,
+        base_url: str = SPORTSDATA_BASE_URL,
+        api_key: str = SPORTSDATA_API_KEY,
+        max_concurrency_per_host: int = MAX_CONCURRENCY_PER_HOST,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.retry_budget = RetryBudget()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(
+                self.max_concurrency_per_host
+            )
+        return self._host_semaphores[host]
+
+    async def get_json(self, path: str) -> Any:
+        """
+        Fetch a sportsdata.io endpoint and return its decoded JSON payload.
+
+        Args:
+            path: The endpoint path relative to the base url, e.g. "scores/json/GamesByDate/2023-APR-01".
+
+        Returns:
+            The decoded JSON payload.
+
+        Raises:
+            SportsDataError: If every attempt fails or the retry budget is exhausted.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = split_path(path)[0]
+        self.retry_budget.deposit()
+
+        last_error: Optional[Exception] = None
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt > 0:
+                if not self.retry_budget.withdraw():
+                    break
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                async with self._semaphore(url):
+                    with UPSTREAM_IN_FLIGHT.track(), UPSTREAM_DURATION.time(
+                        endpoint=endpoint
+                    ):
+                        response = await self.client.get(
+                            url, params={"key": self.api_key}
+                        )
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    UPSTREAM_ERRORS.inc(endpoint=endpoint, kind=str(response.status_code))
+                    last_error = SportsDataError(
+                        f"{path} returned status {response.status_code}"
+                    )
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except httpx.TransportError as e:
+                UPSTREAM_ERRORS.inc(endpoint=endpoint, kind=type(e).__name__)
+                last_error = e
+            except httpx.HTTPStatusError as e:
+                # Client errors will not improve on retry
+                UPSTREAM_ERRORS.inc(endpoint=endpoint, kind=str(e.response.status_code))
+                raise SportsDataClientError(f"{path} failed: {e}", path, e.response.status_code) from e
+            except ValueError as e:
+                # Neither will undecodable bodies
+                UPSTREAM_ERRORS.inc(endpoint=endpoint, kind="invalid_json")
+                raise SportsDataError(f"{path} failed: {e}") from e
+
+        raise SportsDataError(f"{path} failed: {last_error}") from last_error
+
+
+def current_season(today: Optional[datetime.date] = None) -> int:
+    """
+    Return the sportsdata.io season year being played on a date. Seasons are
+    named after the year they end in and tip off in October.
+    """
+    today = today or datetime.date.today()
+    return today.year + 1 if today.month >= 10 else today.year
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """
+    Split "scores/json/{endpoint}/{param}" into its endpoint name and parameter.
+    """
+    parts = path.strip("/").split("/")
+    endpoint = parts[2] if len(parts) > 2 else ""
+    param = parts[3] if len(parts) > 3 else ""
+    return endpoint, param
+
+
+def _all_closed(records: Any) -> bool:
+    return (
+        isinstance(records, list)
+        and len(records) > 0
+        and all(record.get("IsClosed") for record in records)
+    )
+
+
+def get_cache_ttl(path: str, payload: Any) -> Optional[float]:
+    """
+    Choose how long an upstream payload may be served from cache.
+
+    Args:
+        path: The endpoint path the payload was fetched from.
+        payload: The decoded JSON payload.
+
+    Returns:
+        The time to live in seconds, or None if the payload never changes.
+    """
+    endpoint, param = split_path(path)
+
+    if endpoint == "GamesByDate":
+        if _all_closed(payload):
+            return FOREVER
+        if isinstance(payload, list) and any(
+            game.get("Status") == "InProgress" for game in payload
+        ):
+            return LIVE_TTL
+        return SCHEDULED_TTL
+    if endpoint == "PlayerGameStatsByDate":
+        if _all_closed(payload):
+            return FOREVER
+        return LIVE_TTL if payload else SCHEDULED_TTL
+    if endpoint == "Standings":
+        if param.isdigit() and int(param) < current_season():
+            return FOREVER
+        return STANDINGS_TTL
+    if endpoint == "AllStars":
+        return FOREVER
+    if endpoint == "Games":
+        if _all_closed(payload):
+            return FOREVER
+        return STANDINGS_TTL
+    if endpoint in ("PlayersBasic", "teams"):
+        return ROSTER_TTL
+    return SCHEDULED_TTL
+
+
+_client: Optional[SportsDataClient] = None
+_cache = TTLCache()
+_flight = SingleFlight()
+_breaker = CircuitBreaker()
+_revalidations: Set[asyncio.Future] = set()
+
+registry.register(
+    CallbackGauge(
+        "sportsdata_cache_lookups_total",
+        "sportsdata.io cache lookups by result.",
+        lambda: {("hit",): _cache.hits, ("miss",): _cache.misses},
+        ["result"],
+        type="counter",
+    )
+)
+registry.register(
+    CallbackGauge(
+        "sportsdata_cache_entries",
+        "sportsdata.io payloads held in the cache.",
+        lambda: {(): len(_cache)},
+    )
+)
+registry.register(
+    CallbackGauge(
+        "sportsdata_fetches_total",
+        "Fetches after a cache miss, by whether they ran or joined one in flight.",
+        lambda: {("executed",): _flight.executions, ("deduplicated",): _flight.deduplicated},
+        ["result"],
+        type="counter",
+    )
+)
+registry.register(
+    CallbackGauge(
+        "sportsdata_circuit_open",
+        "Whether the sportsdata.io circuit breaker is open and upstream calls are skipped.",
+        lambda: {(): float(_breaker.state == OPEN)},
+    )
+)
+registry.register(
+    CallbackGauge(
+        "sportsdata_circuit_trips_total",
+        "Times the sportsdata.io circuit breaker opened.",
+        lambda: {(): _breaker.trips},
+        type="counter",
+    )
+)
+
+
+def get_sportsdata_client() -> SportsDataClient:
+    """Return the process-wide sportsdata.io client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = SportsDataClient()
+    return _client
+
+
+async def close_sportsdata_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_cache() -> TTLCache:
+    return _cache
+
+
+def get_single_flight() -> SingleFlight:
+    return _flight
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    return _breaker
+
+
+async def _fetch(path: str) -> Any:
+    if not _breaker.allow():
+        raise CircuitOpenError(f"{path} skipped: the sportsdata.io circuit is open")
+    start = time.perf_counter()
+    try:
+        payload = await get_sportsdata_client().get_json(path)
+    except SportsDataClientError:
+        # The upstream answered, just not with data
+        _breaker.record_success(time.perf_counter() - start)
+        raise
+    except BaseException:
+        # Including cancellation, so a half-open probe is always accounted for
+        _breaker.record_failure()
+        raise
+    _breaker.record_success(time.perf_counter() - start)
+    return payload
+
+
+async def _fetch_and_cache(path: str) -> Any:
+    payload = await _fetch(path)
+    _cache.set(path, payload, get_cache_ttl(path, payload))
+    return payload
+
+
+def _revalidated(future: asyncio.Future) -> None:
+    _revalidations.discard(future)
+    # Failures are counted by the circuit breaker; the stale payload stays cached
+    if not future.cancelled():
+        future.exception()
+
+
+def _revalidate(path: str) -> None:
+    if path in _flight:
+        return
+    future = asyncio.ensure_future(_flight.do(path, lambda: _fetch_and_cache(path)))
+    _revalidations.add(future)
+    future.add_done_callback(_revalidated)
+
+
+def _serve_stale(path: str, entry: CacheEntry, reason: str) -> Any:
+    UPSTREAM_STALE.inc(reason=reason)
+    stale = served_stale.get()
+    if stale is not None:
+        stale[path] = max(stale.get(path, 0.0), entry.stale_for(_cache.clock()))
+    return entry.value
+
+
+async def fetch(path: str, refresh: bool = False, cache: bool = True) -> Any:
+    """
+    Return the payload for an endpoint path, from cache when it is still fresh.
+    Concurrent misses for the same path share a single upstream request.
+
+    A payload that expired less than STALE_WHILE_REVALIDATE seconds ago is
+    returned at once while a background fetch refreshes it. If the upstream
+    fails or its circuit breaker is open, a payload that expired less than
+    STALE_IF_ERROR seconds ago is returned instead of raising. Stale payloads
+    are recorded in served_stale.
+
+    Args:
+        path: The endpoint path relative to the base url.
+        refresh: Whether to fetch from upstream even if the cached payload is fresh.
+        cache: Whether to cache the fetched payload. Bulk reads whose payloads are
+            kept elsewhere, like season ingestion, pass False so they do not fill the cache.
+    """
+    if not refresh:
+        entry = _cache.get(path)
+        if entry is not None:
+            return entry.value
+
+    stale_entry = _cache.get_stale(path)
+    if stale_entry is not None and not refresh:
+        if stale_entry.stale_for(_cache.clock()) <= STALE_WHILE_REVALIDATE:
+            _revalidate(path)
+            return _serve_stale(path, stale_entry, "revalidating")
+
+    try:
+        with stage("upstream"):
+            return await _flight.do(path, lambda: _fetch_and_cache(path) if cache else _fetch(path))
+    except SportsDataClientError:
+        raise
+    except SportsDataError as e:
+        if stale_entry is None or stale_entry.stale_for(_cache.clock()) > STALE_IF_ERROR:
+            raise
+        reason = "circuit_open" if isinstance(e, CircuitOpenError) else "error"
+        return _serve_stale(path, stale_entry, reason)
+
+
+async def get_games_by_date(day: str, refresh: bool = False) -> Any:
+    return await fetch(f"scores/json/GamesByDate/{day}", refresh)
+
+
+async def get_season_games(season: int, refresh: bool = False) -> Any:
+    return await fetch(f"scores/json/Games/{season}", refresh)
+
+
+async def get_standings(year: int, refresh: bool = False) -> Any:
+    return await fetch(f"scores/json/Standings/{year}", refresh)
+
+
+async def get_all_stars(year: int, refresh: bool = False) -> Any:
+    return await fetch(f"stats/json/AllStars/{year}", refresh)
+
+
+async def get_teams(refresh: bool = False) -> Any:
+    return await fetch("scores/json/teams", refresh)
+
+
+async def get_players_basic(team_abv: str, refresh: bool = False) -> Any:
+    return await fetch(f"scores/json/PlayersBasic/{team_abv}", refresh)
+
+
+async def get_player_game_stats_by_date(date: str, refresh: bool = False, cache: bool = True) -> Any:
+    return await fetch(f"stats/json/PlayerGameStatsByDate/{date}", refresh, cache)
@@ -0,0 +1,161 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Read environment variables for the logging configuration
+LOG_FILE = os.environ.get("LOG_FILE", "app.log")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 1.0))
+
+# Constants
+LOG_QUEUE_SIZE = 10000  # Records buffered before new ones are dropped
+MAX_INLINE_PAYLOAD_BYTES = 512  # Larger payloads are logged as size and hash outside debug
+
+
+class Payload:
+    """
+    Wraps a payload passed in a log record's fields. Outside debug, it is
+    written as its size and hash, and only on the log writer thread.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def describe(self, debug: bool) -> Any:
+        encoded = json.dumps(self.value, default=str, separators=(",", ":")).encode()
+        if debug or len(encoded) <= MAX_INLINE_PAYLOAD_BYTES:
+            return self.value
+        return {
+            "bytes": len(encoded),
+            "blake2b": hashlib.blake2b(encoded, digest_size=8).hexdigest(),
+        }
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, including the dict passed as
+    extra={"fields": {...}}.
+    """
+
+    def __init__(self, debug: bool = False):
+        super().__init__()
+        self.debug = debug
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            entry[key] = value.describe(self.debug) if isinstance(value, Payload) else value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps INFO and lower records with probability sample_rate, or with the
+    rate passed as extra={"sample": rate}. Warnings and errors are always kept.
+    """
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample", self.sample_rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller: when the queue is full the
+    record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only resolve the message
+        # and exception text here so the record can cross threads safely
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    filename: str = LOG_FILE,
+    level: str = LOG_LEVEL,
+    sample_rate: float = LOG_SAMPLE_RATE,
+) -> DroppingQueueHandler:
+    """
+    Route the root logger through a bounded queue to a JSON lines file written
+    by a background thread, so request handlers never wait on disk I/O.
+
+    Returns:
+        The queue handler installed on the root logger.
+    """
+    global _listener
+    stop_logging()
+
+    numeric_level = logging.getLevelName(level)
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(JSONFormatter(debug=numeric_level <= logging.DEBUG))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(numeric_level)
+
+    _listener = QueueListener(queue_handler.queue, file_handler)
+    _listener.start()
+    return queue_handler
+
+
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the background writer.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,56 @@
+import json
+
+from starlette.testclient import TestClient
+
+from scripts.sportsdata_replay.sportsdata_replay import (
+    create_app,
+    fixture_path,
+    load_fixtures,
+    synthesize,
+    write_fixture,
+)
+from services.season_store import get_closed_dates
+from services.sportsdata import get_cache_ttl
+
+DAYS = ["2023-01-01", "2023-01-02"]
+
+
+def test_fixtures_round_trip(tmp_path):
+    write_fixture(str(tmp_path), "scores/json/GamesByDate/2023-01-01", [{"GameID": 1}])
+    assert fixture_path(str(tmp_path), "/scores/json/GamesByDate/2023-01-01") == str(
+        tmp_path / "scores" / "json" / "GamesByDate" / "2023-01-01.json"
+    )
+    fixtures = load_fixtures(str(tmp_path))
+    assert list(fixtures) == ["scores/json/GamesByDate/2023-01-01"]
+    assert json.loads(fixtures["scores/json/GamesByDate/2023-01-01"]) == [{"GameID": 1}]
+
+
+def test_synthesized_days_are_closed(tmp_path):
+    synthesize(str(tmp_path), DAYS, [2023], ["BOS"], seed=1)
+    fixtures = load_fixtures(str(tmp_path))
+
+    for day in DAYS:
+        path = f"stats/json/PlayerGameStatsByDate/{day}"
+        stat_lines = json.loads(fixtures[path])
+        assert stat_lines and all(line["IsClosed"] for line in stat_lines)
+        # Closed stat lines are cached as immutable, like a recorded final day
+        assert get_cache_ttl(path, stat_lines) is None
+    assert get_closed_dates(json.loads(fixtures["scores/json/Games/2023"])) == DAYS
+    assert "scores/json/PlayersBasic/BOS" in fixtures
+
+
+def test_synthesize_is_reproducible(tmp_path):
+    synthesize(str(tmp_path / "a"), DAYS, [2023], ["BOS"], seed=1)
+    synthesize(str(tmp_path / "b"), DAYS, [2023], ["BOS"], seed=1)
+    assert load_fixtures(str(tmp_path / "a")) == load_fixtures(str(tmp_path / "b"))
+
+
+def test_replay_serves_fixtures_and_injects_errors():
+    fixtures = {"scores/json/teams": b'[{"Key": "BOS"}]'}
+
+    client = TestClient(create_app(fixtures, seed=0))
+    assert client.get("/scores/json/teams").json() == [{"Key": "BOS"}]
+    assert client.get("/scores/json/Standings/2023").status_code == 404
+
+    assert TestClient(create_app(fixtures, error_rate=1.0)).get("/scores/json/teams").status_code == 500
+    assert TestClient(create_app(fixtures, throttle_rate=1.0)).get("/scores/json/teams").status_code == 429
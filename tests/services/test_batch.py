@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from services.batch import date_range, gather_bounded, parse_list, split_errors
+
+
+def test_parse_list_drops_blanks_and_duplicates():
+    assert parse_list(" BOS, LAL,,BOS ") == ["BOS", "LAL"]
+    assert parse_list(None) == []
+
+
+def test_date_range_is_inclusive_and_bounded():
+    assert date_range("2023-02-27", "2023-03-01") == ["2023-02-27", "2023-02-28", "2023-03-01"]
+    with pytest.raises(ValueError):
+        date_range("2023-03-01", "2023-02-27")
+    with pytest.raises(ValueError):
+        date_range("2023-01-01", "2023-03-01", max_days=31)
+
+
+def test_gather_bounded_limits_concurrency_and_keeps_failures():
+    in_flight = 0
+    peak = 0
+
+    async def fetch(day):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if day == "bad":
+            raise RuntimeError("upstream failed")
+        return day.upper()
+
+    keys = ["a", "b", "bad", "c", "d", "a"]
+    results = asyncio.run(gather_bounded(keys, fetch, concurrency=2))
+    values, errors = split_errors(results)
+
+    assert peak == 2
+    assert list(results) == ["a", "b", "bad", "c", "d"]
+    assert values == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert errors == {"bad": "upstream failed"}
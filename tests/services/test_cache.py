@@ -0,0 +1,48 @@
+from services.cache import TTLCache
+from services.sportsdata import FOREVER, LIVE_TTL, STANDINGS_TTL, get_cache_ttl
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    cache.set("live", 1, ttl=5)
+    cache.set("closed", 2, ttl=None)
+
+    clock.now = 4
+    assert cache.get("live").value == 1
+    clock.now = 6
+    assert cache.get("live") is None
+    assert cache.get("closed").value == 2
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=None)
+    cache.set("b", 2, ttl=None)
+    cache.get("a")
+    cache.set("c", 3, ttl=None)
+    assert cache.get("b") is None
+    assert cache.get("a").value == 1
+
+
+def test_games_ttl_follows_game_status():
+    path = "scores/json/GamesByDate/2023-APR-01"
+    closed = [{"Status": "Final", "IsClosed": True}] * 2
+    live = [{"Status": "InProgress", "IsClosed": False}, closed[0]]
+    assert get_cache_ttl(path, closed) is FOREVER
+    assert get_cache_ttl(path, live) == LIVE_TTL
+
+
+def test_standings_ttl_follows_season():
+    assert get_cache_ttl("scores/json/Standings/2010", []) is FOREVER
+    assert get_cache_ttl("scores/json/Standings/3000", []) == STANDINGS_TTL
+    assert get_cache_ttl("stats/json/AllStars/3000", []) is FOREVER
@@ -0,0 +1,44 @@
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def create_breaker(clock):
+    return CircuitBreaker(window_size=4, min_calls=4, slow_call_threshold=1.0, open_duration=10.0, clock=clock)
+
+
+def test_breaker_trips_on_failures_and_recovers_after_a_probe():
+    clock = FakeClock()
+    breaker = create_breaker(clock)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 10.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_breaker_trips_on_slow_calls_and_reopens_after_a_failed_probe():
+    clock = FakeClock()
+    breaker = create_breaker(clock)
+    for _ in range(4):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+    assert not breaker.allow()
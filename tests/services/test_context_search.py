@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from services import context_search
+from services.context_search import cancel_search, finish_search, search_context, start_search
+
+
+class FakeIndex:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"matches": [{"id": "a", "score": 0.9, "metadata": {"text": "context"}, "values": []}]}
+
+
+@pytest.fixture
+def embedding(monkeypatch):
+    # Records how each embedding call ended: "done" or "cancelled"
+    outcomes = []
+    state = {"delay": 0.0}
+
+    async def aget_query_embedding(message):
+        try:
+            await asyncio.sleep(state["delay"])
+        except asyncio.CancelledError:
+            outcomes.append("cancelled")
+            raise
+        outcomes.append("done")
+        return np.array([0.5, 0.25], dtype=np.float32)
+
+    monkeypatch.setattr(context_search, "aget_query_embedding", aget_query_embedding)
+    monkeypatch.setattr(context_search, "VECTOR_DATE_PARTITIONS", False)
+    monkeypatch.setattr(context_search, "EMBEDDING_TIMEOUT", 0.05)
+    monkeypatch.setattr(context_search, "SEARCH_TIMEOUT", 0.05)
+    return state, outcomes
+
+
+@pytest.mark.asyncio
+async def test_search_returns_projected_matches(embedding):
+    index = FakeIndex()
+    results = await finish_search(start_search(index, "who won?", filter={"Year": {"$eq": 2023}}))
+    assert results == [{"id": "a", "score": 0.9, "metadata": {"text": "context"}}]
+    assert index.queries[0]["vector"] == [0.5, 0.25]
+    assert index.queries[0]["filter"] == {"Year": {"$eq": 2023}}
+
+
+@pytest.mark.asyncio
+async def test_no_message_skips_the_search(embedding):
+    assert start_search(FakeIndex(), "") is None
+    assert await finish_search(None) == "No vector results found"
+
+
+@pytest.mark.asyncio
+async def test_embedding_timeout_cancels_the_embedding_and_degrades_to_no_results(embedding, caplog):
+    state, outcomes = embedding
+    state["delay"] = 10.0
+    index = FakeIndex()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await search_context(index, "who won?")
+    assert outcomes == ["cancelled"]
+
+    with caplog.at_level(logging.WARNING, logger=context_search.__name__):
+        assert await finish_search(start_search(index, "who won?")) == []
+    assert "TimeoutError" in caplog.text
+    assert index.queries == []
+
+
+@pytest.mark.asyncio
+async def test_search_timeout_degrades_to_no_results(embedding):
+    index = FakeIndex(delay=0.2)
+    assert await finish_search(start_search(index, "who won?")) == []
+    assert len(index.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_error_degrades_to_no_results(embedding, caplog):
+    with caplog.at_level(logging.WARNING, logger=context_search.__name__):
+        results = await finish_search(start_search(FakeIndex(error=RuntimeError("index down")), "who won?"))
+    assert results == []
+    assert "index down" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_cancel_search_cancels_the_upstream_calls(embedding):
+    state, outcomes = embedding
+    state["delay"] = 10.0
+    index = FakeIndex()
+
+    search_task = start_search(index, "who won?")
+    # Mirrors the routes: a failed stats fetch cancels the search and its own error is raised
+    with pytest.raises(ValueError, match="stats fetch failed"):
+        try:
+            await asyncio.sleep(0)
+            raise ValueError("stats fetch failed")
+        except BaseException:
+            cancel_search(search_task)
+            raise
+    with pytest.raises(asyncio.CancelledError):
+        await search_task
+    assert search_task.cancelled()
+    assert outcomes == ["cancelled"]
+    assert index.queries == []
+    cancel_search(None)
@@ -0,0 +1,65 @@
+import pytest
+
+from services import embedding_batcher
+from services.embedding_batcher import AdaptiveEmbeddingBatcher
+
+
+def token_count(text):
+    return len(text.split())
+
+
+@pytest.mark.asyncio
+async def test_batches_are_packed_up_to_the_token_budget_in_order():
+    batches = []
+
+    async def request(texts):
+        batches.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    texts = ["word " * n for n in (5, 5, 5, 40, 1, 1)]
+    budget = token_count(texts[0]) * 2
+    batcher = AdaptiveEmbeddingBatcher(token_count, max_token_budget=budget, min_token_budget=1, concurrency=1, request=request)
+
+    embeddings = await batcher.embed(texts)
+
+    assert embeddings.tolist() == [[float(len(text))] for text in texts]
+    # A text longer than the budget still goes out, alone
+    assert [len(batch) for batch in batches] == [2, 1, 1, 2]
+    assert all(sum(map(token_count, batch)) <= budget for batch in batches if len(batch) > 1)
+    assert batcher.tokens == sum(map(token_count, texts))
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_shrink_the_budget_and_are_retried_in_halves(monkeypatch):
+    monkeypatch.setattr(embedding_batcher, "EMBEDDING_RETRY_BACKOFF", 0)
+    batches = []
+
+    async def request(texts):
+        batches.append(texts)
+        if len(batches) == 1:
+            raise RuntimeError("rate limited")
+        return [[1.0] for _ in texts]
+
+    batcher = AdaptiveEmbeddingBatcher(token_count, max_token_budget=1000, min_token_budget=10, concurrency=1, request=request)
+
+    assert (await batcher.embed(["a", "b", "c", "d"])).tolist() == [[1.0]] * 4
+    assert batches[1:] == [["a", "b"], ["c", "d"]]
+    # Halved on the error, then grown back a tenth of the maximum per success
+    assert batcher.token_budget == 700
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_shrink_the_budget_and_persistent_errors_raise(monkeypatch):
+    monkeypatch.setattr(embedding_batcher, "EMBEDDING_RETRY_BACKOFF", 0)
+
+    async def request(texts):
+        raise RuntimeError("down")
+
+    batcher = AdaptiveEmbeddingBatcher(token_count, max_token_budget=1000, min_token_budget=100, concurrency=2, request=request)
+    with pytest.raises(RuntimeError):
+        await batcher.embed(["a"])
+    assert batcher.token_budget == 125
+
+    batcher = AdaptiveEmbeddingBatcher(token_count, max_token_budget=1000, min_token_budget=100, target_latency=0.5)
+    batcher._adapt(1.0)
+    assert batcher.token_budget == 750
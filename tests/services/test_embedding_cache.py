@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pytest
+
+from models.models import DocumentChunk, DocumentChunkMetadata
+from services import embedding_cache
+from services.embedding_cache import EmbeddingCache, aget_chunk_embeddings, aget_query_embedding, cache_key
+
+
+@pytest.fixture
+def query_cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), memory_size=1)
+    monkeypatch.setattr(embedding_cache, "_query_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_repeated_messages_are_embedded_once(query_cache):
+    calls = []
+
+    async def embed(texts):
+        calls.append(texts)
+        return [[0.5, 0.25]]
+
+    assert (await aget_query_embedding("Who won  last night?", embed=embed)).tolist() == [0.5, 0.25]
+    assert (await aget_query_embedding("who won last night?", embed=embed)).tolist() == [0.5, 0.25]
+    assert calls == [["who won last night?"]]
+    assert query_cache.memory_hits == 1 and query_cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_query_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_query_cache", None)
+    monkeypatch.setattr(embedding_cache, "QUERY_EMBEDDING_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(embedding_cache, "QUERY_EMBEDDING_CACHE_MAX_ENTRIES", 2)
+    cache = embedding_cache.get_query_embedding_cache()
+
+    async def embed(texts):
+        return [[float(len(texts[0]))]]
+
+    try:
+        for i in range(3):
+            await aget_query_embedding(f"message {i}", model="m", embed=embed)
+        # Storing an embedding again does not count as a new entry
+        await aget_query_embedding("message 2", model="m", embed=embed)
+        cache.set(cache_key("message 2", "m"), "m", [5.0])
+        assert len(cache) == 2 and cache.evictions == 1
+    finally:
+        cache.close()
+
+
+def test_disk_tier_survives_restart_and_memory_eviction(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(path, memory_size=1)
+    cache.set(cache_key("a", "m"), "m", [1.0, 2.0])
+    cache.set(cache_key("b", "m"), "m", [3.0, 4.0])
+    assert cache.get(cache_key("a", "m")).tolist() == [1.0, 2.0]
+    assert cache.disk_hits == 1
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get(cache_key("b", "m")).tolist() == [3.0, 4.0]
+    assert reopened.get(cache_key("b", "other-model")) is None
+    assert reopened.hit_rate() == 0.5
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_embedded_once_by_content(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "ingest.sqlite3"), memory_size=0)
+    monkeypatch.setattr(embedding_cache, "_ingest_cache", cache)
+    calls = []
+
+    async def embed(texts):
+        calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    embeddings = await aget_chunk_embeddings(["ab", "abc", "ab"], embed=embed)
+    assert embeddings.dtype == np.float32 and embeddings.flags.c_contiguous
+    assert embeddings.tolist() == [[2.0], [3.0], [2.0]]
+    assert (await aget_chunk_embeddings(["abc", "abcd"], embed=embed)).tolist() == [[3.0], [4.0]]
+    assert calls == [["ab", "abc"], ["abcd"]]
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), memory_size=0, max_entries=2)
+    cache.set_many([(cache_key("a", "m"), "m", [1.0]), (cache_key("b", "m"), "m", [2.0])])
+    cache.get(cache_key("a", "m"))
+    cache.set(cache_key("c", "m"), "m", [3.0])
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get(cache_key("b", "m")) is None
+    assert cache.get(cache_key("a", "m")).tolist() == [1.0]
+
+
+def test_export_and_import(tmp_path):
+    source = EmbeddingCache(str(tmp_path / "source.sqlite3"))
+    source.set_many([(cache_key(text, "m"), "m", [float(i)]) for i, text in enumerate("abc")])
+    assert source.export(str(tmp_path / "export.sqlite3")) == 3
+
+    target = EmbeddingCache(str(tmp_path / "target.sqlite3"), memory_size=0)
+    target.set(cache_key("a", "m"), "m", [9.0])
+    assert target.import_from(str(tmp_path / "export.sqlite3")) == 2
+    assert target.get(cache_key("a", "m")).tolist() == [9.0]
+    assert target.get(cache_key("c", "m")).tolist() == [2.0]
+
+
+def test_chunks_keep_their_embedding_row_without_copying():
+    embeddings = np.arange(6, dtype=np.float32).reshape(2, 3)
+    chunk = DocumentChunk(text="a", metadata=DocumentChunkMetadata(), embedding=embeddings[1])
+    assert np.shares_memory(chunk.embedding, embeddings)
+    assert json.loads(chunk.json())["embedding"] == [3.0, 4.0, 5.0]
+    assert DocumentChunk(text="a", metadata=DocumentChunkMetadata(), embedding=[1, 2]).embedding.dtype == np.float32
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from services import embedding_cache, embeddings
+from services.embedding_batcher import AdaptiveEmbeddingBatcher
+from services.embedding_cache import EmbeddingCache, aget_chunk_embeddings
+from services.embeddings import create_embedding_provider
+
+
+@pytest.fixture
+def hashing_provider(monkeypatch):
+    provider = create_embedding_provider("hashing", 64)
+    monkeypatch.setattr(embeddings, "_provider", provider)
+    return provider
+
+
+def test_hashing_embeddings_are_normalized_and_score_shared_words():
+    provider = create_embedding_provider("hashing", 256)
+    vectors = provider.embed(
+        ["Who won the Celtics game last night?", "celtics game last night", "Lakers trade rumors", ""]
+    )
+
+    assert vectors.shape == (4, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3].any()
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    # Stable across calls and processes, so vectors can be stored
+    assert np.array_equal(provider.embed(["Celtics game"]), provider.embed(["Celtics game"]))
+
+
+def test_providers_are_chosen_by_name_and_check_their_dimension():
+    assert create_embedding_provider("openai", 1536).model == "text-embedding-ada-002"
+    assert create_embedding_provider("hashing", 32).model == "feature-hashing-32"
+    with pytest.raises(ValueError):
+        create_embedding_provider("openai", 256)
+    with pytest.raises(ValueError):
+        create_embedding_provider("word2vec", 256)
+
+
+@pytest.mark.asyncio
+async def test_ingestion_runs_offline_with_the_hashing_provider(tmp_path, monkeypatch, hashing_provider):
+    cache = EmbeddingCache(str(tmp_path / "ingest.sqlite3"), memory_size=0)
+    monkeypatch.setattr(embedding_cache, "_ingest_cache", cache)
+    batcher = AdaptiveEmbeddingBatcher(lambda text: len(text.split()), max_token_budget=4)
+    texts = ["box score for the game", "player stats", "box score for the game"]
+
+    vectors = await aget_chunk_embeddings(texts, embed=batcher.embed)
+
+    assert np.array_equal(vectors, hashing_provider.embed(texts))
+    assert cache.get(embedding_cache.cache_key(texts[0], "feature-hashing-64")) is not None
@@ -0,0 +1,45 @@
+from services.live_games import LiveGameTracker
+
+
+def create_game(game_id, status="InProgress", home_score=0):
+    return {"GameID": game_id, "Status": status, "HomeTeamScore": home_score}
+
+
+def test_only_changed_games_get_new_versions():
+    tracker = LiveGameTracker()
+    assert tracker.update("2023-04-01", [create_game(1), create_game(2)]) == 1
+    assert tracker.update("2023-04-01", [create_game(1, home_score=2), create_game(2)]) == 2
+
+    token = tracker.version_token("2023-04-01")
+    assert token == f"{tracker.epoch}.2"
+    assert [g["GameID"] for g in tracker.changed_since("2023-04-01", f"{tracker.epoch}.1")] == [1]
+    assert tracker.changed_since("2023-04-01", token) == []
+    assert len(tracker.changed_since("2023-04-01", f"{tracker.epoch}.0")) == 2
+
+
+def test_versions_from_another_process_get_every_game():
+    tracker = LiveGameTracker()
+    other = LiveGameTracker()
+    tracker.update("2023-04-01", [create_game(1), create_game(2)])
+    other.update("2023-04-01", [create_game(1)])
+
+    assert len(tracker.changed_since("2023-04-01", other.version_token("2023-04-01"))) == 2
+    assert len(tracker.changed_since("2023-04-01", "garbage")) == 2
+    assert len(tracker.changed_since("2023-04-01", f"{tracker.epoch}.9")) == 2
+
+
+def test_etag_follows_the_content():
+    tracker = LiveGameTracker()
+    other = LiveGameTracker()
+    etag = tracker.etag([create_game(1)], "1", "who won?")
+    assert other.etag([create_game(1)], "1", "who won?") == etag
+    assert tracker.etag([create_game(1, home_score=3)], "1", "who won?") != etag
+    assert tracker.etag([create_game(1)], "1", "who lost?") != etag
+    assert tracker.etag([create_game(1)], "2", "who won?") != etag
+
+
+def test_oldest_days_are_forgotten():
+    tracker = LiveGameTracker(max_days=1)
+    tracker.update("2023-04-01", [create_game(1)])
+    tracker.update("2023-04-02", [create_game(2)])
+    assert tracker.version("2023-04-01") == 0
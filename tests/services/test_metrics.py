@@ -0,0 +1,37 @@
+from services.metrics import Counter, Gauge, Histogram, Registry, STAGE_DURATION, current_route, stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="upstream")
+    histogram.observe(0.5, stage="upstream")
+    histogram.observe(5.0, stage="upstream")
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="upstream",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="upstream",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="upstream",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="upstream"} 3' in text
+
+
+def test_counter_and_gauge():
+    registry = Registry()
+    errors = registry.register(Counter("errors_total", "Errors.", ["kind"]))
+    in_flight = registry.register(Gauge("in_flight", "In flight."))
+    errors.inc(kind='say "hi"')
+    with in_flight.track():
+        assert in_flight.value() == 1
+    assert in_flight.value() == 0
+    assert 'errors_total{kind="say \\"hi\\""} 1' in registry.render()
+
+
+def test_stage_is_attributed_to_current_route():
+    token = current_route.set("/games")
+    try:
+        with stage("embedding"):
+            pass
+    finally:
+        current_route.reset(token)
+    assert STAGE_DURATION.count(route="/games", stage="embedding") >= 1
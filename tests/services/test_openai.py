@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from openai.openai_response import OpenAIResponse
+
+from services import openai as openai_service
+from services import rate_limiter
+from services.rate_limiter import RateLimiter
+
+
+CHAT_MODEL = "gpt-3.5-turbo"
+
+
+@pytest.fixture
+def limiters(monkeypatch):
+    limiters = {
+        model: RateLimiter(requests_per_minute=1000, tokens_per_minute=100000)
+        for model in (openai_service.EMBEDDING_MODEL, CHAT_MODEL)
+    }
+    monkeypatch.setattr(rate_limiter, "_rate_limiters", dict(limiters))
+    monkeypatch.setattr(openai_service.openai, "api_key", "test")
+    return limiters
+
+
+@pytest.mark.asyncio
+async def test_aget_embeddings_requests_batches_concurrently_in_order(monkeypatch, limiters):
+    in_flight = 0
+    peak = 0
+    batches = []
+
+    async def arequest(self, method, url, params=None, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        batches.append(list(params["input"]))
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        data = {"data": [{"embedding": [float(text)]} for text in params["input"]]}
+        return OpenAIResponse(data, {"x-ratelimit-remaining-requests": "500"}), False, "test"
+
+    monkeypatch.setattr(openai_service.api_requestor.APIRequestor, "arequest", arequest)
+    monkeypatch.setattr(openai_service, "EMBEDDING_CONCURRENCY", 2)
+    monkeypatch.setattr(openai_service, "_request_slots", openai_service.weakref.WeakKeyDictionary())
+
+    texts = [str(i) for i in range(10)]
+    embeddings = await openai_service.aget_embeddings(texts, batch_size=3)
+
+    assert embeddings.dtype == openai_service.np.float32
+    assert embeddings.tolist() == [[float(i)] for i in range(10)]
+    assert len(batches) == 4
+    assert peak == 2
+    # The embedding model's limiter follows the remaining quota the responses report
+    assert limiters[openai_service.EMBEDDING_MODEL].requests.level <= 500
+    assert limiters[CHAT_MODEL].requests.level == 1000
+
+
+def test_chat_completions_settle_their_token_estimate_and_pause_on_429(monkeypatch, limiters):
+    responses = []
+
+    def request(self, method, url, params=None, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response, False, "test"
+
+    monkeypatch.setattr(openai_service.api_requestor.APIRequestor, "request", request)
+    responses.append(
+        openai_service.openai.error.RateLimitError("slow down", headers={"retry-after": "0.01"})
+    )
+    responses.append(
+        OpenAIResponse(
+            {"choices": [{"message": {"role": "assistant", "content": " True "}}], "usage": {"total_tokens": 10}},
+            {},
+        )
+    )
+
+    assert openai_service.get_chat_completion([{"role": "user", "content": "hi"}], model=CHAT_MODEL) == "True"
+    limiter = limiters[CHAT_MODEL]
+    assert limiter.paused_until > 0
+    # A 429 of one model does not pause the others
+    assert limiters[openai_service.EMBEDDING_MODEL].paused_until == 0
+    assert limiters[openai_service.EMBEDDING_MODEL].tokens.level == 100000
+    # Both attempts reserved their estimate, the successful one was corrected to the 10 tokens used
+    estimate = openai_service.estimate_tokens("hi") + openai_service.COMPLETION_TOKENS_ESTIMATE
+    assert limiter.tokens.level == pytest.approx(100000 - estimate - 10, abs=50)
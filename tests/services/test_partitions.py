@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+from services.partitions import (
+    DEFAULT_NAMESPACE,
+    UNDATED_SEARCH_MONTHS,
+    partition_for,
+    partitions_between,
+    search_filtered_partitions,
+    search_partitions,
+    search_recent_partitions,
+)
+
+
+def test_partitions_are_monthly():
+    assert partition_for("2023-04-01T19:30:00") == "nba-2023-04"
+    assert partition_for(None) == DEFAULT_NAMESPACE
+    assert partition_for("not a date") == DEFAULT_NAMESPACE
+    assert partitions_between(datetime.date(2022, 11, 15), datetime.date(2023, 1, 3)) == [
+        "nba-2022-11",
+        "nba-2022-12",
+        "nba-2023-01",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_widens_until_enough_hits():
+    matches = {
+        "nba-2023-03": [{"id": "a", "score": 0.5}],
+        "nba-2023-05": [{"id": "b", "score": 0.9}, {"id": "c", "score": 0.7}],
+        "nba-2023-06": [{"id": "d", "score": 0.99}],
+    }
+    searched = []
+
+    async def query(namespace):
+        searched.append(namespace)
+        return matches.get(namespace, [])
+
+    day = datetime.date(2023, 4, 10)
+    results = await search_partitions(query, day, day, top_k=2, namespaces=set(matches) | {"nba-2023-04"})
+    # Widening by one month found 3 hits, so June was never searched
+    assert searched == ["nba-2023-04", "nba-2023-03", "nba-2023-05"]
+    assert [match["id"] for match in results] == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_after_widening():
+    async def query(namespace):
+        return []
+
+    async def fallback():
+        return [{"id": "legacy", "score": 0.1}]
+
+    day = datetime.date(2023, 4, 10)
+    results = await search_partitions(query, day, day, top_k=5, fallback=fallback)
+    assert [match["id"] for match in results] == ["legacy"]
+
+
+@pytest.mark.asyncio
+async def test_undated_search_queries_recent_months_first():
+    # Ten seasons of monthly namespaces
+    namespaces = {DEFAULT_NAMESPACE} | {f"nba-{year}-{month:02d}" for year in range(2014, 2024) for month in range(1, 13)}
+    searched = []
+
+    async def query(namespace):
+        searched.append(namespace)
+        return [{"id": namespace or "legacy", "score": 0.5 if namespace else 0.9}]
+
+    results = await search_recent_partitions(query, top_k=2, namespaces=namespaces, months=3)
+    assert len(searched) == 4
+    assert searched == [DEFAULT_NAMESPACE, "nba-2023-12", "nba-2023-11", "nba-2023-10"]
+    assert [match["id"] for match in results] == ["legacy", "nba-2023-12"]
+
+    searched.clear()
+    await search_recent_partitions(query, top_k=2, namespaces=namespaces)
+    assert len(searched) == 1 + UNDATED_SEARCH_MONTHS == 13
+
+
+@pytest.mark.asyncio
+async def test_undated_search_falls_back_to_older_months_when_recent_ones_are_sparse():
+    namespaces = {DEFAULT_NAMESPACE, "nba-2019-01", "nba-2023-11", "nba-2023-12"}
+    matches = {"nba-2019-01": [{"id": "old", "score": 0.8}], "nba-2023-12": [{"id": "new", "score": 0.6}]}
+    searched = []
+
+    async def query(namespace):
+        searched.append(namespace)
+        return matches.get(namespace, [])
+
+    results = await search_recent_partitions(query, top_k=2, namespaces=namespaces, months=2)
+    assert searched == [DEFAULT_NAMESPACE, "nba-2023-12", "nba-2023-11", "nba-2019-01"]
+    assert [match["id"] for match in results] == ["old", "new"]
+
+
+@pytest.mark.asyncio
+async def test_filtered_search_does_not_widen_past_the_date_filter():
+    date_filter = {"created_at": {"$gte": 1681084800, "$lte": 1681257600}}
+    namespaces = {DEFAULT_NAMESPACE, "nba-2023-02", "nba-2023-03", "nba-2023-04", "nba-2023-05", "nba-2023-06"}
+    calls = []
+
+    async def query(namespace, filter):
+        calls.append((namespace, filter))
+        return [{"id": "legacy", "score": 0.4}] if namespace == DEFAULT_NAMESPACE else []
+
+    day = datetime.date(2023, 4, 10)
+    results = await search_filtered_partitions(query, date_filter, day, day, top_k=5, namespaces=namespaces)
+    # Only the month of the range and the default namespace, each with the unchanged filter
+    assert calls == [("nba-2023-04", date_filter), (DEFAULT_NAMESPACE, date_filter)]
+    assert [match["id"] for match in results] == ["legacy"]
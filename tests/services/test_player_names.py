@@ -0,0 +1,85 @@
+import pytest
+
+from services.player_names import AmbiguousPlayerNameError, PlayerNameDirectory, PlayerNameIndex, name_key
+from services.player_stats import PlayerStatsIndex
+
+
+def create_index():
+    return PlayerNameIndex(
+        [
+            {"PlayerID": 1, "FirstName": "Nikola", "LastName": "Jokić", "Team": "DEN"},
+            {"PlayerID": 2, "FirstName": "Stephen", "LastName": "Curry", "Team": "GS"},
+            {"PlayerID": 3, "FirstName": "Seth", "LastName": "Curry", "Team": "BKN"},
+            {"PlayerID": 4, "FirstName": "Shai", "LastName": "Gilgeous-Alexander", "Team": "OKC"},
+            {"PlayerID": 5, "FirstName": "P.J.", "LastName": "Washington", "Team": "CHA"},
+        ]
+    )
+
+
+def test_name_key_strips_accents_and_punctuation():
+    assert name_key("P.J. Washington") == "pj washington"
+    assert name_key("Nikola Jokić") == "nikola jokic"
+
+
+def test_resolve_exact_nickname_and_alias():
+    index = create_index()
+    assert index.resolve("nikola jokic") == 1
+    assert index.resolve("The Joker") == 1
+    assert index.resolve("Steph Curry") == 2
+    assert index.resolve("SGA") == 4
+    assert index.resolve("pj washington") == 5
+
+
+def test_resolve_last_name_only_when_unique():
+    index = create_index()
+    assert index.resolve("Jokic") == 1
+    with pytest.raises(AmbiguousPlayerNameError) as error:
+        index.resolve("Curry")
+    assert [player["PlayerID"] for player in error.value.candidates] == [2, 3]
+    assert "Stephen Curry" in str(error.value) and "Seth Curry" in str(error.value)
+
+
+def test_resolve_fuzzy_and_unknown_names():
+    index = create_index()
+    assert index.resolve("Nikola Jokovic") == 1
+    assert index.resolve("Shai Gilgeous Alexandr") == 4
+    assert index.resolve("Michael Jordan") is None
+    assert index.resolve("") is None
+
+
+def create_kobe_index():
+    return PlayerNameIndex(
+        [
+            {"PlayerID": 1, "FirstName": "Kobe", "LastName": "Brown", "Team": "LAC"},
+            {"PlayerID": 2, "FirstName": "Thomas", "LastName": "Bryant", "Team": "MIA"},
+            {"PlayerID": 3, "FirstName": "Jaylen", "LastName": "Brown", "Team": "BOS"},
+        ]
+    )
+
+
+def test_fuzzy_match_needs_a_clear_margin():
+    index = create_kobe_index()
+    # Close to both Kobe Brown and Thomas Bryant, so neither is picked
+    assert index.resolve("Kobe Bryant") is None
+    assert index.resolve("Kobe Brwn") == 1
+    assert index.resolve("Thomas Bryan") == 2
+    with pytest.raises(AmbiguousPlayerNameError):
+        index.resolve("Brown")
+
+
+def test_lookup_tries_the_days_exact_names_first():
+    directory = PlayerNameDirectory()
+    directory.index = create_kobe_index()
+    player_stats_index = PlayerStatsIndex(
+        [
+            {"PlayerID": 1, "Name": "Kobe Brown", "Points": 4},
+            {"PlayerID": 2, "Name": "Thomas Bryant", "Points": 10},
+            {"PlayerID": 8, "Name": "Kobe Bryant", "Points": 81},
+        ]
+    )
+
+    assert [stats["PlayerID"] for stats in directory.lookup(player_stats_index, (), ["Kobe Bryant"])] == [8]
+    assert [stats["PlayerID"] for stats in directory.lookup(player_stats_index, (), ["Kobe Brwn"])] == [1]
+    assert directory.lookup(player_stats_index, (), ["Michael Jordan"]) == []
+    with pytest.raises(AmbiguousPlayerNameError):
+        directory.lookup(player_stats_index, (), ["Brown"])
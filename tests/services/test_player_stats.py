@@ -0,0 +1,29 @@
+from services.player_stats import PLAYER_STAT_FIELDS, PlayerStatsIndex, normalize_name
+
+
+def create_player_record(player_id, name):
+    record = {field: 0 for field in PLAYER_STAT_FIELDS}
+    record.update(PlayerID=player_id, Name=name, Team="DEN", InjuryStatus="Scrambled")
+    return record
+
+
+def test_normalize_name_ignores_case_accents_and_spacing():
+    assert normalize_name("Nikola  Jokić") == normalize_name("nikola jokic")
+
+
+def test_index_projects_and_looks_up_players():
+    index = PlayerStatsIndex(
+        [create_player_record(20000571, "Nikola Jokić"), create_player_record(20000441, "Jamal Murray")]
+    )
+    stats = index.get_by_id("20000571")
+    assert list(stats.keys()) == PLAYER_STAT_FIELDS
+    assert index.get_by_name("nikola jokic") is stats
+    assert index.get_by_id("not-an-id") is None
+
+
+def test_lookup_many_deduplicates_in_request_order():
+    index = PlayerStatsIndex(
+        [create_player_record(1, "Jamal Murray"), create_player_record(2, "Aaron Gordon")]
+    )
+    found = index.lookup_many(player_ids=["2", "99"], player_names=["Jamal Murray", "Aaron Gordon"])
+    assert [stats["PlayerID"] for stats in found] == [2, 1]
@@ -0,0 +1,55 @@
+import datetime
+
+import pytest
+
+from services import prefetch, sportsdata
+
+NOW = datetime.datetime(2023, 4, 1, 23, 0, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    calls = []
+    games = [
+        {"GameID": 1, "Day": "2023-04-01T00:00:00", "Season": 2023, "Status": "Scheduled",
+         "DateTimeUTC": "2023-04-01T23:03:00", "HomeTeam": "BOS", "AwayTeam": "MIA"},
+        {"GameID": 2, "Day": "2023-04-01T00:00:00", "Season": 2023, "Status": "Scheduled",
+         "DateTimeUTC": "2023-04-02T02:00:00", "HomeTeam": "LAL", "AwayTeam": "DEN"},
+        {"GameID": 3, "Day": "2023-04-01T00:00:00", "Season": 2023, "Status": "Final",
+         "DateTimeUTC": "2023-04-01T19:00:00", "HomeTeam": "NYK", "AwayTeam": "PHI"},
+    ]
+
+    def record(name):
+        async def _fetch(arg, refresh=False):
+            calls.append((name, arg, refresh))
+            return games if name == "games" else []
+        return _fetch
+
+    monkeypatch.setattr(sportsdata, "get_games_by_date", record("games"))
+    monkeypatch.setattr(sportsdata, "get_player_game_stats_by_date", record("box_scores"))
+    monkeypatch.setattr(sportsdata, "get_standings", record("standings"))
+    monkeypatch.setattr(sportsdata, "get_players_basic", record("roster"))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_tick_warms_imminent_and_final_games_once(fetched):
+    scheduler = prefetch.PrefetchScheduler()
+    delay = await scheduler.tick(NOW)
+
+    rosters = {arg for name, arg, _ in fetched if name == "roster"}
+    assert rosters == {"BOS", "MIA", "NYK", "PHI"}
+    assert delay == prefetch.LIVE_POLL_INTERVAL
+
+    fetched.clear()
+    await scheduler.tick(NOW)
+    assert [name for name, _, _ in fetched] == ["games"]
+
+
+@pytest.mark.asyncio
+async def test_tick_sleeps_until_next_tipoff(fetched):
+    scheduler = prefetch.PrefetchScheduler()
+    early = datetime.datetime(2023, 4, 1, 20, 0, tzinfo=datetime.timezone.utc)
+    assert await scheduler.tick(early) == prefetch.IDLE_INTERVAL
+    shortly_before = datetime.datetime(2023, 4, 1, 22, 50, tzinfo=datetime.timezone.utc)
+    assert await scheduler.tick(shortly_before) == pytest.approx(8 * 60.0)
@@ -0,0 +1,74 @@
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import BULK, INTERACTIVE, RateLimiter, get_rate_limiter, parse_duration
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_requests_wait_for_the_bucket_to_refill():
+    clock = Clock()
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, bulk_headroom=0, clock=clock)
+    assert limiter._reserve(10, INTERACTIVE) == 0
+    assert limiter._reserve(10, INTERACTIVE) == 0
+    # One request refills every 30 seconds, but waits are capped so header updates apply
+    assert limiter._reserve(10, INTERACTIVE) == 1.0
+    clock.now = 30.0
+    assert limiter._reserve(10, INTERACTIVE) == 0
+
+
+def test_bulk_calls_leave_headroom_and_yield_to_interactive_ones():
+    clock = Clock()
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=1000, bulk_headroom=0.1, clock=clock)
+    assert limiter._reserve(850, BULK) == 0
+    # 150 tokens remain, but bulk calls may not go below 100
+    assert limiter._reserve(100, BULK) > 0
+    assert limiter._reserve(100, INTERACTIVE) == 0
+
+    clock.now = 60.0
+    limiter._start_waiting(INTERACTIVE)
+    assert limiter._reserve(1, BULK) > 0
+    limiter._stop_waiting(INTERACTIVE, 0.0)
+    assert limiter._reserve(1, BULK) == 0
+
+
+def test_headers_lower_the_buckets_and_429s_pause_every_call():
+    clock = Clock()
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=1000, clock=clock)
+    limiter.update_from_headers(
+        {"x-ratelimit-limit-tokens": "600", "x-ratelimit-remaining-tokens": "50", "x-ratelimit-remaining-requests": "99"}
+    )
+    assert limiter.tokens.capacity == 600 and limiter.tokens.level == 50
+    assert limiter.requests.level == 99
+
+    limiter.throttle({"x-ratelimit-reset-tokens": "6m0s", "x-ratelimit-reset-requests": "20ms"}, "/embeddings")
+    assert limiter.paused_until == 360.0
+    assert limiter._reserve(1, INTERACTIVE) == 1.0
+    clock.now = 360.0
+    assert limiter._reserve(1, INTERACTIVE) == 0
+
+
+def test_each_model_has_its_own_limiter(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_rate_limiters", {})
+    assert get_rate_limiter("text-embedding-ada-002") is get_rate_limiter("text-embedding-ada-002")
+    assert get_rate_limiter("text-embedding-ada-002") is not get_rate_limiter("gpt-4")
+    assert {labels for labels in rate_limiter._remaining()} == {
+        ("text-embedding-ada-002", "requests"),
+        ("text-embedding-ada-002", "tokens"),
+        ("gpt-4", "requests"),
+        ("gpt-4", "tokens"),
+    }
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h2m", 3720.0), ("2.5", 2.5), ("soon", None), (None, None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
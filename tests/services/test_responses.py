@@ -0,0 +1,25 @@
+import json
+
+from services.responses import GAME_FIELDS, NBAJSONResponse, parse_fields, project
+
+
+def test_parse_fields():
+    assert parse_fields(None, GAME_FIELDS) == GAME_FIELDS
+    assert parse_fields("all", GAME_FIELDS) is None
+    assert parse_fields("GameID, Status,", GAME_FIELDS) == ["GameID", "Status"]
+    assert parse_fields(None, None) is None
+
+
+def test_project_records_and_lists():
+    games = [{"GameID": 1, "Status": "Final", "Channel": "TNT"}, {"GameID": 2}]
+    assert project(games, ["GameID", "Status"]) == [{"GameID": 1, "Status": "Final"}, {"GameID": 2}]
+    assert project(games[0], None) is games[0]
+    assert project("No scores availible for that day", ["GameID"]) == "No scores availible for that day"
+
+
+def test_response_body_is_compact_json_bytes():
+    response = NBAJSONResponse({"game_data": [{"GameID": 1}], "name": "Jokić"})
+    assert json.loads(response.body) == {"game_data": [{"GameID": 1}], "name": "Jokić"}
+    assert b" " not in response.body
+    assert NBAJSONResponse(b"[]").body == b"[]"
+    assert NBAJSONResponse(memoryview(b"[]")).headers["content-length"] == "2"
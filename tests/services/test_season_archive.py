@@ -0,0 +1,48 @@
+import numpy as np
+
+from services.season_archive import SeasonArchive, write_archive
+from services.season_store import SeasonTable
+
+
+def create_table():
+    table = SeasonTable(2022)
+    table.ingest_day(
+        "2022-01-05T00:00:00",
+        [
+            {"PlayerID": 1, "Name": "Luka Dončić", "TeamID": 7, "Team": "DAL", "OpponentID": 8,
+             "HomeOrAway": "HOME", "Points": 35, "FieldGoalsMade": 12, "FieldGoalsAttempted": 25},
+            {"PlayerID": 2, "Name": "Ja Morant", "TeamID": 8, "Team": "MEM", "OpponentID": 7,
+             "HomeOrAway": "AWAY", "Points": 28, "FieldGoalsMade": 11, "FieldGoalsAttempted": 20},
+        ],
+    )
+    return table
+
+
+def test_archive_round_trips_json_and_arrays(tmp_path):
+    path = str(tmp_path / "season_2022.nbaarc")
+    standings = [{"Team": "PHO", "Wins": 64}]
+    all_stars = [{"PlayerID": 1, "Name": "Devin Booker"}]
+    write_archive(path, {"standings": standings, "all_stars": all_stars, "values": np.arange(5, dtype=np.int32)})
+
+    archive = SeasonArchive(path)
+    assert archive.season == 2022
+    assert archive.json("standings") == standings
+    assert archive.json_bytes("standings") == b'[{"Team":"PHO","Wins":64}]'
+    # The All-Stars are decoded once when the archive is opened
+    assert archive.json("all_stars") == all_stars
+    assert archive.json("all_stars") is archive.json("all_stars")
+    assert archive.array("values").tolist() == [0, 1, 2, 3, 4]
+    assert "missing" not in archive
+
+
+def test_season_table_is_served_from_archive(tmp_path):
+    path = str(tmp_path / "season_2022.nbaarc")
+    table = create_table()
+    write_archive(path, table.to_archive_sections())
+
+    archived = SeasonTable.from_archive(SeasonArchive(path))
+    assert archived.archived
+    assert not archived.stats.flags.writeable
+    rows = archived.select(player_id=archived.resolve_player(player_name="luka doncic"))
+    assert archived.totals(rows)["Points"] == 35
+    assert archived.splits(archived.select(team="MEM"), "home_away")["AWAY"]["Points"] == 28
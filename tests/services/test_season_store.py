@@ -0,0 +1,197 @@
+from collections import OrderedDict
+
+import pytest
+
+from services import season_store, sportsdata
+from services.season_store import (
+    SeasonOutOfRangeError,
+    SeasonTable,
+    get_closed_dates,
+    get_season_table,
+    is_ingesting,
+    stop_ingestions,
+)
+
+
+def create_stat_line(player_id, name, team_id, team, home, points, fgm, fga):
+    return {
+        "PlayerID": player_id,
+        "Name": name,
+        "TeamID": team_id,
+        "Team": team,
+        "OpponentID": 2 if team_id == 1 else 1,
+        "HomeOrAway": "HOME" if home else "AWAY",
+        "Games": 1,
+        "Points": points,
+        "FieldGoalsMade": fgm,
+        "FieldGoalsAttempted": fga,
+        "PlayerEfficiencyRating": 20.0,
+    }
+
+
+def create_table():
+    table = SeasonTable(2023)
+    table.ingest_day(
+        "2023-01-01T00:00:00",
+        [
+            create_stat_line(10, "Jayson Tatum", 1, "BOS", True, 30, 10, 20),
+            create_stat_line(20, "Jimmy Butler", 2, "MIA", False, 20, 8, 16),
+        ],
+    )
+    table.ingest_day(
+        "2023-02-03T00:00:00",
+        [create_stat_line(10, "Jayson Tatum", 1, "BOS", False, 40, 14, 21)],
+    )
+    return table
+
+
+def test_totals_and_averages_for_a_player():
+    table = create_table()
+    rows = table.select(player_id=table.resolve_player(player_name="jayson tatum"))
+    totals = table.totals(rows)
+    assert totals["Games"] == 2
+    assert totals["Points"] == 70
+    assert totals["FieldGoalsPercentage"] == round(100 * 24 / 41, 1)
+    averages = table.averages(rows)
+    assert averages["Points"] == 35
+    assert averages["PlayerEfficiencyRating"] == 20
+
+
+def test_select_by_team_and_dates():
+    table = create_table()
+    assert len(table.select(team="mia")) == 1
+    assert len(table.select(team="BOS", start_date="2023-02-01")) == 1
+    assert len(table.select(player_id=99)) == 0
+
+
+def test_splits():
+    table = create_table()
+    rows = table.select(player_id=10)
+    home_away = table.splits(rows, "home_away")
+    assert home_away["HOME"]["Points"] == 30
+    assert home_away["AWAY"]["Points"] == 40
+    assert set(table.splits(rows, "month")) == {"2023-01", "2023-02"}
+    assert set(table.splits(rows, "opponent")) == {"MIA"}
+
+
+def test_dates_are_ingested_once():
+    table = create_table()
+    table.ingest_day("2023-01-01T00:00:00", [create_stat_line(30, "X", 1, "BOS", True, 1, 1, 1)])
+    assert len(table) == 3
+
+
+def test_closed_dates_require_every_game_closed():
+    games = [
+        {"Day": "2023-01-01T00:00:00", "IsClosed": True},
+        {"Day": "2023-01-02T00:00:00", "IsClosed": True},
+        {"Day": "2023-01-02T00:00:00", "IsClosed": False},
+    ]
+    assert get_closed_dates(games) == ["2023-01-01"]
+
+
+def test_aggregates_are_updated_as_days_are_ingested():
+    table = create_table()
+    player = table.player_summary(10, last_n=1)
+    assert player["totals"]["Points"] == 70
+    assert player["averages"] == table.averages(table.select(player_id=10))
+    assert player["home"]["Points"] == 30 and player["away"]["Points"] == 40
+    assert player["last_n"]["Points"] == 40
+
+    # An earlier day ingested late does not displace the most recent game
+    table.ingest_day("2022-12-01T00:00:00", [create_stat_line(10, "Jayson Tatum", 1, "BOS", True, 10, 4, 10)])
+    player = table.player_summary(10, last_n=1)
+    assert player["totals"]["Games"] == 3
+    assert player["last_n"]["Points"] == 40
+
+
+def test_team_aggregates_sum_players_per_game():
+    table = create_table()
+    table.ingest_day(
+        "2023-02-05T00:00:00",
+        [
+            create_stat_line(10, "Jayson Tatum", 1, "BOS", True, 25, 9, 18),
+            create_stat_line(11, "Jaylen Brown", 1, "BOS", True, 15, 6, 12),
+        ],
+    )
+    team = table.team_summary("bos", last_n=1)
+    assert team["totals"]["Games"] == 3
+    assert team["averages"]["Points"] == round(110 / 3, 2)
+    assert "PlayerEfficiencyRating" not in team["averages"]
+    assert team["last_n"]["Points"] == 40
+    assert table.team_summary("LAL") is None
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    season_games = [
+        {"Day": "2023-01-01T00:00:00", "IsClosed": True},
+        {"Day": "2023-01-02T00:00:00", "IsClosed": True},
+        {"Day": "2023-01-03T00:00:00", "IsClosed": True},
+    ]
+    calls = []
+
+    async def get_season_games(season):
+        return season_games
+
+    async def get_player_game_stats_by_date(date, cache=True):
+        assert not cache
+        calls.append(date)
+        if date == "2023-01-02" and calls.count(date) == 1:
+            raise RuntimeError("upstream error")
+        return [create_stat_line(10, "Jayson Tatum", 1, "BOS", True, 30, 10, 20)]
+
+    monkeypatch.setattr(sportsdata, "get_season_games", get_season_games)
+    monkeypatch.setattr(sportsdata, "get_player_game_stats_by_date", get_player_game_stats_by_date)
+    monkeypatch.setattr(sportsdata, "current_season", lambda: 2023)
+    monkeypatch.setattr(season_store, "get_archive", lambda season: None)
+    monkeypatch.setattr(season_store, "get_archived_seasons", lambda: [2021])
+    monkeypatch.setattr(season_store, "_tables", OrderedDict())
+    monkeypatch.setattr(season_store, "_ingestions", {})
+    monkeypatch.setattr(season_store, "_ingested_at", {})
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_season_is_ingested_in_the_background_and_skips_failed_days(upstream, monkeypatch):
+    table = await get_season_table(2023)
+    # The table is returned before any day is ingested
+    assert len(table.dates) == 0
+    assert is_ingesting(2023)
+
+    await season_store._ingestions[2023]
+    assert not is_ingesting(2023)
+    assert table.dates == {"2023-01-01", "2023-01-03"}
+    assert table.player_summary(10)["totals"]["Games"] == 2
+
+    # The failed day is retried once the refresh interval has passed
+    assert await get_season_table(2023) is table
+    assert not is_ingesting(2023)
+    monkeypatch.setattr(season_store, "REFRESH_INTERVAL", 0)
+    await get_season_table(2023)
+    await season_store._ingestions[2023]
+    assert table.dates == {"2023-01-01", "2023-01-02", "2023-01-03"}
+    assert upstream.count("2023-01-01") == 1
+    await stop_ingestions()
+
+
+@pytest.mark.asyncio
+async def test_seasons_outside_the_archived_range_are_rejected(upstream):
+    for season in (2020, 2024):
+        with pytest.raises(SeasonOutOfRangeError):
+            await get_season_table(season)
+    assert season_store._tables == {}
+    assert upstream == []
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_tables_are_evicted(upstream, monkeypatch):
+    monkeypatch.setattr(season_store, "MAX_TABLES", 2)
+    for season in (2023, 2021):
+        await get_season_table(season)
+        await season_store._ingestions[season]
+    await get_season_table(2023)
+    await get_season_table(2022)
+    # 2021 was used least recently
+    assert list(season_store._tables) == [2023, 2022]
+    assert 2021 not in season_store._ingested_at
+    await stop_ingestions()
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return {"games": 12}
+
+    results = await asyncio.gather(*[flight.do("today", fetch) for _ in range(10)])
+    assert results == [{"games": 12}] * 10
+    assert len(executions) == 1
+    assert flight.deduplicated == 9
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        flight.do("today", fail), flight.do("today", fail), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def succeed():
+        return "ok"
+
+    assert await flight.do("today", succeed) == "ok"
+    assert flight.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", fetch))
+    second = asyncio.ensure_future(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
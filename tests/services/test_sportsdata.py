@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import sportsdata
+from services.cache import TTLCache
+from services.circuit_breaker import CircuitBreaker
+from services.sportsdata import SportsDataClient, SportsDataClientError, SportsDataError
+
+
+def create_client(handler):
+    return SportsDataClient(
+        base_url="https://sportsdata.test/v3/nba",
+        api_key="test-key",
+        transport=httpx.MockTransport(handler),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_json_passes_key_and_decodes_payload():
+    def handler(request: httpx.Request):
+        assert request.url.path == "/v3/nba/scores/json/Standings/2023"
+        assert request.url.params["key"] == "test-key"
+        return httpx.Response(200, json=[{"Team": "BOS"}])
+
+    client = create_client(handler)
+    assert await client.get_json("scores/json/Standings/2023") == [{"Team": "BOS"}]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_json_retries_server_errors():
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        if len(calls) < 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    client = create_client(handler)
+    assert await client.get_json("stats/json/AllStars/2023") == {"ok": True}
+    assert len(calls) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_json_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    client = create_client(handler)
+    with pytest.raises(SportsDataClientError) as exc_info:
+        await client.get_json("scores/json/PlayersBasic/XXX")
+    assert (exc_info.value.path, exc_info.value.status_code) == ("scores/json/PlayersBasic/XXX", 404)
+    assert len(calls) == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries():
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    client = create_client(handler)
+    client.retry_budget.tokens = 0
+    with pytest.raises(SportsDataError):
+        await client.get_json("scores/json/GamesByDate/2023-APR-01")
+    assert len(calls) == 1
+    await client.close()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # Route the module-level fetch through a mock transport with a fresh cache and breaker
+    responses = []
+
+    def handler(request: httpx.Request):
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        return response() if callable(response) else response
+
+    clock = [0.0]
+    monkeypatch.setattr(sportsdata, "_client", create_client(handler))
+    monkeypatch.setattr(sportsdata, "_cache", TTLCache(clock=lambda: clock[0]))
+    monkeypatch.setattr(sportsdata, "_breaker", CircuitBreaker(min_calls=1, window_size=1))
+    monkeypatch.setattr(sportsdata, "MAX_ATTEMPTS", 1)
+    yield responses, clock
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_stale_payload_while_revalidating(upstream):
+    responses, clock = upstream
+    path = "scores/json/PlayersBasic/BOS"
+    responses.extend([httpx.Response(200, json=["old"]), httpx.Response(200, json=["new"])])
+    assert await sportsdata.fetch(path) == ["old"]
+
+    clock[0] = sportsdata.ROSTER_TTL + 1
+    stale = {}
+    token = sportsdata.served_stale.set(stale)
+    try:
+        assert await sportsdata.fetch(path) == ["old"]
+    finally:
+        sportsdata.served_stale.reset(token)
+    assert stale == {path: pytest.approx(1.0)}
+
+    await asyncio.gather(*sportsdata._revalidations)
+    assert await sportsdata.fetch(path) == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_uncached_fetch_leaves_the_cache_alone(upstream):
+    responses, clock = upstream
+    path = "stats/json/PlayerGameStatsByDate/2023-01-01"
+    responses.append(httpx.Response(200, json=[{"PlayerID": 1}]))
+    assert await sportsdata.get_player_game_stats_by_date("2023-01-01", cache=False) == [{"PlayerID": 1}]
+    assert sportsdata.get_cache().get_stale(path) is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_last_good_payload_when_upstream_fails(upstream):
+    responses, clock = upstream
+    path = "scores/json/PlayersBasic/BOS"
+    responses.extend([httpx.Response(200, json=["good"]), httpx.Response(503)])
+    assert await sportsdata.fetch(path) == ["good"]
+
+    clock[0] = sportsdata.ROSTER_TTL + sportsdata.STALE_WHILE_REVALIDATE + 1
+    assert await sportsdata.fetch(path) == ["good"]
+    # The failure opened the breaker, so the next miss fails fast without data to fall back on
+    assert sportsdata.get_circuit_breaker().state == "open"
+    with pytest.raises(sportsdata.CircuitOpenError):
+        await sportsdata.fetch("scores/json/PlayersBasic/LAL")
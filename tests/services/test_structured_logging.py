@@ -0,0 +1,50 @@
+import json
+import logging
+
+import pytest
+
+from services.structured_logging import Payload, SamplingFilter, configure_logging, stop_logging
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "app.log"
+    yield path
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if handler.__class__.__name__ == "DroppingQueueHandler":
+            root.removeHandler(handler)
+
+
+def read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_large_payloads_are_logged_as_size_and_hash(log_file):
+    configure_logging(str(log_file), "INFO")
+    games = [{"GameID": i, "Status": "Final"} for i in range(100)]
+    logging.getLogger("test").info("games", extra={"fields": {"day": "2023-04-01", "game_data": Payload(games)}})
+    stop_logging()
+
+    [entry] = read_entries(log_file)
+    assert entry["msg"] == "games" and entry["day"] == "2023-04-01"
+    assert set(entry["game_data"]) == {"bytes", "blake2b"}
+
+
+def test_debug_logs_whole_payloads(log_file):
+    configure_logging(str(log_file), "DEBUG")
+    games = [{"GameID": i} for i in range(100)]
+    logging.getLogger("test").debug("games", extra={"fields": {"game_data": Payload(games)}})
+    stop_logging()
+
+    [entry] = read_entries(log_file)
+    assert entry["game_data"] == games
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter(sample_rate=0.0)
+    info = logging.LogRecord("test", logging.INFO, __file__, 1, "info", None, None)
+    warning = logging.LogRecord("test", logging.WARNING, __file__, 1, "warning", None, None)
+    assert not sampler.filter(info)
+    assert sampler.filter(warning)